@@ -3,26 +3,25 @@ Custom Django admin dashboards and analytics for Packaxis Packaging Canada.
 Provides revenue tracking, order analytics, inventory management, and data exports.
 """
 
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.http import FileResponse, HttpResponseBadRequest, JsonResponse
+from django.utils.dateparse import parse_date
+from django.shortcuts import redirect
 from django.utils.html import format_html
-from django.urls import path
-from django.views.decorators.cache import cache_page
+from django.urls import path, reverse
 from django.template.response import TemplateResponse
 from django.db.models import Sum, Count, Q, F
 from django.utils import timezone
 from datetime import timedelta
-import csv
-from io import BytesIO
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter, landscape
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
 
-from apps.orders.models import Order, OrderLine
-from apps.products.models import Product, Category, ProductVariant
+from apps.orders.models import Order
+from apps.products.models import Product
 from apps.accounts.models import User
 from apps.payments.models import Payment
+from apps.analytics.models import CustomMetrics, DailyMetrics, ProductAnalytics
+from apps.core.routers import use_replica
+from . import exports, reports
+from .tasks import generate_export
 
 
 class AdminDashboardMixin:
@@ -36,76 +35,85 @@ class AdminDashboardMixin:
             path('revenue-export/', self.admin_site.admin_view(self.export_revenue_csv), name='revenue_export'),
             path('orders-export/', self.admin_site.admin_view(self.export_orders_csv), name='orders_export'),
             path('customers-export/', self.admin_site.admin_view(self.export_customers_csv), name='customers_export'),
+            path('exports/<str:name>/', self.admin_site.admin_view(self.export_download), name='export_download'),
+            path('reports/<str:report_type>.pdf', self.admin_site.admin_view(self.report_pdf), name='report_pdf'),
+            path('reports/status/<str:name>/', self.admin_site.admin_view(self.report_status), name='report_status'),
+            path('reports/download/<str:name>.pdf', self.admin_site.admin_view(self.report_download), name='report_download'),
         ]
         return custom_urls + urls
     
-    @cache_page(60 * 5)  # Cache for 5 minutes
+    @use_replica()
     def dashboard_view(self, request):
-        """Main admin dashboard with analytics."""
+        """Main admin dashboard with analytics (read from the replica when configured)."""
         # Time period calculations
-        today = timezone.now().date()
+        today = timezone.localdate()
         week_ago = today - timedelta(days=7)
         month_ago = today - timedelta(days=30)
         
-        # Revenue metrics
-        total_revenue = Order.objects.filter(
-            status__in=['PROCESSING', 'SHIPPED', 'DELIVERED']
-        ).aggregate(Sum('total'))['total__sum'] or 0
-        
-        month_revenue = Order.objects.filter(
-            created_at__date__gte=month_ago,
-            status__in=['PROCESSING', 'SHIPPED', 'DELIVERED']
-        ).aggregate(Sum('total'))['total__sum'] or 0
-        
-        week_revenue = Order.objects.filter(
-            created_at__date__gte=week_ago,
-            status__in=['PROCESSING', 'SHIPPED', 'DELIVERED']
-        ).aggregate(Sum('total'))['total__sum'] or 0
-        
-        # Order metrics
-        total_orders = Order.objects.count()
-        pending_orders = Order.objects.filter(status='PENDING').count()
-        processing_orders = Order.objects.filter(status='PROCESSING').count()
-        
-        # Customer metrics
-        total_customers = User.objects.filter(role__in=['B2C', 'B2B']).count()
-        b2b_customers = User.objects.filter(role='B2B').count()
-        new_customers = User.objects.filter(
-            role__in=['B2C', 'B2B'],
-            created_at__date__gte=month_ago
-        ).count()
-        
-        # Product metrics
-        total_products = Product.objects.count()
-        low_stock = ProductVariant.objects.filter(stock__lt=F('stock_minimum')).count()
+        # Revenue metrics come from the rolled-up daily tables (apps.analytics.rollups)
+        days = list(DailyMetrics.objects.filter(date__gte=month_ago).order_by('date'))
+        month_revenue = sum(day.revenue for day in days)
+        week_revenue = sum(day.revenue for day in days if day.date >= week_ago)
+        total_revenue = DailyMetrics.objects.aggregate(total=Sum('revenue'))['total'] or 0
+        segments = CustomMetrics.objects.filter(date__gte=month_ago).aggregate(
+            b2b_count=Sum('b2b_orders'),
+            b2c_count=Sum('b2c_orders'),
+            b2b_revenue=Sum(F('aov_b2b') * F('b2b_orders')),
+            b2c_revenue=Sum(F('aov_b2c') * F('b2c_orders')),
+        )
         
-        # Payment metrics
-        successful_payments = Payment.objects.filter(status='CAPTURED').count()
-        failed_payments = Payment.objects.filter(status='FAILED').count()
+        # Live figures: one conditional aggregate per table
+        orders = Order.objects.aggregate(
+            total=Count('id'),
+            pending=Count('id', filter=Q(status=Order.Status.PENDING)),
+            processing=Count('id', filter=Q(status=Order.Status.PROCESSING)),
+        )
+        customers = User.objects.filter(role__in=['B2C', 'B2B']).aggregate(
+            total=Count('id'),
+            b2b=Count('id', filter=Q(role='B2B')),
+            new=Count('id', filter=Q(date_joined__date__gte=month_ago)),
+        )
+        products = Product.objects.aggregate(
+            total=Count('id'),
+            low_stock=Count('id', filter=Q(stock_qty__lt=F('low_stock_alert'))),
+        )
+        payments = Payment.objects.aggregate(
+            successful=Count('id', filter=Q(status=Payment.Status.CAPTURED)),
+            failed=Count('id', filter=Q(status=Payment.Status.FAILED)),
+        )
         
         # Recent orders
-        recent_orders = Order.objects.select_related('customer').order_by('-created_at')[:10]
-        
-        # Top products
-        top_products = Product.objects.annotate(
-            total_sold=Count('orderline')
-        ).order_by('-total_sold')[:5]
+        recent_orders = list(Order.objects.select_related('customer').annotate(
+            line_count=Count('lines')
+        ).order_by('-created_at')[:10])
+        
+        # Top products by rolled-up units sold
+        top = list(ProductAnalytics.objects.filter(total_sold__gt=0).order_by('-total_sold')[:5])
+        products_by_id = Product.objects.select_related('category').in_bulk([row.product_id for row in top])
+        top_products = []
+        for row in top:
+            product = products_by_id.get(row.product_id)
+            if product:
+                product.total_sold = row.total_sold
+                top_products.append(product)
         
         context = {
             'title': 'Packaxis Packaging Canada Admin Dashboard',
             'total_revenue': f"${total_revenue:,.2f}",
             'month_revenue': f"${month_revenue:,.2f}",
             'week_revenue': f"${week_revenue:,.2f}",
-            'total_orders': total_orders,
-            'pending_orders': pending_orders,
-            'processing_orders': processing_orders,
-            'total_customers': total_customers,
-            'b2b_customers': b2b_customers,
-            'new_customers': new_customers,
-            'total_products': total_products,
-            'low_stock': low_stock,
-            'successful_payments': successful_payments,
-            'failed_payments': failed_payments,
+            'aov_b2b': f"${self._average(segments['b2b_revenue'], segments['b2b_count']):,.2f}",
+            'aov_b2c': f"${self._average(segments['b2c_revenue'], segments['b2c_count']):,.2f}",
+            'total_orders': orders['total'],
+            'pending_orders': orders['pending'],
+            'processing_orders': orders['processing'],
+            'total_customers': customers['total'],
+            'b2b_customers': customers['b2b'],
+            'new_customers': customers['new'],
+            'total_products': products['total'],
+            'low_stock': products['low_stock'],
+            'successful_payments': payments['successful'],
+            'failed_payments': payments['failed'],
             'recent_orders': recent_orders,
             'top_products': top_products,
         }
@@ -116,96 +124,75 @@ class AdminDashboardMixin:
             context
         )
     
+    @staticmethod
+    def _average(revenue, orders):
+        return revenue / orders if orders else 0
+    
     def export_revenue_csv(self, request):
         """Export revenue report as CSV."""
-        response = admin.HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="revenue_report.csv"'
-        
-        writer = csv.writer(response)
-        writer.writerow(['Date', 'Orders', 'Revenue', 'Avg Order Value', 'Stripe', 'PayPal'])
-        
-        # Aggregate by date
-        orders = Order.objects.filter(
-            status__in=['PROCESSING', 'SHIPPED', 'DELIVERED']
-        ).values('created_at__date').annotate(
-            count=Count('id'),
-            total=Sum('total')
-        ).order_by('created_at__date')
-        
-        for order in orders:
-            date = order['created_at__date']
-            order_count = order['count']
-            revenue = order['total']
-            avg_value = revenue / order_count if order_count > 0 else 0
-            
-            stripe = Payment.objects.filter(
-                created_at__date=date,
-                method='stripe',
-                status='CAPTURED'
-            ).aggregate(Sum('amount'))['amount__sum'] or 0
-            
-            paypal = Payment.objects.filter(
-                created_at__date=date,
-                method='paypal',
-                status='CAPTURED'
-            ).aggregate(Sum('amount'))['amount__sum'] or 0
-            
-            writer.writerow([date, order_count, f"{revenue:,.2f}", f"{avg_value:,.2f}", 
-                           f"{stripe:,.2f}", f"{paypal:,.2f}"])
-        
-        return response
+        return self._export_csv(request, 'revenue')
     
     def export_orders_csv(self, request):
         """Export orders report as CSV."""
-        response = admin.HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="orders_report.csv"'
-        
-        writer = csv.writer(response)
-        writer.writerow(['Order #', 'Customer', 'Email', 'Date', 'Total', 'Items', 'Status', 'Payment'])
-        
-        orders = Order.objects.select_related('customer').order_by('-created_at')
-        for order in orders:
-            writer.writerow([
-                order.order_number,
-                order.customer.get_full_name() or order.customer.email,
-                order.customer.email,
-                order.created_at.strftime('%Y-%m-%d %H:%M'),
-                f"{order.total:,.2f}",
-                order.orderline_set.count(),
-                order.status,
-                Payment.objects.filter(order=order).first().method if Payment.objects.filter(order=order).exists() else 'N/A'
-            ])
-        
-        return response
+        return self._export_csv(request, 'orders')
     
     def export_customers_csv(self, request):
         """Export customers report as CSV."""
-        response = admin.HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="customers_report.csv"'
-        
-        writer = csv.writer(response)
-        writer.writerow(['Email', 'Name', 'Type', 'Company', 'Orders', 'Total Spent', 'Joined'])
-        
-        customers = User.objects.filter(role__in=['B2C', 'B2B'])
-        for customer in customers:
-            total_spent = Order.objects.filter(
-                customer=customer,
-                status__in=['PROCESSING', 'SHIPPED', 'DELIVERED']
-            ).aggregate(Sum('total'))['total__sum'] or 0
-            
-            order_count = Order.objects.filter(customer=customer).count()
-            
-            writer.writerow([
-                customer.email,
-                customer.get_full_name() or 'N/A',
-                customer.role,
-                customer.company_name or 'N/A',
-                order_count,
-                f"{total_spent:,.2f}",
-                customer.created_at.strftime('%Y-%m-%d')
-            ])
-        
-        return response
+        return self._export_csv(request, 'customers')
+    
+    def _export_csv(self, request, export_type):
+        """Stream the report, or hand it to a Celery worker when ?background=1."""
+        if not request.GET.get('background'):
+            return exports.stream_export(export_type)
+        
+        name = exports.export_file_name(export_type)
+        generate_export.delay(export_type, name)
+        download_url = reverse('admin:export_download', args=[name])
+        messages.info(request, format_html(
+            'The {} export is being generated. <a href="{}">Download it here</a> once it is ready.',
+            export_type, download_url
+        ))
+        return redirect('admin:dashboard')
+    
+    def export_download(self, request, name):
+        """Serve a finished background export."""
+        if not exports.export_storage.exists(name):
+            messages.warning(request, 'That export is still being generated. Try again shortly.')
+            return redirect('admin:dashboard')
+        return FileResponse(exports.export_storage.open(name, 'rb'), as_attachment=True, filename=name)
+    
+    def report_pdf(self, request, report_type):
+        """Return a PDF report, queueing it for a worker if it is not rendered yet."""
+        if report_type not in reports.REPORTS:
+            return HttpResponseBadRequest('Unknown report')
+        params = {}
+        for key in ('start', 'end'):
+            if request.GET.get(key):
+                value = parse_date(request.GET[key])
+                if value is None:
+                    return HttpResponseBadRequest(f'Invalid {key} date')
+                params[key] = value.isoformat()
+        
+        name, status = reports.request_report(report_type, params)
+        if status['state'] == 'ready' and request.headers.get('Accept') != 'application/json':
+            return self.report_download(request, name)
+        return JsonResponse(self._report_status_payload(name, status), status=200 if status['state'] == 'ready' else 202)
+    
+    def report_status(self, request, name):
+        """Progress of a queued report, polled by the dashboard."""
+        return JsonResponse(self._report_status_payload(name, reports.get_status(name)))
+    
+    def report_download(self, request, name):
+        """Serve a rendered PDF report."""
+        if reports.get_status(name)['state'] != 'ready':
+            return JsonResponse(self._report_status_payload(name, reports.get_status(name)), status=404)
+        return FileResponse(reports.open_report(name), as_attachment=True, filename=f'{name}.pdf')
+    
+    def _report_status_payload(self, name, status):
+        payload = dict(status, status_url=reverse('admin:report_status', args=[name]))
+        if status['state'] == 'ready':
+            payload['download_url'] = reverse('admin:report_download', args=[name])
+        return payload
 
 
 class DashboardAdminSite(admin.AdminSite):
@@ -0,0 +1,179 @@
+"""
+CSV report exports for the admin dashboard.
+
+Each report is a generator of rows built from a fixed number of queries:
+per-row figures are computed in SQL with ``Subquery`` annotations and
+conditional aggregation, and rows are read with ``.iterator()`` so memory
+stays constant regardless of table size. The same generators back both the
+streaming admin responses and background exports written to
+``settings.EXPORTS_ROOT``. Rows are read from the replica when one is
+configured (``apps.core.routers``).
+"""
+
+import csv
+import os
+from itertools import chain
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db.models import Count, DecimalField, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from apps.accounts.models import User
+from apps.core.routers import iterate_on_replica
+from apps.orders.models import Order, OrderLine
+from apps.payments.models import Payment
+
+CHUNK_SIZE = 2000
+
+# Exports contain customer PII, so they are kept out of MEDIA_ROOT and only served through the admin
+export_storage = FileSystemStorage(location=settings.EXPORTS_ROOT)
+
+
+class Echo:
+    """File-like object whose write() returns the value, for streaming csv.writer output."""
+
+    def write(self, value):
+        return value
+
+
+def _captured_payments_for_day(method):
+    return Subquery(
+        Payment.objects.filter(status=Payment.Status.CAPTURED, method=method)
+        .annotate(day=TruncDate("created_at"))
+        .filter(day=OuterRef("day"))
+        .values("day")
+        .annotate(amount_sum=Sum("amount"))
+        .values("amount_sum")[:1],
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    )
+
+
+def filter_period(queryset, start=None, end=None):
+    if start:
+        queryset = queryset.filter(created_at__date__gte=start)
+    if end:
+        queryset = queryset.filter(created_at__date__lte=end)
+    return queryset
+
+
+def revenue_rows(start=None, end=None):
+    days = (
+        filter_period(Order.objects.filter(status__in=Order.REVENUE_STATUSES), start, end)
+        .annotate(day=TruncDate("created_at"))
+        .values("day")
+        .annotate(count=Count("id"), revenue=Sum("total"))
+        .annotate(
+            stripe=Coalesce(_captured_payments_for_day("stripe"), Value(0), output_field=DecimalField()),
+            paypal=Coalesce(_captured_payments_for_day("paypal"), Value(0), output_field=DecimalField()),
+        )
+        .order_by("day")
+    )
+    for day in days.iterator(chunk_size=CHUNK_SIZE):
+        avg_value = day["revenue"] / day["count"] if day["count"] else 0
+        yield [
+            day["day"], day["count"], f"{day['revenue']:,.2f}", f"{avg_value:,.2f}",
+            f"{day['stripe']:,.2f}", f"{day['paypal']:,.2f}",
+        ]
+
+
+def orders_rows(start=None, end=None):
+    line_count = (
+        OrderLine.objects.filter(order=OuterRef("pk"))
+        .values("order")
+        .annotate(count=Count("id"))
+        .values("count")[:1]
+    )
+    first_payment = Payment.objects.filter(order=OuterRef("pk")).order_by("id").values("method")[:1]
+    orders = (
+        filter_period(Order.objects.select_related("customer"), start, end)
+        .annotate(
+            item_count=Coalesce(Subquery(line_count, output_field=IntegerField()), 0),
+            payment=Subquery(first_payment),
+        )
+        .order_by("-created_at")
+    )
+    for order in orders.iterator(chunk_size=CHUNK_SIZE):
+        customer = order.customer
+        email = customer.email if customer else order.guest_email
+        yield [
+            order.order_number,
+            (customer.get_full_name() or customer.email) if customer else "Guest",
+            email,
+            order.created_at.strftime("%Y-%m-%d %H:%M"),
+            f"{order.total:,.2f}",
+            order.item_count,
+            order.status,
+            order.payment or "N/A",
+        ]
+
+
+def customers_rows():
+    # Order figures come from the materialized CustomerOrderStats rows
+    customers = User.objects.filter(role__in=["B2C", "B2B"]).select_related("order_stats").order_by("id")
+    for customer in customers.iterator(chunk_size=CHUNK_SIZE):
+        stats = getattr(customer, "order_stats", None)
+        yield [
+            customer.email,
+            customer.get_full_name() or "N/A",
+            customer.role,
+            customer.company_name or "N/A",
+            stats.order_count if stats else 0,
+            f"{stats.lifetime_spend if stats else 0:,.2f}",
+            customer.date_joined.strftime("%Y-%m-%d"),
+        ]
+
+
+EXPORTS = {
+    "revenue": (
+        "revenue_report.csv",
+        ["Date", "Orders", "Revenue", "Avg Order Value", "Stripe", "PayPal"],
+        revenue_rows,
+    ),
+    "orders": (
+        "orders_report.csv",
+        ["Order #", "Customer", "Email", "Date", "Total", "Items", "Status", "Payment"],
+        orders_rows,
+    ),
+    "customers": (
+        "customers_report.csv",
+        ["Email", "Name", "Type", "Company", "Orders", "Total Spent", "Joined"],
+        customers_rows,
+    ),
+}
+
+
+def stream_export(export_type):
+    """Return a StreamingHttpResponse that writes the report as it is read from the database."""
+    filename, header, rows = EXPORTS[export_type]
+    writer = csv.writer(Echo())
+    response = StreamingHttpResponse(
+        (writer.writerow(row) for row in chain([header], iterate_on_replica(rows()))),
+        content_type="text/csv",
+    )
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def export_file_name(export_type):
+    filename = EXPORTS[export_type][0]
+    return f"{timezone.now():%Y%m%d-%H%M%S}-{filename}"
+
+
+def write_export(export_type, name):
+    """Write the full report to export storage under ``name``; returns the stored name."""
+    _, header, rows = EXPORTS[export_type]
+    part = f"{name}.part"
+    # Storage.open() does not create directories the way save() does, and
+    # EXPORTS_ROOT does not exist on a fresh deploy
+    os.makedirs(os.path.dirname(export_storage.path(part)), exist_ok=True)
+    with export_storage.open(part, "w") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(header)
+        for row in iterate_on_replica(rows()):
+            writer.writerow(row)
+    # Rename once complete so a half-written file is never offered for download
+    os.replace(export_storage.path(part), export_storage.path(name))
+    return name
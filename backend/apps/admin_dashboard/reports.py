@@ -0,0 +1,147 @@
+"""
+Background PDF reports for the admin dashboard.
+
+Reports are rendered by a Celery worker and stored in export storage under a
+name derived from (report type, parameters, data watermark). The watermark
+changes whenever the underlying orders or payments change, so identical
+requests against unchanged data reuse the stored PDF, while any write makes
+the next request render a fresh one. Progress is kept in the cache for the
+admin to poll. WeasyPrint is imported only inside the worker that renders.
+"""
+
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db.models import Count, Max
+from django.db.models.functions import TruncDate
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from apps.core.routers import use_replica
+from apps.orders.models import Order
+from apps.payments.models import Payment
+from . import exports
+
+STATUS_TIMEOUT = 60 * 60
+PROGRESS_EVERY = 500
+
+
+def _count_revenue_days(start=None, end=None):
+    orders = exports.filter_period(Order.objects.filter(status__in=Order.REVENUE_STATUSES), start, end)
+    return orders.annotate(day=TruncDate("created_at")).values("day").distinct().count()
+
+
+def _count_orders(start=None, end=None):
+    return exports.filter_period(Order.objects.all(), start, end).count()
+
+
+REPORTS = {
+    "revenue": ("Revenue Report", _count_revenue_days),
+    "orders": ("Orders Report", _count_orders),
+}
+
+
+def data_watermark():
+    """Row counts and latest change times of the tables reports read from."""
+    watermark = []
+    for model in (Order, Payment):
+        state = model.objects.aggregate(rows=Count("id"), changed=Max("updated_at"))
+        watermark.append([state["rows"], state["changed"].isoformat() if state["changed"] else None])
+    return watermark
+
+
+def _digest(value):
+    return hashlib.sha1(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def report_name(report_type, params):
+    """Storage name (without directory) for the report at the current data watermark."""
+    # Read the watermark from the replica the render reads, so a lagging replica
+    # never stores older rows under a newer watermark
+    with use_replica():
+        watermark = data_watermark()
+    return f"{report_type}-{_digest(params)}-{_digest(watermark)}"
+
+
+def _path(name):
+    return f"reports/{name}.pdf"
+
+
+def _status_key(name):
+    return f"admin-report:{name}"
+
+
+def get_status(name):
+    if exports.export_storage.exists(_path(name)):
+        return {"state": "ready", "progress": 100}
+    return cache.get(_status_key(name)) or {"state": "missing", "progress": 0}
+
+
+def _set_status(name, state, progress):
+    cache.set(_status_key(name), {"state": state, "progress": progress}, STATUS_TIMEOUT)
+
+
+def request_report(report_type, params):
+    """Return ``(name, status)``, queueing generation unless the report exists or is in progress."""
+    from .tasks import generate_report
+
+    name = report_name(report_type, params)
+    status = get_status(name)
+    if status["state"] == "failed":
+        cache.delete(_status_key(name))
+    if status["state"] in ("missing", "failed"):
+        # cache.add is the lock: only the first identical request enqueues a job
+        if cache.add(_status_key(name), {"state": "queued", "progress": 0}, STATUS_TIMEOUT):
+            generate_report.delay(report_type, params, name)
+    return name, get_status(name)
+
+
+def open_report(name):
+    return exports.export_storage.open(_path(name), "rb")
+
+
+def _render_pdf(html):
+    from weasyprint import HTML
+
+    return HTML(string=html).write_pdf()
+
+
+@use_replica()
+def render_report(report_type, params, name):
+    """Render the report to export storage, recording progress as rows are read."""
+    title, count_rows = REPORTS[report_type]
+    _, header, row_source = exports.EXPORTS[report_type]
+    total = count_rows(**params) or 1
+    _set_status(name, "running", 0)
+
+    rows = []
+    try:
+        for row in row_source(**params):
+            rows.append(row)
+            if len(rows) % PROGRESS_EVERY == 0:
+                # Reading rows is most of the work; rendering takes the last 10%
+                _set_status(name, "running", min(90, 90 * len(rows) // total))
+        html = render_to_string("admin/reports/report_pdf.html", {
+            "title": title,
+            "params": params,
+            "header": header,
+            "rows": rows,
+            "generated_at": timezone.now(),
+        })
+        _set_status(name, "running", 90)
+        pdf = _render_pdf(html)
+    except Exception:
+        _set_status(name, "failed", 0)
+        raise
+
+    storage = exports.export_storage
+    storage.save(_path(name), ContentFile(pdf))
+    # Drop renders of the same report at older watermarks
+    prefix = name.rsplit("-", 1)[0]
+    for other in storage.listdir("reports")[1]:
+        if other.startswith(prefix) and other != f"{name}.pdf":
+            storage.delete(f"reports/{other}")
+    cache.delete(_status_key(name))
+    return name
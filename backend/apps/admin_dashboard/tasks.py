@@ -0,0 +1,21 @@
+"""
+Celery tasks for the admin dashboard.
+"""
+
+from celery import shared_task
+
+from . import exports
+
+
+@shared_task
+def generate_export(export_type, name):
+    """Write a CSV report to export storage for later download from the admin."""
+    return exports.write_export(export_type, name)
+
+
+@shared_task
+def generate_report(report_type, params, name):
+    """Render a PDF report to export storage, reporting progress through the cache."""
+    from . import reports
+
+    return reports.render_report(report_type, params, name)
@@ -0,0 +1,204 @@
+"""
+Tests for the admin dashboard view, CSV exports and PDF reports.
+"""
+
+import shutil
+import tempfile
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.storage import FileSystemStorage
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+
+from apps.accounts.models import User
+from apps.orders.models import Address, Order, OrderLine
+from apps.payments.models import Payment
+from apps.products.models import Category, Product
+from apps.analytics.rollups import rollup_days, rollup_products
+from apps.core.routers import ReplicaRouter
+from . import exports, reports
+from .admin import AdminDashboardMixin
+from .tasks import generate_export
+
+
+class ExportTests(TestCase):
+    """Tests for the streaming CSV report generators."""
+
+    def setUp(self):
+        self.customer = User.objects.create_user(email='b2b@example.com', password='testpass123', role='B2B')
+        category = Category.objects.create(name='Boxes', slug='boxes')
+        self.product = Product.objects.create(sku='BOX-1', name='Box', category=category, retail_price=Decimal('5.00'))
+
+    def _create_order(self, number, customer=None, guest_email='', total='50.00', method='stripe'):
+        address = Address.objects.create(
+            first_name='Jo', last_name='Doe', address1='1 Main St', city='Toronto',
+            province='ON', postal_code='M5V 3A8'
+        )
+        order = Order.objects.create(
+            order_number=number, customer=customer, guest_email=guest_email, status=Order.Status.PROCESSING,
+            total=Decimal(total), shipping_address=address, billing_address=address
+        )
+        OrderLine.objects.create(order=order, product=self.product, quantity=2, unit_price=Decimal('5.00'))
+        Payment.objects.create(order=order, method=method, amount=Decimal(total), status=Payment.Status.CAPTURED)
+        return order
+
+    def test_orders_export_query_count_is_constant(self):
+        """Line counts and payment methods are annotated, not queried per order."""
+        for i in range(5):
+            self._create_order(f'PKX-{i}', customer=self.customer)
+        self._create_order('PKX-G', guest_email='guest@example.com', method='paypal')
+
+        with self.assertNumQueries(1):
+            rows = list(exports.orders_rows())
+        self.assertEqual(len(rows), 6)
+        guest = next(row for row in rows if row[0] == 'PKX-G')
+        self.assertEqual(guest[1:3], ['Guest', 'guest@example.com'])
+        self.assertEqual(guest[5:], [1, Order.Status.PROCESSING, 'paypal'])
+
+    def test_revenue_export_splits_payment_methods(self):
+        """Each day's Stripe and PayPal totals come from the same query."""
+        self._create_order('PKX-1', customer=self.customer, total='30.00')
+        self._create_order('PKX-2', customer=self.customer, total='20.00', method='paypal')
+
+        with self.assertNumQueries(1):
+            rows = list(exports.revenue_rows())
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0][1:], [2, '50.00', '25.00', '30.00', '20.00'])
+
+    def test_streaming_response(self):
+        """Exports are streamed with a header row."""
+        self._create_order('PKX-1', customer=self.customer)
+        response = exports.stream_export('customers')
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'Email,Name,Type,Company,Orders,Total Spent,Joined')
+        self.assertTrue(lines[1].startswith('b2b@example.com,'))
+
+    def test_background_export_writes_file(self):
+        """Background exports end up in export storage under the requested name."""
+        self._create_order('PKX-1', customer=self.customer)
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location)
+        storage = FileSystemStorage(location=location)
+        with mock.patch.object(exports, 'export_storage', storage):
+            name = generate_export.delay('orders', 'orders.csv').get()
+        with storage.open(name) as fh:
+            self.assertEqual(len(fh.read().splitlines()), 2)
+        self.assertFalse(storage.exists('orders.csv.part'))
+
+    def test_background_export_creates_the_exports_directory(self):
+        """A fresh deploy has no EXPORTS_ROOT yet."""
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location)
+        storage = FileSystemStorage(location=f'{location}/exports')
+        with mock.patch.object(exports, 'export_storage', storage):
+            name = generate_export.delay('orders', 'orders.csv').get()
+        self.assertTrue(storage.exists(name))
+
+
+class ReportTests(TestCase):
+    """Tests for background PDF report generation and reuse."""
+
+    def setUp(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location)
+        self.storage = FileSystemStorage(location=location)
+        storage_patch = mock.patch.object(exports, 'export_storage', self.storage)
+        storage_patch.start()
+        self.addCleanup(storage_patch.stop)
+        # WeasyPrint needs native Pango libraries; rendering itself is not under test
+        render_patch = mock.patch.object(reports, '_render_pdf', return_value=b'%PDF-1.7 test')
+        self.render = render_patch.start()
+        self.addCleanup(render_patch.stop)
+        cache.clear()
+        self.customer = User.objects.create_user(email='b2b@example.com', password='testpass123', role='B2B')
+
+    def _create_order(self, number):
+        address = Address.objects.create(
+            first_name='Jo', last_name='Doe', address1='1 Main St', city='Toronto',
+            province='ON', postal_code='M5V 3A8'
+        )
+        return Order.objects.create(
+            order_number=number, customer=self.customer, status=Order.Status.PROCESSING,
+            total=Decimal('10.00'), shipping_address=address, billing_address=address
+        )
+
+    def test_identical_requests_reuse_the_report(self):
+        """A second request with unchanged data does not render again."""
+        self._create_order('PKX-1')
+        name, status = reports.request_report('orders', {})
+        self.assertEqual(status['state'], 'ready')
+        self.assertEqual(self.render.call_count, 1)
+        with reports.open_report(name) as fh:
+            self.assertEqual(fh.read(), b'%PDF-1.7 test')
+
+        self.assertEqual(reports.request_report('orders', {}), (name, status))
+        self.assertEqual(self.render.call_count, 1)
+
+    def test_data_changes_produce_a_new_report(self):
+        """Writes move the watermark, and older renders are pruned."""
+        order = self._create_order('PKX-1')
+        first, _ = reports.request_report('revenue', {'start': '2020-01-01'})
+        order.status = Order.Status.SHIPPED
+        order.save()
+        second, _ = reports.request_report('revenue', {'start': '2020-01-01'})
+
+        self.assertNotEqual(first, second)
+        self.assertEqual(self.render.call_count, 2)
+        self.assertEqual(self.storage.listdir('reports')[1], [f'{second}.pdf'])
+
+    def test_watermark_is_read_where_the_render_reads(self):
+        """The name's watermark comes from the replica, like the rows in the PDF."""
+        router = ReplicaRouter()
+        with mock.patch.object(reports, 'data_watermark', side_effect=lambda: router.db_for_read(Order)), \
+                override_settings(DB_REPLICA_ENABLED=True):
+            self.assertEqual(reports.report_name('orders', {}),
+                             f"orders-{reports._digest({})}-{reports._digest('replica')}")
+
+    def test_failed_render_is_reported(self):
+        """Rendering errors leave a failed status that a later request retries."""
+        self.render.side_effect = RuntimeError('no fonts')
+        with self.assertRaises(RuntimeError):
+            reports.request_report('orders', {})
+        name = reports.report_name('orders', {})
+        self.assertEqual(reports.get_status(name)['state'], 'failed')
+
+        self.render.side_effect = None
+        self.assertEqual(reports.request_report('orders', {})[1]['state'], 'ready')
+
+
+class DashboardTests(TestCase):
+    """Tests for the analytics-driven dashboard view."""
+
+    def test_query_count_does_not_grow_with_orders(self):
+        """The dashboard reads rollups plus one aggregate per table."""
+        customer = User.objects.create_user(email='b2b@example.com', password='testpass123', role='B2B')
+        category = Category.objects.create(name='Boxes', slug='boxes')
+        product = Product.objects.create(sku='BOX-1', name='Box', category=category, retail_price=Decimal('5.00'))
+        address = Address.objects.create(
+            first_name='Jo', last_name='Doe', address1='1 Main St', city='Toronto',
+            province='ON', postal_code='M5V 3A8'
+        )
+        for i in range(12):
+            order = Order.objects.create(
+                order_number=f'PKX-{i}', customer=customer, status=Order.Status.PROCESSING,
+                total=Decimal('20.00'), shipping_address=address, billing_address=address
+            )
+            OrderLine.objects.create(order=order, product=product, quantity=2, unit_price=Decimal('10.00'))
+        today = timezone.localdate()
+        rollup_days(today, today)
+        rollup_products()
+
+        request = RequestFactory().get('/admin/dashboard/')
+        with self.assertNumQueries(10):
+            response = AdminDashboardMixin().dashboard_view(request)
+            context = response.context_data
+            recent = list(context['recent_orders'])
+
+        self.assertEqual(context['month_revenue'], '$240.00')
+        self.assertEqual(context['aov_b2b'], '$20.00')
+        self.assertEqual(context['processing_orders'], 12)
+        self.assertEqual(recent[0].line_count, 1)
+        self.assertEqual(context['top_products'][0].total_sold, 24)
@@ -1,6 +1,15 @@
 from django.contrib import admin
-from .models import DailyMetrics, ProductAnalytics, CustomMetrics
+from .models import DailyMetrics, ProductAnalytics, CustomMetrics, CustomerOrderStats, RollupWatermark
 
 admin.site.register(DailyMetrics)
 admin.site.register(ProductAnalytics)
 admin.site.register(CustomMetrics)
+admin.site.register(RollupWatermark)
+
+
+@admin.register(CustomerOrderStats)
+class CustomerOrderStatsAdmin(admin.ModelAdmin):
+    list_display = ("customer", "customer_type", "order_count", "lifetime_spend", "last_order_at")
+    list_filter = ("customer_type",)
+    search_fields = ("customer__email",)
+    list_select_related = ("customer",)
@@ -0,0 +1,14 @@
+"""
+Management command to recompute CustomerOrderStats from orders
+Run with: python manage.py rebuild_customer_stats
+"""
+from django.core.management.base import BaseCommand
+from apps.analytics.stats import rebuild_customer_stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds per-customer order counts and lifetime spend from the Order table'
+
+    def handle(self, *args, **options):
+        count = rebuild_customer_stats()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt order stats for {count} customers'))
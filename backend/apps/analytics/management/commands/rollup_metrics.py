@@ -0,0 +1,38 @@
+"""
+Management command to fill the dashboard metrics tables
+Run with: python manage.py rollup_metrics                       (changes since the last run)
+          python manage.py rollup_metrics --start 2024-01-01 --end 2025-12-31   (backfill)
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from apps.analytics.rollups import backfill, rollup_changes, rollup_products
+
+
+class Command(BaseCommand):
+    help = 'Rolls orders and payments up into DailyMetrics, CustomMetrics and ProductAnalytics'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='First day to backfill (YYYY-MM-DD)')
+        parser.add_argument('--end', help='Last day to backfill (YYYY-MM-DD), defaults to today')
+
+    def handle(self, *args, **options):
+        if not options['start']:
+            result = rollup_changes()
+            self.stdout.write(self.style.SUCCESS(
+                f"Rolled up {result['days']} changed days and {result['products']} products"
+            ))
+            return
+
+        start = parse_date(options['start'])
+        end = parse_date(options['end']) if options['end'] else timezone.localdate()
+        if not start or not end or start > end:
+            raise CommandError('--start and --end must be dates in YYYY-MM-DD order')
+
+        def progress(chunk_start, chunk_end):
+            # Each chunk is committed; rerun with --start after the last reported chunk to resume
+            self.stdout.write(f'  {chunk_start} .. {chunk_end}')
+
+        days = backfill(start, end, progress=progress)
+        products = rollup_products()
+        self.stdout.write(self.style.SUCCESS(f'Backfilled {days} days and {products} products'))
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.10 on 2026-10-19 16:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0002_customerorderstats'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='custommetrics',
+            name='date',
+            field=models.DateField(unique=True),
+        ),
+        migrations.AlterField(
+            model_name='productanalytics',
+            name='product_id',
+            field=models.IntegerField(unique=True),
+        ),
+    ]
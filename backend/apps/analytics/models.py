@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.db import models
 
 class DailyMetrics(models.Model):
@@ -10,13 +11,39 @@ class DailyMetrics(models.Model):
         return str(self.date)
 
 class ProductAnalytics(models.Model):
-    product_id = models.IntegerField()
+    product_id = models.IntegerField(unique=True)
     total_sold = models.PositiveIntegerField(default=0)
     low_stock_alert = models.BooleanField(default=False)
 
 class CustomMetrics(models.Model):
-    date = models.DateField()
+    date = models.DateField(unique=True)
     b2b_orders = models.PositiveIntegerField(default=0)
     b2c_orders = models.PositiveIntegerField(default=0)
     aov_b2b = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     aov_b2c = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+
+
+class CustomerOrderStats(models.Model):
+    """Per-customer order totals, maintained incrementally from order saves"""
+    customer = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name="order_stats")
+    customer_type = models.CharField(max_length=10, default="B2C")  # B2B / B2C, copied from User.role
+    order_count = models.PositiveIntegerField(default=0)
+    lifetime_spend = models.DecimalField(max_digits=12, decimal_places=2, default=0)  # Orders in Order.REVENUE_STATUSES
+    last_order_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "Customer order stats"
+
+    def __str__(self):
+        return f"{self.customer_id}: {self.order_count} orders"
+
+
+class RollupWatermark(models.Model):
+    """Latest source-row change already folded into the rollup tables"""
+    name = models.CharField(max_length=50, unique=True)
+    value = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
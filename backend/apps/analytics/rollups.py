@@ -0,0 +1,180 @@
+"""
+Rollups that populate the dashboard metrics tables.
+
+``rollup_days`` recomputes ``DailyMetrics`` and ``CustomMetrics`` for a date
+range with one grouped query over ``Order``; ``rollup_products`` recomputes
+``ProductAnalytics`` with one grouped query over ``Product``. Both upsert, so
+re-running a range is harmless. Days are calendar days in ``TIME_ZONE``.
+
+``rollup_changes`` is the incremental entry point: it finds the days and
+products touched since the stored ``RollupWatermark`` (orders, their payments
+and products by ``updated_at``), recomputes only those, and advances the
+watermark last, so a run that fails part-way is simply repeated next time.
+``backfill`` recomputes an arbitrary range in chunks.
+"""
+
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import BooleanField, Count, DecimalField, ExpressionWrapper, F, Max, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from apps.accounts.models import User
+from apps.orders.models import Order, OrderLine
+from apps.products.models import Product
+from .models import CustomMetrics, DailyMetrics, ProductAnalytics, RollupWatermark
+
+ZERO = Decimal("0.00")
+WATERMARK = "dashboard"
+# Rows committed by transactions that started before the last run can carry older timestamps
+WATERMARK_OVERLAP = timedelta(minutes=5)
+BACKFILL_CHUNK_DAYS = 92
+
+
+def _money(expression):
+    return Coalesce(expression, Value(ZERO), output_field=DecimalField(max_digits=12, decimal_places=2))
+
+
+def _aov(revenue, orders):
+    return (revenue / orders).quantize(Decimal("0.01")) if orders else ZERO
+
+
+def _day_bounds(start, end):
+    # Compare created_at against datetimes rather than a date cast so its index can be used
+    tz = timezone.get_current_timezone()
+    return (
+        timezone.make_aware(datetime.combine(start, time.min), tz),
+        timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min), tz),
+    )
+
+
+def _runs(days):
+    """Collapse a set of dates into sorted (start, end) runs of consecutive days."""
+    runs = []
+    for day in sorted(days):
+        if runs and day - runs[-1][1] == timedelta(days=1):
+            runs[-1][1] = day
+        else:
+            runs.append([day, day])
+    return [tuple(run) for run in runs]
+
+
+def rollup_days(start, end) -> int:
+    """Recompute daily metrics for every day from ``start`` to ``end`` inclusive."""
+    lower, upper = _day_bounds(start, end)
+    paid = Q(status__in=Order.REVENUE_STATUSES)
+    b2b = Q(customer__role=User.Roles.B2B)
+    rows = (
+        Order.objects.filter(created_at__gte=lower, created_at__lt=upper)
+        .annotate(day=TruncDate("created_at"))
+        .values("day")
+        .annotate(
+            orders=Count("id"),
+            revenue=_money(Sum("total", filter=paid)),
+            b2b_orders=Count("id", filter=paid & b2b),
+            b2b_revenue=_money(Sum("total", filter=paid & b2b)),
+            # Guest orders have no customer and count as B2C
+            b2c_orders=Count("id", filter=paid & ~b2b),
+            b2c_revenue=_money(Sum("total", filter=paid & ~b2b)),
+        )
+        .order_by()
+    )
+    by_day = {row["day"]: row for row in rows}
+
+    daily, custom = [], []
+    day = start
+    while day <= end:
+        # Days without orders are written as zeros so deleted orders drop out
+        row = by_day.get(day, {})
+        daily.append(DailyMetrics(date=day, orders=row.get("orders", 0), revenue=row.get("revenue", ZERO)))
+        custom.append(CustomMetrics(
+            date=day,
+            b2b_orders=row.get("b2b_orders", 0),
+            b2c_orders=row.get("b2c_orders", 0),
+            aov_b2b=_aov(row.get("b2b_revenue", ZERO), row.get("b2b_orders", 0)),
+            aov_b2c=_aov(row.get("b2c_revenue", ZERO), row.get("b2c_orders", 0)),
+        ))
+        day += timedelta(days=1)
+
+    with transaction.atomic():
+        DailyMetrics.objects.bulk_create(
+            daily, batch_size=1000, update_conflicts=True,
+            unique_fields=["date"], update_fields=["orders", "revenue"],
+        )
+        CustomMetrics.objects.bulk_create(
+            custom, batch_size=1000, update_conflicts=True,
+            unique_fields=["date"], update_fields=["b2b_orders", "b2c_orders", "aov_b2b", "aov_b2c"],
+        )
+    return len(daily)
+
+
+def rollup_products(product_ids=None) -> int:
+    """Recompute units sold and the low-stock flag for the given products (default: all)."""
+    products = Product.objects.all() if product_ids is None else Product.objects.filter(id__in=product_ids)
+    rows = products.annotate(
+        total_sold=Coalesce(Sum("orderline__quantity", filter=Q(orderline__order__status__in=Order.REVENUE_STATUSES)), 0),
+        is_low=ExpressionWrapper(Q(stock_qty__lt=F("low_stock_alert")), output_field=BooleanField()),
+    ).values_list("id", "total_sold", "is_low")
+    analytics = [
+        ProductAnalytics(product_id=product_id, total_sold=total_sold, low_stock_alert=is_low)
+        for product_id, total_sold, is_low in rows
+    ]
+    with transaction.atomic():
+        if product_ids is None:
+            ProductAnalytics.objects.exclude(product_id__in=Product.objects.values("id")).delete()
+        ProductAnalytics.objects.bulk_create(
+            analytics, batch_size=1000, update_conflicts=True,
+            unique_fields=["product_id"], update_fields=["total_sold", "low_stock_alert"],
+        )
+    return len(analytics)
+
+
+def backfill(start, end, chunk_days=BACKFILL_CHUNK_DAYS, progress=None) -> int:
+    """Recompute ``start``..``end`` in chunks, each committed on its own; returns days written."""
+    written = 0
+    chunk_start = start
+    while chunk_start <= end:
+        chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), end)
+        written += rollup_days(chunk_start, chunk_end)
+        if progress:
+            progress(chunk_start, chunk_end)
+        chunk_start = chunk_end + timedelta(days=1)
+    return written
+
+
+def rollup_changes() -> dict:
+    """Recompute the days and products changed since the watermark, then advance it."""
+    mark, _ = RollupWatermark.objects.get_or_create(name=WATERMARK)
+    orders = Order.objects.all()
+    products = Product.objects.all()
+    if mark.value:
+        since = mark.value - WATERMARK_OVERLAP
+        orders = orders.filter(Q(updated_at__gt=since) | Q(payments__updated_at__gt=since))
+        products = products.filter(updated_at__gt=since)
+
+    changed_days = (
+        orders.annotate(day=TruncDate("created_at"))
+        .values("day")
+        .annotate(order_mark=Max("updated_at"), payment_mark=Max("payments__updated_at"))
+        .order_by()
+    )
+    days, marks = set(), [mark.value]
+    for row in changed_days:
+        days.add(row["day"])
+        marks += [row["order_mark"], row["payment_mark"]]
+    product_ids = set(OrderLine.objects.filter(order__in=orders.values("id")).values_list("product_id", flat=True))
+    product_changes = products.aggregate(ids=Count("id"), product_mark=Max("updated_at"))
+    if product_changes["ids"]:
+        product_ids.update(products.values_list("id", flat=True))
+        marks.append(product_changes["product_mark"])
+
+    for start, end in _runs(days):
+        backfill(start, end)
+    if product_ids:
+        rollup_products(product_ids if mark.value else None)
+
+    mark.value = max((value for value in marks if value), default=None)
+    mark.save(update_fields=["value", "updated_at"])
+    return {"days": len(days), "products": len(product_ids)}
@@ -0,0 +1,43 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from apps.orders.models import Order
+from .stats import apply_delta, customer_type_for, order_contribution
+
+
+@receiver(pre_save, sender=Order)
+def remember_order_state(sender, instance: Order, **kwargs):
+    """Capture the stored status/total/customer so post_save can apply a delta."""
+    instance._stats_previous = None
+    if instance.pk:
+        instance._stats_previous = (
+            Order.objects.filter(pk=instance.pk).values("customer_id", "status", "total").first()
+        )
+
+
+@receiver(post_save, sender=Order)
+def update_customer_stats(sender, instance: Order, created, **kwargs):
+    previous = getattr(instance, "_stats_previous", None)
+    old_customer, old_count, old_spend = (
+        order_contribution(previous["customer_id"], previous["status"], previous["total"])
+        if previous else (None, 0, 0)
+    )
+    new_customer, new_count, new_spend = order_contribution(instance.customer_id, instance.status, instance.total)
+
+    moved = old_customer != new_customer
+    if old_customer and moved:
+        apply_delta(old_customer, -old_count, -old_spend)
+        old_count, old_spend = 0, 0
+    if not new_customer:
+        return
+    if moved:
+        # New to this customer: also refresh the B2B/B2C split and last order date
+        apply_delta(new_customer, new_count, new_spend, customer_type_for(instance.customer.role), instance.created_at)
+    else:
+        apply_delta(new_customer, new_count - old_count, new_spend - old_spend)
+
+
+@receiver(post_delete, sender=Order)
+def remove_order_from_stats(sender, instance: Order, **kwargs):
+    # last_order_at is left as-is; rebuild_customer_stats corrects it
+    customer_id, count, spend = order_contribution(instance.customer_id, instance.status, instance.total)
+    apply_delta(customer_id, -count, -spend)
@@ -0,0 +1,91 @@
+"""
+Materialized per-customer order statistics.
+
+``CustomerOrderStats`` rows are adjusted with ``F()`` deltas whenever an order
+is created, changes status/total/customer, or is deleted, so dashboards and
+exports read one row per customer instead of aggregating ``Order``.
+``rebuild_customer_stats`` recomputes the whole table in a single grouped
+query and is the repair path for bulk ``update()`` calls that bypass signals.
+"""
+
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, Max, Q, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from apps.accounts.models import User
+from apps.orders.models import Order
+from .models import CustomerOrderStats
+
+ZERO = Decimal("0.00")
+
+
+def customer_type_for(role: str) -> str:
+    return User.Roles.B2B if role == User.Roles.B2B else User.Roles.B2C
+
+
+def order_contribution(customer_id, status, total) -> tuple:
+    """Return (customer_id, order_count, spend) an order adds to its customer's stats."""
+    if not customer_id:
+        return None, 0, ZERO
+    spend = Decimal(total or 0) if status in Order.REVENUE_STATUSES else ZERO
+    return customer_id, 1, spend
+
+
+def apply_delta(customer_id, orders: int, spend: Decimal, customer_type: str = None, last_order_at=None):
+    """Atomically add ``orders``/``spend`` to a customer's stats row, creating it if needed."""
+    if not customer_id or (not orders and not spend and last_order_at is None):
+        return
+    with transaction.atomic():
+        CustomerOrderStats.objects.get_or_create(
+            customer_id=customer_id,
+            defaults={"customer_type": customer_type or User.Roles.B2C},
+        )
+        updates = {
+            "order_count": F("order_count") + orders,
+            "lifetime_spend": F("lifetime_spend") + spend,
+        }
+        if customer_type:
+            updates["customer_type"] = customer_type
+        if last_order_at is not None:
+            updates["last_order_at"] = Greatest(Coalesce("last_order_at", Value(last_order_at)), Value(last_order_at))
+        CustomerOrderStats.objects.filter(customer_id=customer_id).update(**updates)
+
+
+def rebuild_customer_stats() -> int:
+    """Recompute every customer's stats from ``Order`` in one grouped query."""
+    rows = (
+        Order.objects.filter(customer__isnull=False)
+        .values("customer_id", "customer__role")
+        .annotate(
+            order_count=Count("id"),
+            lifetime_spend=Coalesce(
+                Sum("total", filter=Q(status__in=Order.REVENUE_STATUSES)),
+                Value(ZERO),
+                output_field=DecimalField(max_digits=12, decimal_places=2),
+            ),
+            last_order_at=Max("created_at"),
+        )
+        .order_by()
+    )
+    stats = [
+        CustomerOrderStats(
+            customer_id=row["customer_id"],
+            customer_type=customer_type_for(row["customer__role"]),
+            order_count=row["order_count"],
+            lifetime_spend=row["lifetime_spend"],
+            last_order_at=row["last_order_at"],
+        )
+        for row in rows
+    ]
+    with transaction.atomic():
+        CustomerOrderStats.objects.filter(customer__orders__isnull=True).delete()
+        CustomerOrderStats.objects.bulk_create(
+            stats,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=["customer"],
+            update_fields=["customer_type", "order_count", "lifetime_spend", "last_order_at", "updated_at"],
+        )
+    return len(stats)
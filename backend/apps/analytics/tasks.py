@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+from celery import shared_task
+from django.utils import timezone
+
+RECONCILE_DAYS = 7
+
+
+@shared_task
+def rollup_metrics():
+    """Fold orders, payments and products changed since the last run into the dashboard metrics."""
+    from .rollups import rollup_changes
+
+    return rollup_changes()
+
+
+@shared_task
+def reconcile_metrics():
+    """Recompute the trailing week and all product totals, catching deleted orders the watermark cannot see."""
+    from .rollups import backfill, rollup_products
+
+    today = timezone.localdate()
+    backfill(today - timedelta(days=RECONCILE_DAYS), today)
+    rollup_products()
@@ -0,0 +1,173 @@
+"""
+Tests for the Analytics app.
+Covers materialized customer order stats and dashboard rollups.
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from apps.accounts.models import User
+from apps.orders.models import Address, Order, OrderLine
+from apps.products.models import Category, Product
+from .models import CustomerOrderStats, CustomMetrics, DailyMetrics, ProductAnalytics, RollupWatermark
+from .rollups import rollup_changes, rollup_days, rollup_products
+
+
+def create_order(customer, number, total='100.00', status=Order.Status.PENDING):
+    address = Address.objects.create(
+        first_name='Jo', last_name='Doe', address1='1 Main St', city='Toronto',
+        province='ON', postal_code='M5V 3A8'
+    )
+    return Order.objects.create(
+        order_number=number, customer=customer, status=status, total=Decimal(total),
+        shipping_address=address, billing_address=address
+    )
+
+
+class CustomerOrderStatsTests(TestCase):
+    """Tests for incremental maintenance and rebuild of CustomerOrderStats."""
+
+    def setUp(self):
+        self.customer = User.objects.create_user(email='b2b@example.com', password='testpass123', role='B2B')
+
+    def stats(self):
+        return CustomerOrderStats.objects.get(customer=self.customer)
+
+    def test_new_order_counts_without_spend_until_paid(self):
+        """Pending orders count as orders but not as spend."""
+        order = create_order(self.customer, 'PKX-1')
+        stats = self.stats()
+        self.assertEqual(stats.order_count, 1)
+        self.assertEqual(stats.lifetime_spend, Decimal('0.00'))
+        self.assertEqual(stats.customer_type, 'B2B')
+        self.assertEqual(stats.last_order_at, order.created_at)
+
+    def test_status_transitions_adjust_spend(self):
+        """Entering and leaving revenue statuses adds and removes the total."""
+        order = create_order(self.customer, 'PKX-1', total='80.00')
+        order.status = Order.Status.PROCESSING
+        order.save()
+        self.assertEqual(self.stats().lifetime_spend, Decimal('80.00'))
+
+        order.status = Order.Status.SHIPPED
+        order.save()
+        self.assertEqual(self.stats().lifetime_spend, Decimal('80.00'))
+
+        order.status = Order.Status.CANCELLED
+        order.save()
+        stats = self.stats()
+        self.assertEqual(stats.lifetime_spend, Decimal('0.00'))
+        self.assertEqual(stats.order_count, 1)
+
+    def test_delete_removes_contribution(self):
+        """Deleting an order removes it from the stats."""
+        order = create_order(self.customer, 'PKX-1', status=Order.Status.DELIVERED)
+        create_order(self.customer, 'PKX-2', total='20.00', status=Order.Status.DELIVERED)
+        order.delete()
+        stats = self.stats()
+        self.assertEqual(stats.order_count, 1)
+        self.assertEqual(stats.lifetime_spend, Decimal('20.00'))
+
+    def test_rebuild_repairs_bulk_updates(self):
+        """The rebuild command corrects drift from signal-less bulk updates."""
+        create_order(self.customer, 'PKX-1', total='30.00')
+        create_order(self.customer, 'PKX-2', total='45.50')
+        Order.objects.update(status=Order.Status.DELIVERED)
+        self.assertEqual(self.stats().lifetime_spend, Decimal('0.00'))
+
+        call_command('rebuild_customer_stats', stdout=StringIO())
+        stats = self.stats()
+        self.assertEqual(stats.order_count, 2)
+        self.assertEqual(stats.lifetime_spend, Decimal('75.50'))
+
+    def test_stats_endpoint(self):
+        """The account dashboard reads totals from the stats endpoint."""
+        create_order(self.customer, 'PKX-1', total='12.00', status=Order.Status.PROCESSING)
+        self.client.force_login(self.customer)
+        response = self.client.get('/api/orders/orders/stats/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['order_count'], 1)
+        self.assertEqual(response.json()['lifetime_spend'], '12.00')
+
+
+class RollupTests(TestCase):
+    """Tests for the dashboard metrics rollups."""
+
+    def setUp(self):
+        self.b2b = User.objects.create_user(email='b2b@example.com', password='testpass123', role='B2B')
+        self.b2c = User.objects.create_user(email='b2c@example.com', password='testpass123', role='B2C')
+        self.today = timezone.localdate()
+
+    def test_rollup_days_splits_segments(self):
+        """Daily revenue, order counts and B2B/B2C AOV come from one grouped query."""
+        create_order(self.b2b, 'PKX-1', total='100.00', status=Order.Status.PROCESSING)
+        create_order(self.b2b, 'PKX-2', total='50.00', status=Order.Status.DELIVERED)
+        create_order(self.b2c, 'PKX-3', total='30.00', status=Order.Status.SHIPPED)
+        create_order(self.b2c, 'PKX-4', total='99.00')
+
+        with self.assertNumQueries(5):
+            self.assertEqual(rollup_days(self.today - timedelta(days=1), self.today), 2)
+
+        daily = DailyMetrics.objects.get(date=self.today)
+        self.assertEqual(daily.orders, 4)
+        self.assertEqual(daily.revenue, Decimal('180.00'))
+        self.assertEqual(DailyMetrics.objects.get(date=self.today - timedelta(days=1)).orders, 0)
+        segments = CustomMetrics.objects.get(date=self.today)
+        self.assertEqual((segments.b2b_orders, segments.aov_b2b), (2, Decimal('75.00')))
+        self.assertEqual((segments.b2c_orders, segments.aov_b2c), (1, Decimal('30.00')))
+
+    def test_rerunning_rollup_overwrites(self):
+        """Rollups are idempotent and pick up cancelled orders."""
+        order = create_order(self.b2c, 'PKX-1', total='40.00', status=Order.Status.PROCESSING)
+        rollup_days(self.today, self.today)
+        order.status = Order.Status.CANCELLED
+        order.save()
+        rollup_days(self.today, self.today)
+
+        self.assertEqual(DailyMetrics.objects.count(), 1)
+        self.assertEqual(DailyMetrics.objects.get().revenue, Decimal('0.00'))
+
+    def test_rollup_products(self):
+        """Units sold count paid orders only, and low stock is flagged."""
+        category = Category.objects.create(name='Boxes', slug='boxes')
+        product = Product.objects.create(sku='BOX-1', name='Box', category=category, retail_price=Decimal('5.00'), stock_qty=3)
+        paid = create_order(self.b2c, 'PKX-1', status=Order.Status.PROCESSING)
+        pending = create_order(self.b2c, 'PKX-2')
+        OrderLine.objects.create(order=paid, product=product, quantity=4)
+        OrderLine.objects.create(order=pending, product=product, quantity=7)
+
+        self.assertEqual(rollup_products(), 1)
+        analytics = ProductAnalytics.objects.get(product_id=product.id)
+        self.assertEqual(analytics.total_sold, 4)
+        self.assertTrue(analytics.low_stock_alert)
+
+    def test_rollup_changes_follows_the_watermark(self):
+        """Incremental runs recompute only the days whose orders or payments changed."""
+        old = create_order(self.b2b, 'PKX-OLD', total='60.00', status=Order.Status.PROCESSING)
+        long_ago = timezone.now() - timedelta(days=10)
+        Order.objects.filter(pk=old.pk).update(created_at=long_ago, updated_at=long_ago)
+        create_order(self.b2c, 'PKX-NEW', total='25.00', status=Order.Status.PROCESSING)
+
+        self.assertEqual(rollup_changes()['days'], 2)
+        self.assertEqual(RollupWatermark.objects.get().value.date(), timezone.now().date())
+
+        # Only the old order's day is revisited once it is cancelled
+        old.refresh_from_db()
+        old.status = Order.Status.CANCELLED
+        old.save()
+        Order.objects.filter(order_number='PKX-NEW').update(updated_at=long_ago)
+        self.assertEqual(rollup_changes()['days'], 1)
+        self.assertEqual(DailyMetrics.objects.get(date=timezone.localdate(long_ago)).revenue, Decimal('0.00'))
+        self.assertEqual(DailyMetrics.objects.get(date=self.today).revenue, Decimal('25.00'))
+
+    def test_backfill_command(self):
+        """Backfills write every day in the range and are safe to repeat."""
+        create_order(self.b2b, 'PKX-1', total='10.00', status=Order.Status.DELIVERED)
+        start = self.today - timedelta(days=199)
+        for _ in range(2):
+            call_command('rollup_metrics', start=start.isoformat(), end=self.today.isoformat(), stdout=StringIO())
+        self.assertEqual(DailyMetrics.objects.count(), 200)
+        self.assertEqual(CustomMetrics.objects.get(date=self.today).aov_b2b, Decimal('10.00'))
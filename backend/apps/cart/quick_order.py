@@ -0,0 +1,166 @@
+"""
+Quick order: a pasted SKU/quantity list or CSV upload turned into basket lines.
+
+Input is one line per item, ``SKU`` and quantity separated by a comma, tab,
+semicolon or spaces (a missing quantity means 1). A CSV header naming a
+``sku`` column and a ``qty``/``quantity`` column is honoured and may contain
+other columns. Every SKU, product or variant, is resolved with one ``UNION``
+query (``sku_index``); lines for the same SKU are merged. Prices come from
+``apps.products.pricing`` in one bulk load (contract, then quantity tier at
+the merged quantity, then retail, plus the variant's ``additional_price``),
+and stock is checked in the same pass. Lines that fail (unknown SKU, bad
+quantity, not enough stock) are reported by line number; the rest go into the
+basket with one read of its lines, one ``bulk_update`` and one ``bulk_create``,
+and the response summarizes the basket from those lines instead of reading
+it back.
+"""
+
+import csv
+import re
+from collections import namedtuple
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import F, Value
+
+from apps.products import pricing
+from apps.products.models import Product, ProductVariant
+from .models import BasketLine
+
+Entry = namedtuple("Entry", "product_id variant_id name retail_price additional_price stock_qty")
+Line = namedtuple("Line", "line sku product_id variant_id name quantity unit_price total")
+LineError = namedtuple("LineError", "line sku error")
+QuickOrder = namedtuple("QuickOrder", "lines errors subtotal")
+BasketSummary = namedtuple("BasketSummary", "lines quantity subtotal")
+
+SKU_HEADERS = {"sku", "item"}
+QTY_HEADERS = {"qty", "quantity"}
+
+
+class TooManyLines(ValueError):
+    pass
+
+
+def _cells(line):
+    for delimiter in (",", "\t", ";"):
+        if delimiter in line:
+            return [cell.strip() for cell in next(csv.reader([line], delimiter=delimiter))]
+    return line.split()
+
+
+def parse(text):
+    """``([(line_number, sku, quantity)], [LineError])`` from pasted lines or CSV text."""
+    rows, errors = [], []
+    sku_col, qty_col = 0, 1
+    for number, raw in enumerate(text.splitlines(), 1):
+        cells = _cells(raw)
+        if not any(cells):
+            continue
+        if not rows and not errors:
+            header = [cell.lower() for cell in cells]
+            if SKU_HEADERS & set(header):
+                sku_col = next(i for i, cell in enumerate(header) if cell in SKU_HEADERS)
+                qty_col = next((i for i, cell in enumerate(header) if cell in QTY_HEADERS), None)
+                continue
+        sku = cells[sku_col] if sku_col < len(cells) else ""
+        quantity = cells[qty_col] if qty_col is not None and qty_col < len(cells) and cells[qty_col] else "1"
+        if not sku:
+            errors.append(LineError(number, "", "Missing SKU"))
+        elif not re.fullmatch(r"\d+", quantity) or int(quantity) <= 0:
+            errors.append(LineError(number, sku, f"Invalid quantity: {quantity}"))
+        else:
+            rows.append((number, sku, int(quantity)))
+        if len(rows) + len(errors) > settings.QUICK_ORDER_MAX_LINES:
+            raise TooManyLines(f"At most {settings.QUICK_ORDER_MAX_LINES} lines per order")
+    return rows, errors
+
+
+def sku_index(skus):
+    """``{sku: Entry}`` for active products and their variants, in one query."""
+    skus = list(skus)
+    # Every column is an annotation, so both sides select them in the same order
+    variants = ProductVariant.objects.filter(product__is_active=True, sku__in=skus).annotate(
+        code=F("sku"), product_ref=F("product_id"), variant_ref=F("pk"), title=F("product__name"),
+        retail=F("product__retail_price"), extra=F("additional_price"), stock=F("stock_qty"),
+    )
+    products = Product.objects.filter(is_active=True, sku__in=skus).annotate(
+        code=F("sku"), product_ref=F("pk"), variant_ref=Value(None, output_field=models.BigIntegerField()),
+        title=F("name"), retail=F("retail_price"), extra=Value(0, output_field=models.IntegerField()),
+        stock=F("stock_qty"),
+    )
+    fields = ("code", "product_ref", "variant_ref", "title", "retail", "extra", "stock")
+    variants, products = variants.values_list(*fields), products.values_list(*fields)
+    index = {}
+    # Variants first: the union's columns take their types (and decimal conversion) from them
+    for sku, *entry in variants.union(products, all=True):
+        entry = Entry(*entry)
+        # A product SKU wins over a variant with the same SKU
+        if sku not in index or entry.variant_id is None:
+            index[sku] = entry
+    return index
+
+
+def resolve(rows, user=None, in_basket=None):
+    """
+    Price and stock-check parsed ``rows``. ``in_basket`` maps ``(product_id,
+    variant_id)`` to quantities already in the basket: they count towards the
+    quantity tier and the stock check.
+    """
+    in_basket = in_basket or {}
+    index = sku_index({sku for _, sku, _ in rows})
+    errors = []
+    merged = {}
+    for number, sku, quantity in rows:
+        entry = index.get(sku)
+        if entry is None:
+            errors.append(LineError(number, sku, "Unknown SKU"))
+        elif (entry.product_id, entry.variant_id) in merged:
+            merged[entry.product_id, entry.variant_id][3] += quantity
+        else:
+            merged[entry.product_id, entry.variant_id] = [number, sku, entry, quantity]
+
+    tiers = pricing.load({product_id for product_id, _ in merged}, pricing.price_list_for(user))
+    lines = []
+    for key, (number, sku, entry, quantity) in merged.items():
+        total_quantity = quantity + in_basket.get(key, 0)
+        if total_quantity > entry.stock_qty:
+            errors.append(LineError(number, sku, f"Only {entry.stock_qty} in stock"))
+            continue
+        unit_price = pricing.price_for_qty(tiers[entry.product_id], total_quantity, entry.retail_price)
+        unit_price += entry.additional_price
+        lines.append(Line(number, sku, entry.product_id, entry.variant_id, entry.name, quantity,
+                          unit_price, unit_price * quantity))
+
+    errors.sort(key=lambda error: error.line)
+    return QuickOrder(lines, errors, sum((line.total for line in lines), Decimal("0")))
+
+
+@transaction.atomic
+def add_to_basket(basket, rows, user=None):
+    """
+    Resolve ``rows`` against ``basket``'s current lines and add the valid ones
+    to it. Returns the ``QuickOrder`` and a ``BasketSummary`` of the basket
+    afterwards.
+    """
+    existing = {(line.product_id, line.variant_id): line for line in basket.lines.all()}
+    result = resolve(rows, user, {key: line.quantity for key, line in existing.items()})
+    updated, created = [], []
+    for line in result.lines:
+        basket_line = existing.get((line.product_id, line.variant_id))
+        if basket_line is None:
+            created.append(BasketLine(basket=basket, product_id=line.product_id, variant_id=line.variant_id,
+                                      quantity=line.quantity, unit_price=line.unit_price))
+        else:
+            # The unit price was worked out at the combined quantity
+            basket_line.quantity += line.quantity
+            basket_line.unit_price = line.unit_price
+            updated.append(basket_line)
+    BasketLine.objects.bulk_update(updated, ["quantity", "unit_price"], batch_size=500)
+    BasketLine.objects.bulk_create(created, batch_size=500)
+    if result.lines:
+        basket.save(update_fields=["updated_at"])
+    lines = list(existing.values()) + created
+    summary = BasketSummary(len(lines), sum(line.quantity for line in lines),
+                            sum((line.extended_price() for line in lines), Decimal("0")))
+    return result, summary
@@ -0,0 +1,95 @@
+"""
+Tests for the Cart app.
+Covers quick order: SKU/quantity parsing, bulk pricing and stock checks, and the basket endpoint.
+"""
+
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from apps.accounts.models import User
+from apps.products.models import Category, PriceList, PriceListItem, PricingTier, Product, ProductVariant
+from . import quick_order
+from .models import Basket
+
+URL = '/api/cart/baskets/quick-order/'
+
+
+class QuickOrderTests(APITestCase):
+    """Tests for bulk ordering by SKU."""
+
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name='Boxes', slug='boxes')
+        self.box = Product.objects.create(sku='BOX-1', name='Box', category=category, retail_price=Decimal('2.00'),
+                                          stock_qty=1000)
+        self.bag = Product.objects.create(sku='BAG-1', name='Bag', category=category, retail_price=Decimal('1.00'),
+                                          stock_qty=5)
+        self.red = ProductVariant.objects.create(product=self.box, sku='BOX-1-RED', color='Red',
+                                                 additional_price=Decimal('0.25'), stock_qty=300)
+        PricingTier.objects.create(product=self.box, min_qty=100, max_qty=9999, wholesale_price=Decimal('1.50'))
+
+    def test_parse(self):
+        """Commas, tabs, semicolons or spaces; CSV headers pick their columns; bad lines are reported."""
+        rows, errors = quick_order.parse('BOX-1, 10\nBAG-1\t2\n\nBOX-1-RED;3\nBAG-1 4\nBAG-1,x\n,5')
+        self.assertEqual(rows, [(1, 'BOX-1', 10), (2, 'BAG-1', 2), (4, 'BOX-1-RED', 3), (5, 'BAG-1', 4)])
+        self.assertEqual([(e.line, e.error) for e in errors], [(6, 'Invalid quantity: x'), (7, 'Missing SKU')])
+
+        rows, errors = quick_order.parse('Name,Quantity,SKU\n"Box, brown",12,BOX-1\nBag,,BAG-1')
+        self.assertEqual((rows, errors), ([(2, 'BOX-1', 12), (3, 'BAG-1', 1)], []))
+
+        with override_settings(QUICK_ORDER_MAX_LINES=2), self.assertRaises(quick_order.TooManyLines):
+            quick_order.parse('A,1\nB,1\nC,1')
+
+    def test_resolve_prices_and_checks_stock(self):
+        """Lines for one SKU merge and reach their tier; variants add their surcharge; stock is checked."""
+        rows, _ = quick_order.parse('BOX-1,60\nBOX-1,60\nBOX-1-RED,10\nBAG-1,6\nNOPE,1')
+        with self.assertNumQueries(2):  # SKU index, tiers
+            result = quick_order.resolve(rows)
+        self.assertEqual([(l.sku, l.quantity, l.unit_price) for l in result.lines],
+                         [('BOX-1', 120, Decimal('1.50')), ('BOX-1-RED', 10, Decimal('2.25'))])
+        self.assertEqual([(e.line, e.error) for e in result.errors],
+                         [(4, 'Only 5 in stock'), (5, 'Unknown SKU')])
+        self.assertEqual(result.subtotal, Decimal('202.50'))
+
+    def test_contract_prices(self):
+        buyer = User.objects.create_user(email='buyer@acme.test', password='x', role='B2B')
+        price_list = PriceList.objects.create(name='Acme')
+        price_list.users.add(buyer)
+        PriceListItem.objects.create(price_list=price_list, product=self.bag, price=Decimal('0.70'))
+        result = quick_order.resolve([(1, 'BAG-1', 2)], buyer)
+        self.assertEqual(result.lines[0].unit_price, Decimal('0.70'))
+
+    def test_endpoint_adds_to_basket(self):
+        """Text, items and CSV uploads all land in the session basket, repricing existing lines."""
+        data = self.client.post(URL, {'lines': 'BOX-1,50\nBAG-1,9'}, format='json').json()
+        self.assertEqual([(l['sku'], l['unit_price']) for l in data['lines']], [('BOX-1', '2.00')])
+        self.assertEqual(data['errors'], [{'line': 2, 'sku': 'BAG-1', 'error': 'Only 5 in stock'}])
+
+        data = self.client.post(URL, {'items': [{'sku': 'BOX-1', 'quantity': 50}]}, format='json').json()
+        self.assertEqual(data['lines'][0]['unit_price'], '1.50')
+        upload = SimpleUploadedFile('order.csv', b'\xef\xbb\xbfsku,qty\nBOX-1-RED,2\n', content_type='text/csv')
+        data = self.client.post(URL, {'file': upload}, format='multipart').json()
+
+        basket = Basket.objects.get()
+        self.assertEqual([(l.variant_id, l.quantity, l.unit_price) for l in basket.lines.order_by('pk')],
+                         [(None, 100, Decimal('1.50')), (self.red.pk, 2, Decimal('2.25'))])
+        self.assertEqual(data['basket'], {'id': basket.pk, 'lines': 2, 'quantity': 102, 'subtotal': '154.50'})
+        self.assertEqual(self.client.post(URL, {'lines': ''}, format='json').status_code, 400)
+
+    def test_thousand_lines(self):
+        """A 1,000-line upload resolves in two queries."""
+        category = Category.objects.get()
+        Product.objects.bulk_create(
+            Product(sku=f'SKU-{i:04}', name=f'Item {i}', category=category, retail_price=Decimal('1.00'),
+                    stock_qty=100)
+            for i in range(1000)
+        )
+        rows, _ = quick_order.parse('\n'.join(f'SKU-{i:04},{i % 50 + 1}' for i in range(1000)))
+        with self.assertNumQueries(2):
+            self.assertEqual(len(quick_order.resolve(rows).lines), 1000)
+        data = self.client.post(URL, {'lines': '\n'.join(f'SKU-{i:04},1' for i in range(1000))}, format='json').json()
+        self.assertEqual((data['basket']['lines'], data['errors']), (1000, []))
@@ -3,9 +3,11 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 from django.shortcuts import get_object_or_404
+from . import quick_order
 from .models import Basket, BasketLine
 from .serializers import BasketSerializer, BasketLineSerializer
 from apps.products.models import Product, ProductVariant
+from apps.products.utils import get_b2b_price_for_qty
 
 class BasketViewSet(viewsets.ModelViewSet):
     queryset = Basket.objects.all()
@@ -20,9 +22,11 @@ class BasketViewSet(viewsets.ModelViewSet):
             session_key = self.request.session.session_key
         return qs.filter(session_key=session_key)
 
+    def _session_key(self):
+        return self.request.session.session_key or self.request.session.save() or self.request.session.session_key
+
     def perform_create(self, serializer):
-        session_key = self.request.session.session_key or self.request.session.save() or self.request.session.session_key
-        serializer.save(owner=self.request.user if self.request.user.is_authenticated else None, session_key=session_key)
+        serializer.save(owner=self.request.user if self.request.user.is_authenticated else None, session_key=self._session_key())
 
     @action(detail=True, methods=["post"])
     def add(self, request, pk=None):
@@ -32,11 +36,10 @@ class BasketViewSet(viewsets.ModelViewSet):
         quantity = int(request.data.get("quantity", 1))
         product = get_object_or_404(Product, id=product_id)
         variant = get_object_or_404(ProductVariant, id=variant_id) if variant_id else None
-        # Determine unit price (B2B tiering can be applied later)
-        unit_price = product.retail_price
-        line, _ = BasketLine.objects.get_or_create(basket=basket, product=product, variant=variant, defaults={"quantity": 0, "unit_price": unit_price})
+        line, _ = BasketLine.objects.get_or_create(basket=basket, product=product, variant=variant, defaults={"quantity": 0, "unit_price": product.retail_price})
         line.quantity += quantity
-        line.unit_price = unit_price
+        # Price the whole line at the customer's contract price or the quantity tier it has reached
+        line.unit_price = get_b2b_price_for_qty(product, line.quantity, request.user)
         line.save()
         return Response(BasketSerializer(basket).data)
 
@@ -47,3 +50,43 @@ class BasketViewSet(viewsets.ModelViewSet):
         line = get_object_or_404(BasketLine, id=line_id, basket=basket)
         line.delete()
         return Response(BasketSerializer(basket).data)
+
+    @action(detail=False, methods=["post"], url_path="quick-order")
+    def quick_order(self, request):
+        """
+        Add a pasted SKU/quantity list ("lines"), a CSV upload ("file") or
+        [{"sku", "quantity"}] ("items") to the session's basket in one go.
+        Returns a summary of the basket, the priced lines added and per-line
+        errors; GET the basket for its full contents.
+        """
+        upload = request.FILES.get("file")
+        try:
+            if upload is not None:
+                rows, errors = quick_order.parse(upload.read().decode("utf-8-sig", errors="replace"))
+            elif isinstance(request.data.get("items"), list):
+                text = "\n".join(f'{item.get("sku", "")},{item.get("quantity", 1)}' for item in request.data["items"])
+                rows, errors = quick_order.parse(text)
+            else:
+                rows, errors = quick_order.parse(str(request.data.get("lines", "")))
+        except quick_order.TooManyLines as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if not rows and not errors:
+            return Response({"detail": "No lines to order"}, status=status.HTTP_400_BAD_REQUEST)
+
+        basket = self.get_queryset().order_by("-updated_at").first()
+        if basket is None:
+            owner = request.user if request.user.is_authenticated else None
+            basket = Basket.objects.create(owner=owner, session_key=self._session_key())
+        result, summary = quick_order.add_to_basket(basket, rows, request.user)
+        return Response({
+            "basket": {"id": basket.pk, "lines": summary.lines, "quantity": summary.quantity,
+                       "subtotal": str(summary.subtotal)},
+            "lines": [
+                {"line": line.line, "sku": line.sku, "product_id": line.product_id, "variant_id": line.variant_id,
+                 "name": line.name, "quantity": line.quantity, "unit_price": str(line.unit_price),
+                 "total": str(line.total)}
+                for line in result.lines
+            ],
+            "errors": [error._asdict() for error in sorted(errors + result.errors, key=lambda e: e.line)],
+            "subtotal": str(result.subtotal),
+        })
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import NewsletterSubscriber
+from .models import NewsletterSubscriber, OutboxMessage
 
 
 @admin.register(NewsletterSubscriber)
@@ -8,3 +8,10 @@ class NewsletterSubscriberAdmin(admin.ModelAdmin):
     list_filter = ("is_active", "subscribed_at")
     search_fields = ("email",)
     readonly_fields = ("subscribed_at", "unsubscribed_at")
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ("task_name", "status", "attempts", "created_at", "dispatched_at")
+    list_filter = ("status", "task_name")
+    readonly_fields = ("created_at", "dispatched_at", "last_error")
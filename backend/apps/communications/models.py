@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 
 class NewsletterSubscriber(models.Model):
@@ -17,3 +18,30 @@ class NewsletterSubscriber(models.Model):
     def __str__(self):
         status = "Active" if self.is_active else "Unsubscribed"
         return f"{self.email} ({status})"
+
+
+class OutboxMessage(models.Model):
+    """Task invocation recorded in the caller's transaction and relayed to Celery after commit"""
+    class Status(models.TextChoices):
+        PENDING = "PENDING", "Pending"
+        SENT = "SENT", "Sent"
+        FAILED = "FAILED", "Failed"
+
+    task_name = models.CharField(max_length=255)  # Dotted path of the Celery task
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    available_at = models.DateTimeField(default=timezone.now)  # Pushed back after failed attempts
+    created_at = models.DateTimeField(auto_now_add=True)
+    dispatched_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'available_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.task_name} ({self.status})"
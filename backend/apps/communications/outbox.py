@@ -0,0 +1,117 @@
+"""
+Transactional outbox for Celery tasks.
+
+Callers record task invocations with ``enqueue`` inside their own database
+transaction. Rows only become visible once that transaction commits, and the
+relay (``dispatch_pending``) hands them to Celery afterwards, so workers can
+never race the commit. Request paths never publish or run tasks themselves:
+with a broker the drain is delegated to a worker, and in eager mode it runs on
+a background thread.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+
+# Single worker so eager-mode drains never run concurrently inside one process
+_eager_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="outbox")
+
+
+def enqueue(task_name: str, *args, **kwargs) -> OutboxMessage:
+    """
+    Record a task invocation in the current transaction.
+
+    ``task_name`` is the dotted path of a Celery task, e.g.
+    ``"apps.communications.tasks.send_order_confirmation"``. Arguments must be
+    JSON serializable.
+    """
+    message = OutboxMessage.objects.create(task_name=task_name, args=list(args), kwargs=kwargs)
+    transaction.on_commit(schedule_dispatch)
+    return message
+
+
+def schedule_dispatch():
+    """Trigger a drain of the outbox without blocking the caller."""
+    if getattr(settings, "CELERY_TASK_ALWAYS_EAGER", False):
+        _eager_executor.submit(_drain_in_thread)
+        return
+    from .tasks import dispatch_outbox
+    try:
+        dispatch_outbox.delay()
+    except Exception as exc:
+        # Broker unavailable: the periodic dispatch_outbox run picks the rows up later
+        logger.warning("Could not schedule outbox dispatch: %s", exc)
+
+
+def _drain_in_thread():
+    close_old_connections()
+    try:
+        drain()
+    except Exception:
+        logger.exception("Outbox drain failed")
+    finally:
+        close_old_connections()
+
+
+def dispatch_pending(batch_size: int | None = None) -> int:
+    """
+    Relay one batch of pending messages to Celery.
+
+    Rows are claimed with ``SELECT ... FOR UPDATE SKIP LOCKED`` so several
+    dispatchers can drain the table concurrently. Returns the number of rows
+    processed in the batch.
+    """
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    with transaction.atomic():
+        batch = list(
+            OutboxMessage.objects.select_for_update(skip_locked=True)
+            .filter(status=OutboxMessage.Status.PENDING, available_at__lte=timezone.now())
+            .order_by("id")[:batch_size]
+        )
+        sent_ids = []
+        for message in batch:
+            try:
+                import_string(message.task_name).apply_async(args=message.args, kwargs=message.kwargs)
+            except Exception as exc:
+                logger.warning("Outbox message %s (%s) failed: %s", message.pk, message.task_name, exc)
+                attempts = message.attempts + 1
+                OutboxMessage.objects.filter(pk=message.pk).update(
+                    attempts=F("attempts") + 1,
+                    last_error=str(exc),
+                    available_at=timezone.now() + timedelta(minutes=2 ** attempts),
+                    status=OutboxMessage.Status.FAILED if attempts >= MAX_ATTEMPTS else OutboxMessage.Status.PENDING,
+                )
+            else:
+                sent_ids.append(message.pk)
+        if sent_ids:
+            OutboxMessage.objects.filter(pk__in=sent_ids).update(
+                status=OutboxMessage.Status.SENT,
+                attempts=F("attempts") + 1,
+                dispatched_at=timezone.now(),
+                last_error="",
+            )
+    return len(batch)
+
+
+def drain(batch_size: int | None = None, max_batches: int = 50) -> int:
+    """Dispatch batches until the outbox is empty or ``max_batches`` is reached."""
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    total = 0
+    for _ in range(max_batches):
+        processed = dispatch_pending(batch_size)
+        total += processed
+        if processed < batch_size:
+            break
+    return total
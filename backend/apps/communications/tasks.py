@@ -134,3 +134,11 @@ def send_newsletter(subscriber_ids: list, subject: str, html_content: str):
         msg = EmailMultiAlternatives(subject, html_content, to=[subscriber.email])
         msg.attach_alternative(html_content, "text/html")
         msg.send()
+
+
+@shared_task
+def dispatch_outbox(batch_size: int = None):
+    """Relay committed outbox messages to their Celery tasks"""
+    from .outbox import drain
+
+    return drain(batch_size)
@@ -0,0 +1,67 @@
+"""
+Tests for the communications app: transactional outbox dispatch.
+"""
+
+from django.core import mail
+from django.db import transaction
+from django.test import TestCase
+
+from apps.accounts.models import User
+from .models import OutboxMessage
+from .outbox import dispatch_pending, enqueue
+
+
+class OutboxTests(TestCase):
+    """Tests for enqueueing and relaying outbox messages."""
+
+    def test_user_signup_does_not_send_inline(self):
+        """Creating a user records an outbox row instead of sending mail."""
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            user = User.objects.create_user(email='new@example.com', password='testpass123')
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(len(callbacks), 1)
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.task_name, 'apps.accounts.tasks.send_welcome_email')
+        self.assertEqual(message.args, [user.id])
+
+    def test_dispatch_sends_pending_messages(self):
+        """The relay runs pending tasks and marks them sent."""
+        with self.captureOnCommitCallbacks(execute=False):
+            User.objects.create_user(email='new@example.com', password='testpass123')
+
+        self.assertEqual(dispatch_pending(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['new@example.com'])
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.status, OutboxMessage.Status.SENT)
+        self.assertIsNotNone(message.dispatched_at)
+
+        # Already-sent rows are not relayed again
+        self.assertEqual(dispatch_pending(), 0)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_rolled_back_transaction_leaves_no_message(self):
+        """Messages enqueued in a rolled back transaction are never dispatched."""
+        try:
+            with transaction.atomic():
+                enqueue('apps.accounts.tasks.send_welcome_email', 1)
+                raise RuntimeError('rollback')
+        except RuntimeError:
+            pass
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    def test_failed_dispatch_is_retried_later(self):
+        """A failing task stays pending with a backoff and records the error."""
+        with self.captureOnCommitCallbacks(execute=False):
+            enqueue('apps.communications.tasks.missing_task')
+
+        self.assertEqual(dispatch_pending(), 1)
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.status, OutboxMessage.Status.PENDING)
+        self.assertEqual(message.attempts, 1)
+        self.assertTrue(message.last_error)
+        self.assertGreater(message.available_at, message.created_at)
+
+        # Not eligible again until the backoff expires
+        self.assertEqual(dispatch_pending(), 0)
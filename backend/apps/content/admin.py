@@ -1,6 +1,6 @@
 ﻿from django.contrib import admin
 from django.utils.html import format_html
-from .models import MenuItem, BlogCategory, BlogPost, FAQCategory, FAQ, FooterSection, HelpCategory, HelpArticle, HelpArticleSearch
+from .models import MenuItem, BlogCategory, BlogPost, FAQCategory, FAQ, FooterSection, HelpCategory, HelpArticle, HelpArticleSearch, HelpSearchTerm
 
 
 @admin.register(MenuItem)
@@ -172,3 +172,11 @@ class HelpArticleSearchAdmin(admin.ModelAdmin):
     search_fields = ('query',)
     date_hierarchy = 'created_at'
     readonly_fields = ('query', 'results_count', 'session_id', 'ip_address', 'created_at')
+
+
+@admin.register(HelpSearchTerm)
+class HelpSearchTermAdmin(admin.ModelAdmin):
+    list_display = ('term', 'date', 'searches', 'zero_result_searches')
+    list_filter = ('date',)
+    search_fields = ('term',)
+    date_hierarchy = 'date'
@@ -0,0 +1,177 @@
+"""
+Write-behind counters for view and feedback tallies.
+
+Page views and helpfulness votes are accumulated outside the database and
+flushed periodically as one ``F()`` update per distinct increment, so reading
+an article never writes to its row. With Redis (``USE_REDIS``) increments are
+``HINCRBY`` calls on one hash per model field, shared by all workers and
+flushed by the ``flush_counters`` Celery beat task, one flush at a time.
+Without Redis they are buffered in-process and flushed on the first increment
+after ``COUNTER_FLUSH_INTERVAL`` seconds; if that flush fails the increments
+stay buffered and the request carries on.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "packaxis:counters:"
+# Outside KEY_PREFIX so the flush never scans it
+FLUSH_LOCK_KEY = "packaxis:counters-flush-lock"
+FLUSH_LOCK_TIMEOUT = 300
+
+
+def _label(model):
+    return model._meta.label_lower
+
+
+def _apply(counts):
+    """Apply ``{(model_label, field): {pk: amount}}`` with one UPDATE per (field, amount) group."""
+    updated = 0
+    with transaction.atomic():
+        for (label, field), amounts in counts.items():
+            model = apps.get_model(label)
+            by_amount = defaultdict(list)
+            for pk, amount in amounts.items():
+                if amount:
+                    by_amount[amount].append(pk)
+            for amount, pks in by_amount.items():
+                updated += model.objects.filter(pk__in=pks).update(**{field: F(field) + amount})
+    return updated
+
+
+class LocalCounterStore:
+    """Per-process buffer, for development and single-worker deployments."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.counts = defaultdict(lambda: defaultdict(int))
+        self.last_flush = time.monotonic()
+
+    def increment(self, label, field, pk, amount):
+        with self.lock:
+            self.counts[(label, field)][pk] += amount
+            due = time.monotonic() - self.last_flush >= self.interval
+        if due:
+            try:
+                self.flush()
+            except Exception:
+                # The increments are re-queued; don't fail the request that happened to flush
+                logger.exception("Counter flush failed")
+
+    def pending(self, label, field, pk):
+        with self.lock:
+            return self.counts.get((label, field), {}).get(pk, 0)
+
+    def flush(self):
+        with self.lock:
+            counts, self.counts = self.counts, defaultdict(lambda: defaultdict(int))
+            self.last_flush = time.monotonic()
+        try:
+            return _apply(counts)
+        except Exception:
+            # Keep the increments for the next attempt
+            with self.lock:
+                for key, amounts in counts.items():
+                    for pk, amount in amounts.items():
+                        self.counts[key][pk] += amount
+            raise
+
+
+class RedisCounterStore:
+    """Redis hashes shared by every worker; flushed by the Celery beat task."""
+
+    def __init__(self):
+        from django_redis import get_redis_connection
+        from redis.exceptions import LockError, ResponseError
+
+        self.redis = get_redis_connection("default")
+        self.missing_key_error = ResponseError
+        self.lock_error = LockError
+
+    def _key(self, label, field):
+        return f"{KEY_PREFIX}{label}:{field}"
+
+    def increment(self, label, field, pk, amount):
+        self.redis.hincrby(self._key(label, field), pk, amount)
+
+    def pending(self, label, field, pk):
+        return int(self.redis.hget(self._key(label, field), pk) or 0)
+
+    def flush(self):
+        # Batches renamed below are only ever claimed by the lock holder, so any
+        # found on entry were left by a flush that died before deleting them
+        lock = self.redis.lock(FLUSH_LOCK_KEY, timeout=FLUSH_LOCK_TIMEOUT, blocking=False)
+        if not lock.acquire():
+            return 0
+        try:
+            return self._flush()
+        finally:
+            try:
+                lock.release()
+            except self.lock_error:
+                # Expired mid-flush; another flush may already hold it
+                pass
+
+    def _flush(self):
+        counts, claimed = {}, []
+        # Snapshot the key list first so hashes renamed below are not scanned again
+        for key in list(self.redis.scan_iter(f"{KEY_PREFIX}*")):
+            key = key.decode()
+            if ":flushing:" in key:
+                # Left behind by a flush that died before applying it
+                batch = key
+            else:
+                # RENAME is atomic: increments after this point start a fresh hash
+                batch = f"{key}:flushing:{uuid.uuid4().hex}"
+                try:
+                    self.redis.rename(key, batch)
+                except self.missing_key_error:
+                    continue
+            label, field = key[len(KEY_PREFIX):].split(":flushing:")[0].rsplit(":", 1)
+            amounts = counts.setdefault((label, field), defaultdict(int))
+            for pk, amount in self.redis.hgetall(batch).items():
+                amounts[int(pk)] += int(amount)
+            claimed.append(batch)
+        updated = _apply(counts)
+        if claimed:
+            self.redis.delete(*claimed)
+        return updated
+
+
+_store = None
+
+
+def get_store():
+    global _store
+    if _store is None:
+        if settings.USE_REDIS:
+            _store = RedisCounterStore()
+        else:
+            _store = LocalCounterStore(settings.COUNTER_FLUSH_INTERVAL)
+    return _store
+
+
+def increment(instance, field, amount=1):
+    """Add ``amount`` to ``instance.<field>`` without touching the database now."""
+    get_store().increment(_label(type(instance)), field, instance.pk, amount)
+
+
+def pending(instance, field):
+    """Increments recorded for ``instance.<field>`` that have not been flushed yet."""
+    return get_store().pending(_label(type(instance)), field, instance.pk)
+
+
+def flush():
+    """Write all buffered increments to the database; returns rows updated."""
+    return get_store().flush()
@@ -0,0 +1,17 @@
+"""
+Management command to reindex help articles, blog posts and FAQs
+Run with: python manage.py rebuild_search_index
+"""
+from django.core.management.base import BaseCommand
+from apps.content import search
+from apps.content.models import FAQ, BlogPost, HelpArticle
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the full-text search index for help articles, blog posts and FAQs'
+
+    def handle(self, *args, **options):
+        for model in (HelpArticle, BlogPost, FAQ):
+            count = search.rebuild(model)
+            self.stdout.write(f'  {model._meta.verbose_name_plural}: {count}')
+        self.stdout.write(self.style.SUCCESS('Search index rebuilt'))
@@ -0,0 +1,85 @@
+"""
+Navigation menus for the site header and footer.
+
+All active ``MenuItem`` and ``FooterSection`` rows are read in one UNION query,
+assembled into plain tuples (header items carry their children), and cached
+until an admin edit invalidates them through the signals in ``signals.py``,
+which also bumps the ``menus`` fragment generation.
+"""
+
+from collections import namedtuple
+
+from django.core.cache import cache
+from django.db.models import BooleanField, CharField, IntegerField, Value
+
+from apps.core import fragments
+from apps.core.routers import use_primary
+from .models import FooterSection, MenuItem
+
+CACHE_KEY = "content:menus"
+
+MenuEntry = namedtuple("MenuEntry", "id title url open_in_new_tab icon_class children")
+FooterSectionEntry = namedtuple("FooterSectionEntry", "id title")
+
+# FooterSection rows are selected into the MenuItem column layout under this location
+_FOOTER_SECTION = "footer_section"
+# Model fields are selected before annotations, so both sides list (id, order, title) first
+_COLUMNS = ("id", "order", "title", "parent_id", "location", "url", "open_in_new_tab", "icon_class")
+
+
+def _load_rows():
+    items = MenuItem.objects.filter(is_active=True).order_by().values_list(*_COLUMNS)
+    # Meta orderings are cleared: compound statements only allow the outer ORDER BY
+    sections = FooterSection.objects.filter(is_active=True).order_by().annotate(
+        parent_ref=Value(None, output_field=IntegerField()),
+        kind=Value(_FOOTER_SECTION, output_field=CharField()),
+        link=Value("", output_field=CharField()),
+        new_tab=Value(False, output_field=BooleanField()),
+        icon=Value("", output_field=CharField()),
+    ).values_list("id", "order", "title", "parent_ref", "kind", "link", "new_tab", "icon")
+    return items.union(sections, all=True).order_by("location", "order", "title")
+
+
+def build_menus():
+    """Read every active menu row once and arrange it for the templates."""
+    menus = {
+        "header_menu": [],
+        "footer_main_menu": [],
+        "footer_support_menu": [],
+        "footer_legal_menu": [],
+        "footer_sections": [],
+    }
+    children = {}
+    header = []
+    for pk, _, title, parent_id, location, url, new_tab, icon in _load_rows():
+        if location == _FOOTER_SECTION:
+            menus["footer_sections"].append(FooterSectionEntry(pk, title))
+            continue
+        entry = (pk, title, url, new_tab, icon)
+        if location == "header":
+            if parent_id is None:
+                header.append(entry)
+            else:
+                children.setdefault(parent_id, []).append(entry)
+        elif f"{location}_menu" in menus:
+            menus[f"{location}_menu"].append(MenuEntry(*entry, ()))
+
+    def node(entry):
+        return MenuEntry(*entry, tuple(node(child) for child in children.get(entry[0], ())))
+
+    menus["header_menu"] = [node(entry) for entry in header]
+    return {name: tuple(entries) for name, entries in menus.items()}
+
+
+def get_menus():
+    menus = cache.get(CACHE_KEY)
+    if menus is None:
+        with use_primary():
+            menus = build_menus()
+        cache.set(CACHE_KEY, menus, None)
+    return menus
+
+
+def invalidate():
+    cache.delete(CACHE_KEY)
+    fragments.bump("menus")
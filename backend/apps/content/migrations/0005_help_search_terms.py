@@ -0,0 +1,38 @@
+# Generated by Django 4.2.10 on 2026-10-19 16:21
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0004_remove_subcategories_from_helpcenter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HelpSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('term', models.CharField(max_length=255)),
+                ('searches', models.PositiveIntegerField(default=0)),
+                ('zero_result_searches', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Help Search Term',
+                'verbose_name_plural': 'Help Search Terms',
+                'ordering': ['-date', '-searches'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='helparticlesearch',
+            name='created_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+        migrations.AddConstraint(
+            model_name='helpsearchterm',
+            constraint=models.UniqueConstraint(fields=('date', 'term'), name='unique_help_search_term_per_day'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.10 on 2026-10-19 16:24
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0005_help_search_terms'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogpost',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='faq',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='helparticle',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='content_blo_search__bec031_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='faq',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='content_faq_search__ecff40_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='helparticle',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='content_hel_search__f1e595_gin'),
+        ),
+    ]
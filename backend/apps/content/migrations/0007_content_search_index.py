@@ -0,0 +1,34 @@
+from django.db import migrations
+
+
+def create_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS content_search USING fts5("
+        "kind UNINDEXED, object_id UNINDEXED, title, excerpt, tags, body, tokenize='porter unicode61')"
+    )
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS content_search")
+
+
+def index_existing(apps, schema_editor):
+    from apps.content import search
+
+    for name in ('HelpArticle', 'BlogPost', 'FAQ'):
+        search.rebuild(apps.get_model('content', name))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0006_search_vectors'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_table, drop_fts_table),
+        migrations.RunPython(index_existing, migrations.RunPython.noop),
+    ]
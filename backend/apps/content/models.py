@@ -1,8 +1,13 @@
-﻿from django.db import models
+﻿from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from django.utils.text import slugify
 from django.urls import reverse
 
+from . import counters
+
 User = get_user_model()
 
 
@@ -85,6 +90,9 @@ class BlogPost(models.Model):
     # Stats
     views_count = models.IntegerField(default=0)
 
+    # Maintained by apps.content.search
+    search_vector = SearchVectorField(null=True, editable=False)
+
     class Meta:
         ordering = ['-published_at', '-created_at']
         verbose_name = "Blog Post"
@@ -92,6 +100,7 @@ class BlogPost(models.Model):
         indexes = [
             models.Index(fields=['-published_at']),
             models.Index(fields=['status', '-published_at']),
+            GinIndex(fields=['search_vector']),
         ]
 
     def save(self, *args, **kwargs):
@@ -110,8 +119,8 @@ class BlogPost(models.Model):
         return reverse('content:blog_detail', kwargs={'slug': self.slug})
 
     def increment_views(self):
-        self.views_count += 1
-        self.save(update_fields=['views_count'])
+        # Buffered and flushed in batches by apps.content.counters
+        counters.increment(self, 'views_count')
 
 
 class FAQCategory(models.Model):
@@ -150,10 +159,16 @@ class FAQ(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Maintained by apps.content.search
+    search_vector = SearchVectorField(null=True, editable=False)
+
     class Meta:
         ordering = ['category__order', 'order']
         verbose_name = "FAQ"
         verbose_name_plural = "FAQs"
+        indexes = [
+            GinIndex(fields=['search_vector']),
+        ]
 
     def __str__(self):
         return self.question[:50]
@@ -270,6 +285,9 @@ class HelpArticle(models.Model):
     # Author
     author = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='help_articles')
 
+    # Maintained by apps.content.search
+    search_vector = SearchVectorField(null=True, editable=False)
+
     class Meta:
         ordering = ['order', 'title']
         verbose_name = "Help Article"
@@ -277,6 +295,7 @@ class HelpArticle(models.Model):
         indexes = [
             models.Index(fields=['status', 'is_active']),
             models.Index(fields=['category', 'order']),
+            GinIndex(fields=['search_vector']),
         ]
 
     def save(self, *args, **kwargs):
@@ -295,15 +314,11 @@ class HelpArticle(models.Model):
         return reverse('content:help_article', kwargs={'slug': self.slug})
 
     def increment_views(self):
-        self.views_count += 1
-        self.save(update_fields=['views_count'])
+        # Buffered and flushed in batches by apps.content.counters
+        counters.increment(self, 'views_count')
 
     def mark_helpful(self, is_helpful=True):
-        if is_helpful:
-            self.helpful_yes += 1
-        else:
-            self.helpful_no += 1
-        self.save(update_fields=['helpful_yes', 'helpful_no'])
+        counters.increment(self, 'helpful_yes' if is_helpful else 'helpful_no')
 
     @property
     def helpfulness_ratio(self):
@@ -319,7 +334,8 @@ class HelpArticleSearch(models.Model):
     results_count = models.IntegerField(default=0)
     session_id = models.CharField(max_length=255, blank=True)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Set when the search happened, not when the buffered row was written (apps.content.search_log)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
 
     class Meta:
         ordering = ['-created_at']
@@ -328,3 +344,22 @@ class HelpArticleSearch(models.Model):
 
     def __str__(self):
         return f"{self.query} ({self.results_count} results)"
+
+
+class HelpSearchTerm(models.Model):
+    """Daily search totals per normalized query, aggregated from HelpArticleSearch"""
+    date = models.DateField()
+    term = models.CharField(max_length=255)
+    searches = models.PositiveIntegerField(default=0)
+    zero_result_searches = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-date', '-searches']
+        verbose_name = "Help Search Term"
+        verbose_name_plural = "Help Search Terms"
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'term'], name='unique_help_search_term_per_day'),
+        ]
+
+    def __str__(self):
+        return f"{self.term} ({self.date}: {self.searches})"
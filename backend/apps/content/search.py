@@ -0,0 +1,135 @@
+"""
+Full-text search for help articles, blog posts and FAQs.
+
+Each searchable model declares its text as weighted sources (A = title,
+B = excerpt, C = tags, D = body) in ``SOURCES``. HTML is stripped in Python
+before indexing, then:
+
+* on PostgreSQL the weighted ``tsvector`` is written to the model's
+  ``search_vector`` column (GIN indexed) and queries are ranked with
+  ``SearchRank``;
+* on SQLite (``USE_SQLITE``) the same text goes into the ``content_search``
+  FTS5 table, created by migration 0007, and queries are ranked with
+  ``bm25()`` using the same column weights.
+
+The index is kept current by the post_save/post_delete handlers in
+``signals.py``; ``python manage.py rebuild_search_index`` reindexes
+everything. Queries match every word, with prefix matching on each, so
+search-as-you-type works on both backends.
+"""
+
+import html
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils.html import strip_tags
+
+CONFIG = "english"
+FTS_TABLE = "content_search"
+# bm25() weights for the FTS5 title/excerpt/tags/body columns, mirroring tsvector's default A/B/C/D
+FTS_WEIGHTS = (1.0, 0.4, 0.2, 0.1)
+MAX_FTS_RESULTS = 1000
+
+# model label -> {weight: callable(instance) -> text}
+SOURCES = {
+    "content.helparticle": {
+        "A": lambda obj: obj.title,
+        "B": lambda obj: obj.excerpt,
+        "C": lambda obj: obj.tags.replace(",", " "),
+        "D": lambda obj: obj.content,
+    },
+    "content.blogpost": {
+        "A": lambda obj: obj.title,
+        "B": lambda obj: obj.excerpt,
+        "D": lambda obj: obj.content,
+    },
+    "content.faq": {
+        "A": lambda obj: obj.question,
+        "D": lambda obj: obj.answer,
+    },
+}
+WEIGHTS = "ABCD"
+
+
+def is_postgres(conn=None):
+    return (conn or connection).vendor == "postgresql"
+
+
+def plain_text(value):
+    """Strip tags and entities from HTML so markup is never indexed."""
+    return re.sub(r"\s+", " ", html.unescape(strip_tags(value or ""))).strip()
+
+
+def _documents(instance):
+    sources = SOURCES[instance._meta.label_lower]
+    return {weight: plain_text(sources[weight](instance)) if weight in sources else "" for weight in WEIGHTS}
+
+
+def _terms(query):
+    return re.findall(r"\w+", (query or "").lower())
+
+
+def index_instance(instance):
+    """Write the search document for one saved instance."""
+    documents = _documents(instance)
+    if is_postgres():
+        vector = None
+        for weight, text in documents.items():
+            if text:
+                part = SearchVector(Value(text), weight=weight, config=CONFIG)
+                vector = part if vector is None else vector + part
+        type(instance).objects.filter(pk=instance.pk).update(search_vector=vector)
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE kind = %s AND object_id = %s",
+                       [instance._meta.label_lower, instance.pk])
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (kind, object_id, title, excerpt, tags, body) VALUES (%s, %s, %s, %s, %s, %s)",
+            [instance._meta.label_lower, instance.pk, *(documents[weight] for weight in WEIGHTS)],
+        )
+
+
+def remove_instance(instance):
+    if not is_postgres():
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE kind = %s AND object_id = %s",
+                           [instance._meta.label_lower, instance.pk])
+
+
+def rebuild(model):
+    """Reindex every row of ``model``; returns the number indexed."""
+    count = 0
+    for instance in model.objects.iterator(chunk_size=500):
+        index_instance(instance)
+        count += 1
+    return count
+
+
+def search(queryset, query):
+    """Filter ``queryset`` to rows matching ``query``, best matches first."""
+    terms = _terms(query)
+    if not terms:
+        return queryset.none()
+    if is_postgres():
+        # Prefix match on every word: 'box:* & size:*'
+        tsquery = SearchQuery(" & ".join(f"{term}:*" for term in terms), search_type="raw", config=CONFIG)
+        return (
+            queryset.filter(search_vector=tsquery)
+            .annotate(rank=SearchRank(F("search_vector"), tsquery))
+            .order_by("-rank", "pk")
+        )
+
+    match = " ".join(f'"{term}"*' for term in terms)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT object_id FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND kind = %s "
+            f"ORDER BY bm25({FTS_TABLE}, 0, 0, {', '.join(map(str, FTS_WEIGHTS))}) LIMIT %s",
+            [match, queryset.model._meta.label_lower, MAX_FTS_RESULTS],
+        )
+        ids = [row[0] for row in cursor.fetchall()]
+    if not ids:
+        return queryset.none()
+    order = Case(*[When(pk=pk, then=Value(position)) for position, pk in enumerate(ids)], output_field=IntegerField())
+    return queryset.filter(pk__in=ids).order_by(order)
@@ -0,0 +1,144 @@
+"""
+Buffered help center search logging and search-term aggregation.
+
+``record`` queues a search event instead of inserting a ``HelpArticleSearch``
+row in the request. With Redis (``USE_REDIS``) events go onto a list shared by
+all workers and the ``flush_search_log`` beat task bulk-inserts them; without
+Redis they are buffered in-process and written once ``SEARCH_LOG_BATCH_SIZE``
+events or ``COUNTER_FLUSH_INTERVAL`` seconds accumulate. A failed insert puts
+its events back at the head of the queue; like any analytics buffer, events
+taken by a worker that dies before inserting them are lost.
+
+``aggregate_terms`` rolls the raw rows up into ``HelpSearchTerm`` (searches
+and zero-result searches per normalized query per day), which the trending
+snapshot ranks (see ``apps.products.trending``).
+"""
+
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.functions import Lower, Trim, TruncDate
+from django.utils import timezone
+
+from .models import HelpArticleSearch, HelpSearchTerm
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY = "packaxis:help-searches"
+
+_lock = threading.Lock()
+_buffer = []
+_last_flush = time.monotonic()
+
+
+def _redis():
+    from django_redis import get_redis_connection
+
+    return get_redis_connection("default")
+
+
+def record(query, results_count, session_id="", ip_address=None):
+    """Queue one search event for a later batched insert."""
+    event = {
+        "query": query[:255],
+        "results_count": results_count,
+        "session_id": session_id or "",
+        "ip_address": ip_address,
+        "created_at": timezone.now().isoformat(),
+    }
+    if settings.USE_REDIS:
+        _redis().rpush(REDIS_KEY, json.dumps(event))
+        return
+    with _lock:
+        _buffer.append(event)
+        due = (
+            len(_buffer) >= settings.SEARCH_LOG_BATCH_SIZE
+            or time.monotonic() - _last_flush >= settings.COUNTER_FLUSH_INTERVAL
+        )
+    if due:
+        try:
+            flush()
+        except Exception:
+            # The events are put back; don't fail the search that happened to flush
+            logger.exception("Search log flush failed")
+
+
+def _take(count):
+    global _last_flush
+    if settings.USE_REDIS:
+        pipe = _redis().pipeline()
+        pipe.lrange(REDIS_KEY, 0, count - 1)
+        pipe.ltrim(REDIS_KEY, count, -1)
+        return [json.loads(event) for event in pipe.execute()[0]]
+    with _lock:
+        events = _buffer[:count]
+        del _buffer[:count]
+        _last_flush = time.monotonic()
+    return events
+
+
+def _put_back(events):
+    """Return taken ``events`` to the head of the queue, in order."""
+    if settings.USE_REDIS:
+        _redis().lpush(REDIS_KEY, *[json.dumps(event) for event in reversed(events)])
+        return
+    with _lock:
+        _buffer[:0] = events
+
+
+def flush():
+    """Bulk-insert every queued search event; returns the number written."""
+    written = 0
+    while True:
+        events = _take(settings.SEARCH_LOG_BATCH_SIZE)
+        if not events:
+            return written
+        try:
+            HelpArticleSearch.objects.bulk_create([
+                HelpArticleSearch(
+                    query=event["query"],
+                    results_count=event["results_count"],
+                    session_id=event["session_id"],
+                    ip_address=event["ip_address"],
+                    created_at=datetime.fromisoformat(event["created_at"]),
+                )
+                for event in events
+            ])
+        except Exception:
+            _put_back(events)
+            raise
+        written += len(events)
+
+
+def aggregate_terms(start, end) -> int:
+    """Recompute ``HelpSearchTerm`` for every day from ``start`` to ``end`` inclusive."""
+    tz = timezone.get_current_timezone()
+    lower = timezone.make_aware(datetime.combine(start, datetime.min.time()), tz)
+    upper = timezone.make_aware(datetime.combine(end + timedelta(days=1), datetime.min.time()), tz)
+    rows = (
+        HelpArticleSearch.objects.filter(created_at__gte=lower, created_at__lt=upper)
+        .annotate(day=TruncDate("created_at"), term=Lower(Trim("query")))
+        .values("day", "term")
+        .annotate(searches=Count("id"), zero_result_searches=Count("id", filter=Q(results_count=0)))
+        .order_by()
+    )
+    terms = [
+        HelpSearchTerm(
+            date=row["day"], term=row["term"],
+            searches=row["searches"], zero_result_searches=row["zero_result_searches"],
+        )
+        for row in rows
+        if row["term"]
+    ]
+    with transaction.atomic():
+        # Replace the range wholesale so terms that dropped out do not linger
+        HelpSearchTerm.objects.filter(date__range=(start, end)).delete()
+        HelpSearchTerm.objects.bulk_create(terms, batch_size=1000)
+    return len(terms)
+
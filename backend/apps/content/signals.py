@@ -0,0 +1,27 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import menus, search
+from .models import FAQ, BlogPost, FooterSection, HelpArticle, MenuItem
+
+
+@receiver(post_save, sender=HelpArticle)
+@receiver(post_save, sender=BlogPost)
+@receiver(post_save, sender=FAQ)
+def index_content(sender, instance, **kwargs):
+    search.index_instance(instance)
+
+
+@receiver(post_delete, sender=HelpArticle)
+@receiver(post_delete, sender=BlogPost)
+@receiver(post_delete, sender=FAQ)
+def unindex_content(sender, instance, **kwargs):
+    search.remove_instance(instance)
+
+
+@receiver(post_save, sender=MenuItem)
+@receiver(post_save, sender=FooterSection)
+@receiver(post_delete, sender=MenuItem)
+@receiver(post_delete, sender=FooterSection)
+def invalidate_menus(sender, **kwargs):
+    menus.invalidate()
@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+from celery import shared_task
+from django.utils import timezone
+
+
+@shared_task
+def flush_counters():
+    """Write buffered article view and helpfulness counts to the database."""
+    from .counters import flush
+
+    return flush()
+
+
+@shared_task
+def flush_search_log():
+    """Bulk-insert buffered help center search events."""
+    from .search_log import flush
+
+    return flush()
+
+
+@shared_task
+def aggregate_search_terms():
+    """Refresh today's and yesterday's per-term search totals."""
+    from .search_log import aggregate_terms
+
+    today = timezone.localdate()
+    return aggregate_terms(today - timedelta(days=1), today)
@@ -1,3 +1,203 @@
-from django.test import TestCase
+"""
+Tests for the content app: write-behind counters, search logging, full-text search and menus.
+"""
 
-# Create your tests here.
+import json
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import DatabaseError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from . import counters, menus, search, search_log
+from .context_processors import dynamic_menu
+from .models import FAQ, BlogPost, FooterSection, HelpArticle, HelpArticleSearch, HelpSearchTerm, MenuItem
+
+
+# DEBUG lets templates render without a built Vite manifest
+@override_settings(DEBUG=True, STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class CounterTests(TestCase):
+    """Tests for buffering and flushing article counters."""
+
+    def setUp(self):
+        counters._store = counters.LocalCounterStore(interval=3600)
+        self.addCleanup(setattr, counters, '_store', None)
+        self.article = HelpArticle.objects.create(
+            title='Choosing a box', excerpt='How to pick', content='<p>Body</p>', status='published'
+        )
+
+    def test_article_view_does_not_write(self):
+        """Viewing an article buffers the view instead of updating the row."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/help/article/{self.article.slug}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([q for q in queries if q['sql'].startswith('UPDATE')])
+        self.assertEqual(counters.pending(self.article, 'views_count'), 1)
+
+        counters.flush()
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.views_count, 1)
+        self.assertEqual(counters.pending(self.article, 'views_count'), 0)
+
+    def test_flush_batches_updates(self):
+        """Rows with the same increment share one UPDATE statement."""
+        other = HelpArticle.objects.create(title='Shipping', excerpt='x', content='y', status='published')
+        post = BlogPost.objects.create(title='News', excerpt='x', content='y', status='published')
+        for instance in (self.article, other, post):
+            instance.increment_views()
+            instance.increment_views()
+
+        with self.assertNumQueries(4):  # savepoint, one UPDATE per model, release
+            self.assertEqual(counters.flush(), 3)
+        self.assertEqual(HelpArticle.objects.get(pk=other.pk).views_count, 2)
+        self.assertEqual(BlogPost.objects.get(pk=post.pk).views_count, 2)
+
+    def test_failed_flush_on_increment_keeps_counts(self):
+        """A flush triggered by a view logs its failure and re-queues; an explicit flush raises."""
+        counters._store = counters.LocalCounterStore(interval=0)
+        with mock.patch.object(counters, '_apply', side_effect=RuntimeError('database down')):
+            with self.assertLogs('apps.content.counters', 'ERROR'):
+                self.article.increment_views()
+            self.assertEqual(counters.pending(self.article, 'views_count'), 1)
+            with self.assertRaises(RuntimeError):
+                counters.flush()
+        self.assertEqual(counters.pending(self.article, 'views_count'), 1)
+
+    def test_feedback_reports_unflushed_votes(self):
+        """The feedback response includes votes still in the buffer."""
+        url = f'/help/article/{self.article.slug}/feedback/'
+        self.client.post(url, json.dumps({'helpful': True}), content_type='application/json')
+        response = self.client.post(url, json.dumps({'helpful': False}), content_type='application/json')
+        self.assertEqual(response.json()['helpful_yes'], 1)
+        self.assertEqual(response.json()['helpful_no'], 1)
+        self.assertEqual(response.json()['ratio'], 50)
+        self.assertEqual(HelpArticle.objects.get(pk=self.article.pk).helpful_yes, 0)
+
+
+@override_settings(DEBUG=True, SEARCH_LOG_BATCH_SIZE=3, COUNTER_FLUSH_INTERVAL=3600)
+class SearchLogTests(TestCase):
+    """Tests for buffered search logging and term aggregation."""
+
+    def setUp(self):
+        search_log._buffer.clear()
+        self.addCleanup(search_log._buffer.clear)
+        HelpArticle.objects.create(title='Shipping rates', excerpt='Costs', content='<p>Rates</p>', status='published')
+
+    def test_search_is_logged_in_batches(self):
+        """Searches are not inserted one by one, and use the paginator's count."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/help/search/', {'q': 'shipping'}, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([q for q in queries if q['sql'].startswith('INSERT')])
+        self.assertEqual(len([q for q in queries if 'COUNT(' in q['sql']]), 1)
+        self.assertFalse(HelpArticleSearch.objects.exists())
+
+        # The third event fills the batch and is written with the others in one INSERT
+        self.client.get('/help/search/', {'q': 'Shipping '}, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/help/search/', {'q': 'pallets'}, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(len([q for q in queries if q['sql'].startswith('INSERT')]), 1)
+        self.assertEqual(HelpArticleSearch.objects.count(), 3)
+        self.assertEqual(HelpArticleSearch.objects.get(query='pallets').results_count, 0)
+
+    def test_failed_insert_keeps_events(self):
+        """A search that triggers a failing flush still succeeds, and the events are kept for the next one."""
+        for query in ('boxes', 'tape'):
+            search_log.record(query, 1)
+        with mock.patch.object(HelpArticleSearch.objects, 'bulk_create', side_effect=DatabaseError('down')):
+            with self.assertLogs('apps.content.search_log', 'ERROR'):
+                response = self.client.get('/help/search/', {'q': 'pallets'}, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual([event['query'] for event in search_log._buffer], ['boxes', 'tape', 'pallets'])
+            with self.assertRaises(DatabaseError):
+                search_log.flush()
+        self.assertEqual(search_log.flush(), 3)
+
+    def test_aggregate_terms(self):
+        """Terms are normalized and counted per day, with zero-result searches tracked."""
+        for query, results in [('Shipping', 1), ('shipping ', 1), ('pallets', 0), ('kraft', 2)]:
+            search_log.record(query, results)
+        search_log.flush()
+        today = timezone.localdate()
+        self.assertEqual(search_log.aggregate_terms(today, today), 3)
+
+        self.assertEqual(
+            sorted(HelpSearchTerm.objects.values_list('term', 'searches', 'zero_result_searches')),
+            [('kraft', 1, 0), ('pallets', 1, 1), ('shipping', 2, 0)],
+        )
+        self.assertEqual(self.client.get('/api/products/trending/').json()['trending'][0]['term'], 'shipping')
+
+
+class SearchTests(TestCase):
+    """Tests for the full-text content search index."""
+
+    def setUp(self):
+        self.body_match = HelpArticle.objects.create(
+            title='Returns', excerpt='Sending items back', status='published',
+            content='<p>Use the original <strong>boxes</strong> when returning.</p>'
+        )
+        self.title_match = HelpArticle.objects.create(
+            title='Box sizes', excerpt='Measuring', status='published', content='<p>Inner dimensions</p>'
+        )
+
+    def test_title_matches_rank_first(self):
+        """Title hits outrank body hits, and words match by prefix and stem."""
+        results = list(search.search(HelpArticle.objects.all(), 'box'))
+        self.assertEqual(results, [self.title_match, self.body_match])
+
+    def test_html_is_not_indexed(self):
+        """Markup is stripped before indexing."""
+        self.assertEqual(list(search.search(HelpArticle.objects.all(), 'strong')), [])
+
+    def test_index_follows_saves_and_deletes(self):
+        """Edits and deletions are reflected immediately."""
+        self.title_match.title = 'Carton sizes'
+        self.title_match.save()
+        self.assertEqual(list(search.search(HelpArticle.objects.all(), 'carton')), [self.title_match])
+        self.title_match.delete()
+        self.assertEqual(list(search.search(HelpArticle.objects.all(), 'carton')), [])
+
+    def test_models_are_indexed_separately(self):
+        """FAQs and blog posts are searched within their own model."""
+        faq = FAQ.objects.create(question='Do you ship boxes?', answer='<p>Yes, across Canada.</p>')
+        BlogPost.objects.create(title='Canada shipping news', excerpt='x', content='y', status='published')
+        self.assertEqual(list(search.search(FAQ.objects.all(), 'canada')), [faq])
+        self.assertEqual(search.search(BlogPost.objects.all(), 'canada shipping').count(), 1)
+
+
+class MenuTests(TestCase):
+    """Tests for the cached navigation menus."""
+
+    def setUp(self):
+        cache.clear()
+        self.products = MenuItem.objects.create(title='Products', url='/products/', location='header', order=1)
+        MenuItem.objects.create(title='Bags', url='/products/bags/', location='header', parent=self.products)
+        MenuItem.objects.create(title='Hidden', url='/hidden/', location='header', order=0, is_active=False)
+        MenuItem.objects.create(title='Privacy', url='/privacy/', location='footer_legal')
+        FooterSection.objects.create(title='Company')
+
+    def test_menus_are_built_in_one_query_then_cached(self):
+        """A cold build is one query; later renders read only the cache."""
+        with self.assertNumQueries(1):
+            context = dynamic_menu(None)
+        with self.assertNumQueries(0):
+            self.assertEqual(dynamic_menu(None), context)
+
+        header = context['header_menu']
+        self.assertEqual([item.title for item in header], ['Products'])
+        self.assertEqual([child.title for child in header[0].children], ['Bags'])
+        self.assertEqual([item.url for item in context['footer_legal_menu']], ['/privacy/'])
+        self.assertEqual([section.title for section in context['footer_sections']], ['Company'])
+        self.assertIsInstance(header, tuple)
+
+    def test_admin_save_invalidates(self):
+        """Saving or deleting a menu row rebuilds the menus on next use."""
+        menus.get_menus()
+        self.products.title = 'Shop'
+        self.products.save()
+        self.assertEqual(menus.get_menus()['header_menu'][0].title, 'Shop')
+
+        FooterSection.objects.all().delete()
+        self.assertEqual(menus.get_menus()['footer_sections'], ())
@@ -1,9 +1,9 @@
 ﻿from django.shortcuts import render, get_object_or_404
 from django.core.paginator import Paginator
-from django.db.models import Q
 from django.http import JsonResponse
 from django.template.loader import render_to_string
 from .models import BlogPost, BlogCategory, FAQ, FAQCategory
+from . import counters, search, search_log
 
 
 def blog_list(request):
@@ -18,11 +18,7 @@ def blog_list(request):
     # Search
     search_query = request.GET.get('q')
     if search_query:
-        posts = posts.filter(
-            Q(title__icontains=search_query) |
-            Q(excerpt__icontains=search_query) |
-            Q(content__icontains=search_query)
-        )
+        posts = search.search(posts, search_query)
 
     # Pagination
     paginator = Paginator(posts, 9)  # 9 posts per page (3x3 grid)
@@ -70,11 +66,7 @@ def blog_search(request):
 
     # Search filter
     if search_query:
-        posts = posts.filter(
-            Q(title__icontains=search_query) |
-            Q(excerpt__icontains=search_query) |
-            Q(content__icontains=search_query)
-        )
+        posts = search.search(posts, search_query)
 
     # Pagination
     paginator = Paginator(posts, 9)
@@ -165,12 +157,10 @@ def faq_list(request):
     # Search
     search_query = request.GET.get('q')
     if search_query:
-        faqs = FAQ.objects.filter(
-            is_active=True
-        ).filter(
-            Q(question__icontains=search_query) |
-            Q(answer__icontains=search_query)
-        ).select_related('category')
+        faqs = search.search(
+            FAQ.objects.filter(is_active=True).select_related('category'),
+            search_query
+        )
     else:
         faqs = None
 
@@ -318,7 +308,7 @@ def help_article(request, slug):
 
 def help_search(request):
     """Search help articles (supports both page and AJAX)"""
-    from .models import HelpArticle, HelpArticleSearch, HelpCategory
+    from .models import HelpArticle, HelpCategory
 
     search_query = request.GET.get('q', '').strip()
     category_slug = request.GET.get('category', '')
@@ -334,26 +324,22 @@ def help_search(request):
 
     # Search filter
     if search_query:
-        articles = articles.filter(
-            Q(title__icontains=search_query) |
-            Q(excerpt__icontains=search_query) |
-            Q(content__icontains=search_query) |
-            Q(tags__icontains=search_query)
-        ).distinct()
-
-        # Log search query
-        HelpArticleSearch.objects.create(
-            query=search_query[:255],
-            results_count=articles.count(),
-            session_id=request.session.session_key or '',
-            ip_address=request.META.get('REMOTE_ADDR')
-        )
+        articles = search.search(articles, search_query)
 
     # Pagination
     paginator = Paginator(articles, 12)
     page_number = request.GET.get('page', 1)
     page_obj = paginator.get_page(page_number)
 
+    if search_query:
+        # Buffered and bulk-inserted by apps.content.search_log; reuses the paginator's COUNT
+        search_log.record(
+            search_query,
+            results_count=paginator.count,
+            session_id=request.session.session_key or '',
+            ip_address=request.META.get('REMOTE_ADDR')
+        )
+
     # Get categories for filter
     categories = HelpCategory.objects.filter(is_active=True).order_by('order')
 
@@ -418,6 +404,9 @@ def help_article_feedback(request, slug):
         is_helpful = request.POST.get('helpful', 'true').lower() == 'true'
 
     article.mark_helpful(is_helpful)
+    # Votes are flushed in batches; include the ones not yet written
+    for field in ('helpful_yes', 'helpful_no'):
+        setattr(article, field, getattr(article, field) + counters.pending(article, field))
 
     return JsonResponse({
         'success': True,
@@ -0,0 +1,71 @@
+"""
+Helpers for plain Django async JSON endpoints.
+
+DRF 3.14 cannot run ``async def`` views, so the high-fanout endpoints
+(checkout calculation, autocomplete, trending, shipping rates) are plain
+Django async views. ``async_api`` gives them what ``@api_view`` provided:
+a method check, CSRF exemption, the ``REST_FRAMEWORK`` default throttles and
+a 400 response for a body ``request_data`` cannot parse.
+Under ASGI (uvicorn workers) they run on the event loop; under WSGI Django
+runs them in a per-request loop, so both deployment profiles serve them.
+"""
+
+import json
+from functools import wraps
+from types import SimpleNamespace
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import BadRequest
+from django.http import HttpResponseNotAllowed, JsonResponse
+from rest_framework.settings import api_settings
+
+
+def _throttle_wait(request):
+    """Seconds to wait if a default throttle refuses ``request``, else None."""
+    view = SimpleNamespace()
+    waits = []
+    for throttle_class in api_settings.DEFAULT_THROTTLE_CLASSES:
+        throttle = throttle_class()
+        if not throttle.allow_request(request, view):
+            waits.append(throttle.wait() or 0)
+    return max(waits) if waits else None
+
+
+def request_data(request):
+    """The JSON body, or the form data, as a dict (DRF's ``request.data`` for these views)."""
+    if request.content_type == "application/json":
+        try:
+            data = json.loads(request.body or b"{}")
+        except (json.JSONDecodeError, UnicodeDecodeError) as exc:
+            raise BadRequest(f"JSON parse error - {exc}")
+        if not isinstance(data, dict):
+            raise BadRequest("Expected a JSON object.")
+        return data
+    return request.POST.dict()
+
+
+def async_api(*methods, throttle=True):
+    """Decorate an ``async def`` view taking ``request`` as a throttled, CSRF-exempt JSON endpoint."""
+    methods = methods or ("GET",)
+
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return HttpResponseNotAllowed(methods)
+            # Throttles touch request.user (session lookup) and the cache synchronously
+            wait = await sync_to_async(_throttle_wait)(request) if throttle else None
+            if wait is not None:
+                response = JsonResponse({"detail": "Request was throttled."}, status=429)
+                response["Retry-After"] = str(int(wait))
+                return response
+            try:
+                return await view(request, *args, **kwargs)
+            except BadRequest as exc:
+                return JsonResponse({"detail": str(exc)}, status=400)
+
+        # django.views.decorators.csrf.csrf_exempt only learned about coroutines in Django 5.0
+        wrapper.csrf_exempt = True
+        return wrapper
+
+    return decorator
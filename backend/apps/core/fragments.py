@@ -0,0 +1,56 @@
+"""
+Versioned template fragment caching.
+
+A cached fragment is keyed on the generations of the data it renders (for
+example ``menus`` or ``categories``) plus any values it varies on, such as the
+user's authentication state. Saving the underlying data bumps its generation
+with ``bump``, so stale fragments are never read again and simply expire
+instead of having to be found and deleted. See the ``fragmentcache`` tag in
+``apps.core.templatetags.fragment_cache``.
+
+``FRAGMENT_CACHE_VERSION`` is part of every key; set it per release so cached
+markup picks up new static asset hashes. ``FRAGMENT_CACHE_TIMEOUT = 0``
+disables fragment caching.
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+GENERATION_KEY = "fragments:generation:{}"
+
+
+def generations(names):
+    """Current generation of each dependency name, as ``{name: int}``."""
+    keys = {name: GENERATION_KEY.format(name) for name in names}
+    found = cache.get_many(keys.values())
+    current = {}
+    for name, key in keys.items():
+        if key not in found:
+            # Start from the clock, not 1, so an evicted counter never reuses old fragment keys
+            cache.add(key, int(time.time()), None)
+            found[key] = cache.get(key)
+        current[name] = found[key]
+    return current
+
+
+def bump(name):
+    """Invalidate every fragment that depends on ``name``."""
+    key = GENERATION_KEY.format(name)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, int(time.time()), None)
+
+
+def fragment_key(name, depends=(), vary=()):
+    versions = generations(depends)
+    parts = [f"{dep}={versions[dep]}" for dep in sorted(versions)] + [str(value) for value in vary]
+    digest = hashlib.md5("|".join(parts).encode(), usedforsecurity=False).hexdigest()
+    return f"fragment:{settings.FRAGMENT_CACHE_VERSION}:{name}:{digest}"
+
+
+def enabled():
+    return settings.FRAGMENT_CACHE_TIMEOUT > 0
@@ -0,0 +1,84 @@
+"""
+Management command to time page renders with and without the fragment cache,
+and the cold first render of the product page with and without template warm-up
+Run with: python manage.py benchmark_pages [--iterations 50] [--product <id>]
+"""
+import statistics
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.template import engines
+from django.template.loaders.cached import Loader as CachedLoader
+from django.urls import resolve
+
+from apps.core.template_warmup import warm
+from apps.products.models import Product
+
+
+class Command(BaseCommand):
+    help = 'Times the home, product list and product detail pages with fragment caching off and on'
+
+    def cold_start(self, render, path):
+        loaders = engines['django'].engine.template_loaders
+        if not any(isinstance(loader, CachedLoader) for loader in loaders):
+            self.stdout.write('  (skipped: templates are not cached when DEBUG is on)')
+            return
+        # Render once first so one-off imports are not counted against the cold run
+        render(path)
+        for label, warm_up in (('first product page, cold', False), ('first product page, warmed', True)):
+            for loader in loaders:
+                loader.reset()
+            cache.clear()
+            if warm_up:
+                started = time.perf_counter()
+                compiled, _ = warm()
+                self.stdout.write(f'  warm-up compiled {compiled} templates in {(time.perf_counter() - started) * 1000:.2f} ms')
+            started = time.perf_counter()
+            render(path)
+            self.stdout.write(f'  {label:<28} {(time.perf_counter() - started) * 1000:7.2f} ms')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--product', type=int, help='Product id for the detail page (default: first active)')
+
+    def handle(self, *args, **options):
+        product_id = options['product'] or Product.objects.filter(is_active=True).values_list('id', flat=True).first()
+        if product_id is None:
+            raise CommandError('No active product to render; pass --product or seed the catalogue')
+        pages = [('home', '/'), ('product list', '/products/'), ('product detail', f'/products/{product_id}/')]
+        factory = RequestFactory()
+
+        def render(path):
+            request = factory.get(path)
+            request.user = AnonymousUser()
+            match = resolve(path)
+            response = match.func(request, *match.args, **match.kwargs)
+            if response.status_code != 200:
+                raise CommandError(f'{path} returned {response.status_code}')
+
+        self.stdout.write(self.style.MIGRATE_HEADING('cold start'))
+        self.cold_start(render, pages[-1][1])
+
+        for label, timeout in (('without fragment cache', 0), ('with fragment cache', 86400)):
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            with override_settings(FRAGMENT_CACHE_TIMEOUT=timeout):
+                cache.clear()
+                for name, path in pages:
+                    render(path)  # warm up: template compilation and the cache itself
+                    with CaptureQueriesContext(connection) as queries:
+                        render(path)
+                    timings = []
+                    for _ in range(options['iterations']):
+                        started = time.perf_counter()
+                        render(path)
+                        timings.append((time.perf_counter() - started) * 1000)
+                    self.stdout.write(
+                        f'  {name:<16} median {statistics.median(timings):7.2f} ms  '
+                        f'p95 {sorted(timings)[int(len(timings) * 0.95) - 1]:7.2f} ms  '
+                        f'{len(queries)} queries'
+                    )
@@ -0,0 +1,19 @@
+"""
+Management command to compile every project template and fail on errors
+Run with: python manage.py check_templates
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.template_warmup import warm
+
+
+class Command(BaseCommand):
+    help = 'Compiles all project templates (including emails) and exits non-zero if any fail'
+
+    def handle(self, *args, **options):
+        compiled, errors = warm()
+        for name, exc in errors:
+            self.stderr.write(f'{name}: {type(exc).__name__}: {exc}')
+        if errors:
+            raise CommandError(f'{len(errors)} template(s) failed to compile')
+        self.stdout.write(self.style.SUCCESS(f'Compiled {compiled} templates'))
@@ -0,0 +1,131 @@
+"""
+Database router for the optional read replica.
+
+When a ``replica`` database is configured (``POSTGRES_REPLICA_HOST``, or
+``SQLITE_REPLICA_NAME`` with ``USE_SQLITE``), reads of models in
+``DB_REPLICA_APPS`` go to it; every write, and every other read, stays on
+``default``. Migrations only run on ``default``.
+
+Read-your-writes: the first write routed in a request (or Celery task) pins
+the rest of it to ``default``, so a cart or checkout never reads back its own
+changes from a lagging replica. ``ReplicaPinningMiddleware`` and the Celery
+task signals below scope the pin.
+
+Reporting code that tolerates lag (dashboard aggregates, CSV and PDF exports)
+runs inside ``use_replica()``, which sends all of its reads, whatever the
+app, to the replica; ``iterate_on_replica`` does the same for a lazily
+consumed iterator such as a streaming response.
+
+Reads that refill a cache invalidated by a signal (menus, tax classes,
+packed parcels, tier and contract prices, ``{% fragmentcache %}`` fragments)
+run inside ``use_primary()``: the signal fires in the admin's request, and an
+unpinned shopper request rebuilding from a lagging replica would otherwise
+cache the old rows until the next edit.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from celery.signals import task_postrun, task_prerun
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+REPLICA_DB_ALIAS = "replica"
+
+_pinned = ContextVar("db_pinned_to_primary", default=False)
+_forced = ContextVar("db_forced_to_replica", default=False)
+_primary = ContextVar("db_forced_to_primary", default=False)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not settings.DB_REPLICA_ENABLED:
+            return None
+        if _primary.get():
+            return DEFAULT_DB_ALIAS
+        if _forced.get():
+            return REPLICA_DB_ALIAS
+        if _pinned.get() or model._meta.app_label not in settings.DB_REPLICA_APPS:
+            return None
+        return REPLICA_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        _pinned.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+# Generator-based, so each ``with`` (or call of a decorated function) keeps
+# its own token: a shared instance would reset another thread's token
+@contextmanager
+def use_replica():
+    """Send every read in the block to the replica (when one is configured)."""
+    token = _forced.set(True)
+    try:
+        yield
+    finally:
+        _forced.reset(token)
+
+
+@contextmanager
+def use_primary():
+    """Send every read in the block to ``default``, e.g. to refill a cache."""
+    token = _primary.set(True)
+    try:
+        yield
+    finally:
+        _primary.reset(token)
+
+
+def iterate_on_replica(iterable):
+    """Yield from ``iterable``, running each step inside ``use_replica()``."""
+    iterator = iter(iterable)
+    while True:
+        with use_replica():
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+def is_pinned():
+    return _pinned.get()
+
+
+class ReplicaPinningMiddleware:
+    """Start each request unpinned and drop the pin when it finishes."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _pinned.set(False)
+        try:
+            return self.get_response(request)
+        finally:
+            _pinned.reset(token)
+
+
+_task_tokens = {}
+
+
+@task_prerun.connect
+def _unpin_task(task_id=None, task=None, **kwargs):
+    # Eager tasks run inside the calling request and keep its pin
+    if task is not None and task.request.is_eager:
+        return
+    _task_tokens[task_id] = _pinned.set(False)
+
+
+@task_postrun.connect
+def _reset_task(task_id=None, **kwargs):
+    token = _task_tokens.pop(task_id, None)
+    if token is not None:
+        _pinned.reset(token)
@@ -0,0 +1,79 @@
+"""
+Compile the project's templates ahead of the first request.
+
+``template_names`` lists every template under the Django engine's ``DIRS``
+(``frontend/templates`` including ``emails/``, and ``backend/templates``) and
+under the ``templates`` directory of the project's own apps; third-party app
+templates are left to compile on demand. ``warm`` loads each one through the
+engine, so with the cached loader (production) the compiled templates stay in
+memory for the life of the process. It runs from ``wsgi.py``/``asgi.py`` when
+``TEMPLATE_WARMUP`` is set, and ``python manage.py check_templates`` uses it to
+fail a build on a template that does not compile.
+"""
+
+import logging
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.template import TemplateDoesNotExist, TemplateSyntaxError, engines
+from django.template.loader_tags import ExtendsNode, IncludeNode
+from django.template.utils import get_app_template_dirs
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_SUFFIXES = (".html", ".txt", ".xml")
+
+
+def template_dirs():
+    project = Path(settings.BASE_DIR).parent.resolve()
+    dirs = [Path(d) for d in engines["django"].dirs]
+    dirs += [Path(d) for d in get_app_template_dirs("templates") if Path(d).resolve().is_relative_to(project)]
+    return [d for d in dirs if d.is_dir()]
+
+
+def template_names():
+    """Template names as they are looked up, in search order, without duplicates."""
+    names = {}
+    for directory in template_dirs():
+        for path in sorted(directory.rglob("*")):
+            if path.suffix in TEMPLATE_SUFFIXES and path.is_file():
+                names.setdefault(path.relative_to(directory).as_posix(), None)
+    return list(names)
+
+
+def _references(template):
+    """Literal ``{% extends %}``/``{% include %}`` targets, which only load at render time."""
+    nodelist = template.template.nodelist
+    for node in nodelist.get_nodes_by_type(ExtendsNode):
+        yield node.parent_name
+    for node in nodelist.get_nodes_by_type(IncludeNode):
+        yield node.template
+
+
+def warm(names=None):
+    """Compile ``names`` (default: all project templates); returns ``(compiled, errors)``."""
+    engine = engines["django"]
+    compiled, errors = 0, []
+    for name in template_names() if names is None else names:
+        try:
+            template = engine.get_template(name)
+            for expression in _references(template):
+                if isinstance(expression.var, str) and not expression.filters:
+                    engine.get_template(expression.var)
+        except (TemplateSyntaxError, TemplateDoesNotExist) as exc:
+            errors.append((name, exc))
+        else:
+            compiled += 1
+    return compiled, errors
+
+
+def warm_on_startup():
+    """Warm the template cache for a server process, logging rather than raising."""
+    if not settings.TEMPLATE_WARMUP:
+        return
+    started = time.perf_counter()
+    compiled, errors = warm()
+    for name, exc in errors:
+        logger.error("Template %s failed to compile: %s", name, exc)
+    logger.info("Compiled %d templates in %.0f ms", compiled, (time.perf_counter() - started) * 1000)
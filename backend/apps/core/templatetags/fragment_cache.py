@@ -0,0 +1,72 @@
+"""
+Template tag for versioned fragment caching.
+
+Usage::
+
+    {% load fragment_cache %}
+    {% fragmentcache "header" user.is_authenticated depends="menus" %}
+      ...
+    {% endfragmentcache %}
+
+The first argument names the fragment, any further arguments are values the
+markup varies on, and ``depends`` is a comma-separated list of data
+generations (see ``apps.core.fragments``). Never cache markup that contains
+per-request values such as ``{% csrf_token %}``.
+"""
+
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.template.base import token_kwargs
+
+from apps.core import fragments
+from apps.core.routers import use_primary
+
+register = template.Library()
+
+
+class FragmentCacheNode(template.Node):
+    def __init__(self, nodelist, name, vary, depends):
+        self.nodelist = nodelist
+        self.name = name
+        self.vary = vary
+        self.depends = depends
+
+    def render(self, context):
+        if not fragments.enabled():
+            return self.nodelist.render(context)
+        depends = self.depends.resolve(context) if self.depends else ""
+        key = fragments.fragment_key(
+            self.name.resolve(context),
+            [name.strip() for name in depends.split(",") if name.strip()],
+            [value.resolve(context) for value in self.vary],
+        )
+        html = cache.get(key)
+        if html is None:
+            # Cached under the current generations, so never from a lagging replica
+            with use_primary():
+                html = self.nodelist.render(context)
+            cache.set(key, html, settings.FRAGMENT_CACHE_TIMEOUT)
+        return html
+
+
+@register.tag
+def fragmentcache(parser, token):
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' tag requires a fragment name")
+    nodelist = parser.parse(("endfragmentcache",))
+    parser.delete_first_token()
+
+    args, depends = bits[1:], None
+    if args and args[-1].startswith("depends="):
+        depends = token_kwargs(args[-1:], parser)["depends"]
+        args = args[:-1]
+    if not args:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' tag requires a fragment name")
+    return FragmentCacheNode(
+        nodelist,
+        parser.compile_filter(args[0]),
+        [parser.compile_filter(arg) for arg in args[1:]],
+        depends,
+    )
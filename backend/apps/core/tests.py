@@ -0,0 +1,199 @@
+"""
+Tests for the core app: fragment caching, template warm-up and the replica router.
+"""
+
+import tempfile
+import threading
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.template import Context, Template, TemplateSyntaxError
+from django.test import TestCase, override_settings
+
+from apps.content import menus
+from apps.content.models import MenuItem
+from apps.orders.models import Order
+from apps.products.models import Category, Product
+from . import fragments, routers, template_warmup
+
+TEMPLATE = Template(
+    '{% load fragment_cache %}'
+    '{% fragmentcache "nav" authenticated depends="menus,categories" %}{{ label }}{% endfragmentcache %}'
+)
+
+
+def render(label, authenticated=False):
+    return TEMPLATE.render(Context({'label': label, 'authenticated': authenticated}))
+
+
+@override_settings(FRAGMENT_CACHE_TIMEOUT=60)
+class FragmentCacheTests(TestCase):
+    """Tests for the fragmentcache tag and dependency generations."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_fragment_is_reused_until_a_dependency_changes(self):
+        """Rendering again reuses the markup; bumping a generation re-renders it."""
+        self.assertEqual(render('first'), 'first')
+        self.assertEqual(render('second'), 'first')
+        fragments.bump('menus')
+        self.assertEqual(render('third'), 'third')
+
+    def test_fragment_varies_on_arguments(self):
+        """Each combination of vary values gets its own entry."""
+        self.assertEqual(render('anonymous'), 'anonymous')
+        self.assertEqual(render('member', authenticated=True), 'member')
+        self.assertEqual(render('other'), 'anonymous')
+
+    def test_category_save_bumps_generation(self):
+        """Saving a category invalidates fragments depending on categories."""
+        before = fragments.generations(['categories'])['categories']
+        Category.objects.create(name='Bags', slug='bags')
+        self.assertEqual(fragments.generations(['categories'])['categories'], before + 1)
+
+    @override_settings(FRAGMENT_CACHE_TIMEOUT=0)
+    def test_disabled(self):
+        """A zero timeout renders every time."""
+        render('first')
+        self.assertEqual(render('second'), 'second')
+
+    def test_name_is_required(self):
+        with self.assertRaises(TemplateSyntaxError):
+            Template('{% load fragment_cache %}{% fragmentcache depends="menus" %}{% endfragmentcache %}')
+
+
+class TemplateWarmupTests(TestCase):
+    """Tests for compiling project templates ahead of time."""
+
+    def test_project_templates_compile(self):
+        """Every project template, including emails, compiles."""
+        names = template_warmup.template_names()
+        self.assertIn('product_detail_optimized.html', names)
+        self.assertIn('emails/order_confirmation.html', names)
+        compiled, errors = template_warmup.warm()
+        self.assertEqual(errors, [])
+        self.assertEqual(compiled, len(names))
+        call_command('check_templates', stdout=StringIO())
+
+    def test_broken_templates_are_reported(self):
+        """Syntax errors and missing include targets fail the check."""
+        with tempfile.TemporaryDirectory() as directory:
+            Path(directory, 'broken.html').write_text('{% if %}')
+            Path(directory, 'orphan.html').write_text('{% include "missing/partial.html" %}')
+            templates = [{
+                'BACKEND': 'django.template.backends.django.DjangoTemplates',
+                'DIRS': [directory],
+            }]
+            with override_settings(TEMPLATES=templates):
+                compiled, errors = template_warmup.warm()
+                self.assertEqual(compiled, 0)
+                self.assertEqual(sorted(name for name, _ in errors), ['broken.html', 'orphan.html'])
+                with self.assertRaises(CommandError):
+                    call_command('check_templates', stderr=StringIO())
+
+
+@override_settings(DB_REPLICA_ENABLED=True, DB_REPLICA_APPS=['products', 'content'])
+class ReplicaRouterTests(TestCase):
+    """Tests for read routing and read-your-writes pinning (routing decisions only)."""
+
+    def setUp(self):
+        self.router = routers.ReplicaRouter()
+
+    def in_request(self, view):
+        return routers.ReplicaPinningMiddleware(view)(None)
+
+    def test_catalogue_reads_go_to_the_replica(self):
+        def view(request):
+            self.assertEqual(self.router.db_for_read(Product), 'replica')
+            self.assertIsNone(self.router.db_for_read(Order))
+            self.assertEqual(self.router.db_for_write(Product), 'default')
+        self.in_request(view)
+
+    def test_write_pins_the_rest_of_the_request(self):
+        """After a write, catalogue reads in the same request use the primary."""
+        def view(request):
+            self.router.db_for_write(Order)
+            self.assertTrue(routers.is_pinned())
+            self.assertIsNone(self.router.db_for_read(Product))
+        self.in_request(view)
+
+        def next_view(request):
+            self.assertFalse(routers.is_pinned())
+            self.assertEqual(self.router.db_for_read(Product), 'replica')
+        self.in_request(next_view)
+
+    def test_use_replica_routes_every_app(self):
+        """Reporting blocks read all models from the replica."""
+        with routers.use_replica():
+            self.assertEqual(self.router.db_for_read(Order), 'replica')
+        self.assertIsNone(self.router.db_for_read(Order))
+
+        def rows():
+            yield self.router.db_for_read(Order)
+            yield self.router.db_for_read(Order)
+        self.assertEqual(list(routers.iterate_on_replica(rows())), ['replica', 'replica'])
+
+    def test_cache_refills_read_the_primary(self):
+        """Rebuilding a signal-invalidated cache never reads a lagging replica."""
+        def view(request):
+            with routers.use_primary():
+                self.assertEqual(self.router.db_for_read(Product), 'default')
+                with routers.use_replica():
+                    self.assertEqual(self.router.db_for_read(Order), 'default')
+            self.assertEqual(self.router.db_for_read(Product), 'replica')
+
+            routing = []
+            with mock.patch.object(menus, 'build_menus', side_effect=lambda: routing.append(
+                    self.router.db_for_read(MenuItem)) or {}):
+                menus.get_menus()
+            self.assertEqual(routing, ['default'])
+        cache.delete(menus.CACHE_KEY)
+        self.in_request(view)
+
+    @override_settings(FRAGMENT_CACHE_TIMEOUT=60)
+    def test_fragment_misses_render_from_the_primary(self):
+        """A fragment cached under a new generation is never rendered from the replica."""
+        cache.clear()
+        label = lambda: self.router.db_for_read(Category)
+        self.assertEqual(self.in_request(lambda request: render(label)), 'default')
+
+    def test_decorated_function_is_safe_across_threads(self):
+        """Concurrent calls each reset their own token and leave nothing forced behind."""
+        both_inside, first_out = threading.Barrier(2), threading.Event()
+        results, errors = {}, []
+
+        @routers.use_replica()
+        def report(name):
+            both_inside.wait(timeout=5)
+            if name == 'second':
+                first_out.wait(timeout=5)
+
+        def run(name):
+            try:
+                report(name)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                first_out.set()
+            results[name] = self.router.db_for_read(Order)
+
+        threads = [threading.Thread(target=run, args=(name,)) for name in ('first', 'second')]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(results, {'first': None, 'second': None})
+
+    @override_settings(DB_REPLICA_ENABLED=False)
+    def test_without_replica_everything_uses_default(self):
+        with routers.use_replica():
+            self.assertIsNone(self.router.db_for_read(Product))
+
+    def test_migrations_only_run_on_default(self):
+        self.assertTrue(self.router.allow_migrate('default', 'products'))
+        self.assertFalse(self.router.allow_migrate('replica', 'products'))
@@ -25,6 +25,9 @@ class Order(models.Model):
         DELIVERED = "DELIVERED", "Delivered"
         CANCELLED = "CANCELLED", "Cancelled"
 
+    # Statuses that count towards revenue and customer lifetime spend
+    REVENUE_STATUSES = (Status.PROCESSING, Status.SHIPPED, Status.DELIVERED)
+
     order_number = models.CharField(max_length=20, unique=True)
     customer = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.PROTECT, related_name="orders", null=True, blank=True)
     status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
@@ -40,7 +43,8 @@ class Order(models.Model):
     transaction_id = models.CharField(max_length=64, blank=True)
     guest_email = models.EmailField(blank=True)
 
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     shipped_at = models.DateTimeField(null=True, blank=True)
     delivered_at = models.DateTimeField(null=True, blank=True)
 
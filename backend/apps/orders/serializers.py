@@ -16,9 +16,13 @@ class OrderLineSerializer(serializers.ModelSerializer):
         fields = ["id", "product", "product_name", "product_image", "variant", "quantity", "unit_price"]
     
     def get_product_image(self, obj):
-        if obj.product and obj.product.images.exists():
-            return obj.product.images.first().image.url
-        return None
+        if not obj.product:
+            return None
+        # Detail queries prefetch a one-image slice per product into primary_images
+        images = getattr(obj.product, 'primary_images', None)
+        if images is None:
+            images = obj.product.images.all()[:1]
+        return images[0].image.url if images else None
 
 
 class OrderNoteSerializer(serializers.ModelSerializer):
@@ -85,5 +89,31 @@ class OrderSerializer(serializers.ModelSerializer):
     
     def get_notes(self, obj):
         # Only return non-internal notes to customers
-        public_notes = obj.notes.filter(is_internal=False)
+        public_notes = getattr(obj, 'public_notes', None)
+        if public_notes is None:
+            public_notes = obj.notes.filter(is_internal=False).select_related('author')
         return OrderNoteSerializer(public_notes, many=True).data
+
+
+class OrderListSerializer(serializers.ModelSerializer):
+    """Compact order summary for history listings; expects the list queryset annotations."""
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    total_amount = serializers.DecimalField(source='total', max_digits=10, decimal_places=2, read_only=True)
+    line_count = serializers.IntegerField(read_only=True)
+    item_count = serializers.IntegerField(read_only=True)
+    tracking_url = serializers.CharField(read_only=True, allow_null=True)
+
+    class Meta:
+        model = Order
+        fields = [
+            "id",
+            "order_number",
+            "status",
+            "status_display",
+            "total",
+            "total_amount",
+            "line_count",
+            "item_count",
+            "tracking_url",
+            "created_at",
+        ]
@@ -0,0 +1,86 @@
+"""
+Tests for the Orders app.
+Covers the order history API and its query budget.
+"""
+
+from decimal import Decimal
+from rest_framework.test import APITestCase
+from rest_framework import status
+from apps.accounts.models import User
+from apps.products.models import Category, Product, ProductImage
+from .models import Address, Order, OrderLine, OrderNote, ShipmentTracking
+
+
+class OrderHistoryAPITests(APITestCase):
+    """Tests for the list/detail order history endpoints."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='buyer@example.com', password='testpass123')
+        self.other = User.objects.create_user(email='other@example.com', password='testpass123')
+        self.client.force_authenticate(self.user)
+        category = Category.objects.create(name='Boxes', slug='boxes')
+        self.products = []
+        for i in range(3):
+            product = Product.objects.create(
+                sku=f'BOX-{i}', name=f'Box {i}', category=category, retail_price=Decimal('5.00')
+            )
+            ProductImage.objects.create(product=product, image=f'product_images/box-{i}-b.jpg', position=1)
+            ProductImage.objects.create(product=product, image=f'product_images/box-{i}-a.jpg', position=0)
+            self.products.append(product)
+
+    def _create_order(self, customer, number, lines=3):
+        address = Address.objects.create(
+            first_name='Jo', last_name='Doe', address1='1 Main St', city='Toronto',
+            province='ON', postal_code='M5V 3A8'
+        )
+        order = Order.objects.create(
+            order_number=number, customer=customer, total=Decimal('42.00'),
+            shipping_address=address, billing_address=address
+        )
+        for product in self.products[:lines]:
+            OrderLine.objects.create(order=order, product=product, quantity=2, unit_price=product.retail_price)
+        OrderNote.objects.create(order=order, content='Packed', is_internal=False)
+        OrderNote.objects.create(order=order, content='Staff only', is_internal=True)
+        ShipmentTracking.objects.create(
+            order=order, carrier='UPS', tracking_number=f'1Z{number}',
+            tracking_url=f'https://ups.example/{number}'
+        )
+        return order
+
+    def test_list_is_compact_and_annotated(self):
+        """List rows carry summary figures only."""
+        self._create_order(self.user, 'PKX-1')
+        self._create_order(self.other, 'PKX-2')
+
+        response = self.client.get('/api/orders/orders/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 1)
+        row = response.data['results'][0]
+        self.assertEqual(row['order_number'], 'PKX-1')
+        self.assertEqual(row['line_count'], 3)
+        self.assertEqual(row['item_count'], 6)
+        self.assertEqual(row['tracking_url'], 'https://ups.example/PKX-1')
+        self.assertNotIn('lines', row)
+
+    def test_list_query_count_is_constant(self):
+        """Listing does not issue per-order queries."""
+        for i in range(10):
+            self._create_order(self.user, f'PKX-{i}')
+        # One COUNT for pagination plus one annotated SELECT
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/orders/orders/')
+        self.assertEqual(len(response.data['results']), 10)
+
+    def test_detail_query_count_is_constant(self):
+        """Detail uses prefetches for lines, images, shipments and notes."""
+        small = self._create_order(self.user, 'PKX-S', lines=1)
+        large = self._create_order(self.user, 'PKX-L', lines=3)
+
+        with self.assertNumQueries(5):
+            self.client.get(f'/api/orders/orders/{small.pk}/')
+        with self.assertNumQueries(5):
+            response = self.client.get(f'/api/orders/orders/{large.pk}/')
+
+        self.assertEqual(len(response.data['lines']), 3)
+        self.assertEqual(response.data['lines'][0]['product_image'], '/media/product_images/box-0-a.jpg')
+        self.assertEqual([n['content'] for n in response.data['notes']], ['Packed'])
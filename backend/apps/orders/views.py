@@ -1,7 +1,13 @@
+from django.db.models import Count, OuterRef, Prefetch, Subquery, Sum
+from django.db.models.functions import Coalesce
 from rest_framework import viewsets
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
-from .models import Order
-from .serializers import OrderSerializer
+from rest_framework.response import Response
+from apps.analytics.models import CustomerOrderStats
+from apps.products.models import ProductImage
+from .models import Order, OrderLine, OrderNote, ShipmentTracking
+from .serializers import OrderSerializer, OrderListSerializer
 
 class OrderViewSet(viewsets.ModelViewSet):
     queryset = Order.objects.all()
@@ -9,4 +15,51 @@ class OrderViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return super().get_queryset().filter(customer=self.request.user)
+        qs = super().get_queryset().filter(customer=self.request.user)
+        if self.action == "list":
+            return self._list_queryset(qs)
+        return self._detail_queryset(qs)
+
+    def get_serializer_class(self):
+        if self.action == "list":
+            return OrderListSerializer
+        return super().get_serializer_class()
+
+    @action(detail=False, methods=["get"])
+    def stats(self, request):
+        """Precomputed order count and lifetime spend for the current customer."""
+        stats = CustomerOrderStats.objects.filter(customer=request.user).first()
+        return Response({
+            "order_count": stats.order_count if stats else 0,
+            "lifetime_spend": str(stats.lifetime_spend) if stats else "0.00",
+            "last_order_at": stats.last_order_at if stats else None,
+        })
+
+    def _list_queryset(self, qs):
+        # Line counts and the latest tracking link are computed in the same query
+        latest_tracking = ShipmentTracking.objects.filter(
+            order=OuterRef("pk")
+        ).exclude(tracking_url="").order_by("-created_at").values("tracking_url")[:1]
+        return qs.only(
+            "id", "order_number", "status", "total", "created_at"
+        ).annotate(
+            line_count=Count("lines"),
+            item_count=Coalesce(Sum("lines__quantity"), 0),
+            tracking_url=Subquery(latest_tracking),
+        ).order_by("-created_at")
+
+    def _detail_queryset(self, qs):
+        # Fixed number of queries per request regardless of lines/notes/shipments
+        lines = OrderLine.objects.select_related("product").prefetch_related(
+            Prefetch(
+                "product__images",
+                queryset=ProductImage.objects.order_by("position", "id")[:1],
+                to_attr="primary_images",
+            )
+        )
+        public_notes = OrderNote.objects.filter(is_internal=False).select_related("author")
+        return qs.select_related("shipping_address", "billing_address").prefetch_related(
+            Prefetch("lines", queryset=lines),
+            "shipments",
+            Prefetch("notes", queryset=public_notes, to_attr="public_notes"),
+        )
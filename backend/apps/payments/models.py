@@ -17,6 +17,7 @@ class Payment(models.Model):
     transaction_id = models.CharField(max_length=64, blank=True)
     error_message = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     processed_at = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
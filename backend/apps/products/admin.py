@@ -1,6 +1,8 @@
 ﻿from django.contrib import admin
 from django.utils.html import format_html
-from .models import Category, Product, ProductImage, ProductVariant, PricingTier, Review, InventoryLog
+from .models import (
+    Category, Product, ProductImage, ProductVariant, PricingTier, PriceList, PriceListItem, Review, InventoryLog,
+)
 
 
 class SubcategoryInline(admin.TabularInline):
@@ -126,6 +128,21 @@ class ProductAdmin(admin.ModelAdmin):
     categories_display.short_description = 'Categories'
 
 
+class PriceListItemInline(admin.TabularInline):
+    model = PriceListItem
+    extra = 1
+    raw_id_fields = ('product',)
+
+
+@admin.register(PriceList)
+class PriceListAdmin(admin.ModelAdmin):
+    list_display = ('name', 'company_name', 'is_active', 'updated_at')
+    list_filter = ('is_active',)
+    search_fields = ('name', 'company_name', 'users__email')
+    filter_horizontal = ('users',)
+    inlines = [PriceListItemInline]
+
+
 @admin.register(Review)
 class ReviewAdmin(admin.ModelAdmin):
     list_display = ('product', 'user_email', 'rating', 'verified_purchase', 'created_at')
@@ -168,6 +168,29 @@ class PricingTier(models.Model):
         ordering = ["min_qty"]
 
 
+class PriceList(models.Model):
+    """Contract prices for B2B customers, assigned to users or to everyone at a company."""
+    name = models.CharField(max_length=255)
+    users = models.ManyToManyField("accounts.User", blank=True, related_name="price_lists")
+    company_name = models.CharField(max_length=255, blank=True, db_index=True,
+                                    help_text="Applies to every B2B user of this company (case-insensitive)")
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.name
+
+
+class PriceListItem(models.Model):
+    price_list = models.ForeignKey(PriceList, on_delete=models.CASCADE, related_name="items")
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="contract_prices")
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["price_list", "product"], name="unique_price_list_product")]
+
+
 class Review(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="reviews")
     user_email = models.EmailField()
@@ -203,3 +226,16 @@ class InventoryLog(models.Model):
     def __str__(self):
         change = f"+{self.quantity_change}" if self.quantity_change > 0 else str(self.quantity_change)
         return f"{self.product.sku}: {change} ({self.reason})"
+
+
+class TrendingSnapshot(models.Model):
+    """Ranked trending products and search terms, with the API payload already built"""
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    payload = models.JSONField(default=dict)
+
+    class Meta:
+        ordering = ["-created_at"]
+        get_latest_by = "created_at"
+
+    def __str__(self):
+        return f"Trending snapshot {self.created_at:%Y-%m-%d %H:%M}"
@@ -0,0 +1,184 @@
+"""
+Product prices: contract price lists, quantity tiers and retail.
+
+A product's ``PricingTier`` rows are compiled into ``Tiers``: three parallel
+tuples, ``mins`` (sorted ``min_qty``), ``maxs`` and ``prices``. The tier for a
+quantity is the last one starting at or below it (``bisect``), used only if
+the quantity is within its ``max_qty``; quantities between or outside tiers pay
+the retail price. Where tiers overlap, the lower one wins for the shared
+quantities, as it did when tiers were scanned in order.
+
+B2B customers may have a contract ``PriceList``: one assigned to them
+directly, otherwise one assigned to their ``company_name``. A contract price
+takes precedence over tiers and retail at every quantity, so it is returned
+as a single tier covering all quantities and the lookups stay the same:
+contract > tier > retail.
+
+Compiled tiers are cached per product, contract prices per (price list,
+product), both for a day or until a tier or price list item is saved or
+deleted (see ``signals.py``), and each user's price list until their account
+or any price list changes. Cache misses are read from the primary database,
+so a lagging replica cannot put back prices a signal just invalidated.
+``load`` fetches prices for a whole cart or listing page at once: one
+``get_many`` each for tiers and contract prices and, for entries missing from
+the cache, one query each.
+"""
+
+import sys
+from bisect import bisect_right
+from collections import namedtuple
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef, Q
+
+from apps.core import fragments
+from apps.core.routers import use_primary
+from .models import PriceList, PriceListItem, PricingTier
+
+CACHE_KEY = "products:tiers:{}"
+CACHE_TIMEOUT = 86400
+CONTRACT_CACHE_KEY = "products:contract:{}:{}"
+USER_LIST_CACHE_KEY = "products:price_list:{}:{}"
+USER_LIST_CACHE_TIMEOUT = 86400
+
+# Cached for a product a price list does not cover, and for users without a list
+NO_CONTRACT = False
+NO_PRICE_LIST = 0
+
+Tiers = namedtuple("Tiers", "mins maxs prices")
+NO_TIERS = Tiers((), (), ())
+
+
+def compile_tiers(rows):
+    """``Tiers`` from ``(min_qty, max_qty, wholesale_price)`` rows."""
+    mins, maxs, prices = [], [], []
+    for min_qty, max_qty, price in sorted(rows, key=lambda row: row[0]):
+        if maxs and min_qty <= maxs[-1]:
+            # Overlap: the earlier tier keeps the shared quantities
+            min_qty = maxs[-1] + 1
+        if min_qty > max_qty:
+            continue
+        mins.append(min_qty)
+        maxs.append(max_qty)
+        prices.append(price)
+    return Tiers(tuple(mins), tuple(maxs), tuple(prices)) if mins else NO_TIERS
+
+
+def contract_tiers(price):
+    return Tiers((0,), (sys.maxsize,), (price,))
+
+
+def _user_list_key(user_id):
+    return USER_LIST_CACHE_KEY.format(fragments.generations(["price_lists"])["price_lists"], user_id)
+
+
+def price_list_for(user):
+    """Id of the contract price list for a B2B ``user``: their own, else their company's. None without one."""
+    if user is None or not user.is_authenticated or user.role != user.Roles.B2B:
+        return None
+    key = _user_list_key(user.pk)
+    price_list = cache.get(key)
+    if price_list is None:
+        direct = Exists(PriceList.users.through.objects.filter(pricelist_id=OuterRef("pk"), user_id=user.pk))
+        match = Q(direct=True)
+        if user.company_name:
+            match |= Q(company_name__iexact=user.company_name)
+        with use_primary():
+            price_list = (
+                PriceList.objects.filter(is_active=True).annotate(direct=direct).filter(match)
+                .order_by("-direct", "-updated_at").values_list("pk", flat=True).first()
+            ) or NO_PRICE_LIST
+        cache.set(key, price_list, USER_LIST_CACHE_TIMEOUT)
+    return price_list or None
+
+
+def forget_user(user_id):
+    cache.delete(_user_list_key(user_id))
+
+
+def contract_prices(price_list_id, product_ids):
+    """``{product_id: price}`` for the products ``price_list_id`` covers, from the cache or one query."""
+    keys = {CONTRACT_CACHE_KEY.format(price_list_id, pk): pk for pk in set(product_ids)}
+    found = {keys[key]: price for key, price in cache.get_many(list(keys)).items()}
+    missing = set(keys.values()) - set(found)
+    if missing:
+        fetched = dict.fromkeys(missing, NO_CONTRACT)
+        with use_primary():
+            fetched.update(PriceListItem.objects.filter(price_list_id=price_list_id, product_id__in=missing)
+                           .values_list("product_id", "price"))
+        cache.set_many({CONTRACT_CACHE_KEY.format(price_list_id, pk): price for pk, price in fetched.items()},
+                       CACHE_TIMEOUT)
+        found.update(fetched)
+    return {pk: price for pk, price in found.items() if price is not NO_CONTRACT}
+
+
+def load(product_ids, price_list_id=None):
+    """``{product_id: Tiers}`` for every id, with ``price_list_id``'s contract prices taking precedence."""
+    product_ids = set(product_ids)
+    keys = {CACHE_KEY.format(pk): pk for pk in product_ids}
+    found = {keys[key]: tiers for key, tiers in cache.get_many(list(keys)).items()}
+    missing = product_ids - set(found)
+    if missing:
+        rows = {pk: [] for pk in missing}
+        with use_primary():
+            for pk, *tier in PricingTier.objects.filter(product_id__in=missing).values_list(
+                "product_id", "min_qty", "max_qty", "wholesale_price"
+            ):
+                rows[pk].append(tier)
+        compiled = {pk: compile_tiers(tiers) for pk, tiers in rows.items()}
+        cache.set_many({CACHE_KEY.format(pk): tiers for pk, tiers in compiled.items()}, CACHE_TIMEOUT)
+        found.update(compiled)
+    if price_list_id:
+        for pk, price in contract_prices(price_list_id, product_ids).items():
+            found[pk] = contract_tiers(price)
+    return found
+
+
+def tiers_for(product, user=None):
+    return load([product.pk], price_list_for(user))[product.pk]
+
+
+def invalidate(product_id):
+    cache.delete(CACHE_KEY.format(product_id))
+
+
+def invalidate_contract(price_list_id, product_id):
+    cache.delete(CONTRACT_CACHE_KEY.format(price_list_id, product_id))
+
+
+def price_for_qty(tiers, qty, retail_price):
+    """Unit price for ``qty`` units: the tier's price, retail outside every tier."""
+    i = bisect_right(tiers.mins, qty) - 1
+    if i >= 0 and qty <= tiers.maxs[i]:
+        return tiers.prices[i]
+    return Decimal(retail_price)
+
+
+def covers_all(tiers):
+    """True when every quantity has a tier, so retail never applies (a contract price)."""
+    return (bool(tiers.mins) and tiers.mins[0] <= 1 and tiers.maxs[-1] == sys.maxsize
+            and all(low == high + 1 for low, high in zip(tiers.mins[1:], tiers.maxs)))
+
+
+def from_price(tiers, retail_price):
+    """The lowest unit price on offer, for "from $X" displays."""
+    if covers_all(tiers):
+        return min(tiers.prices)
+    return min(tiers.prices + (Decimal(retail_price),))
+
+
+def prices_for(lines, user=None):
+    """Unit prices for ``(product, qty)`` lines, with one ``load`` for all of them."""
+    lines = list(lines)
+    tiers = load((product.pk for product, _ in lines), price_list_for(user))
+    return [price_for_qty(tiers[product.pk], qty, product.retail_price) for product, qty in lines]
+
+
+def annotate_from_prices(products, user=None):
+    """Set ``from_price`` on each product (a listing page) with one ``load``."""
+    products = list(products)
+    tiers = load((product.pk for product in products), price_list_for(user))
+    for product in products:
+        product.from_price = from_price(tiers[product.pk], product.retail_price)
+    return products
@@ -1,8 +1,43 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
-from .models import Product
+
+from apps.core import fragments
+from . import pricing
+from .models import Category, PriceList, PriceListItem, PricingTier, Product
 
 @receiver(post_save, sender=Product)
 def product_updated(sender, instance: Product, **kwargs):
-    # Placeholder for search vector update logic if needed via triggers or background tasks
-    pass
+    # Weights and dimensions may have changed: re-pack cached shipping parcels
+    fragments.bump("products")
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, **kwargs):
+    fragments.bump("categories")
+
+
+@receiver(post_save, sender=PricingTier)
+@receiver(post_delete, sender=PricingTier)
+def pricing_tier_changed(sender, instance: PricingTier, **kwargs):
+    pricing.invalidate(instance.product_id)
+
+
+@receiver(post_save, sender=PriceListItem)
+@receiver(post_delete, sender=PriceListItem)
+def price_list_item_changed(sender, instance: PriceListItem, **kwargs):
+    pricing.invalidate_contract(instance.price_list_id, instance.product_id)
+
+
+@receiver(post_save, sender=PriceList)
+@receiver(post_delete, sender=PriceList)
+@receiver(m2m_changed, sender=PriceList.users.through)
+def price_list_changed(sender, **kwargs):
+    # Which list each user gets may have changed
+    fragments.bump("price_lists")
+
+
+@receiver(post_save, sender="accounts.User")
+def user_saved(sender, instance, **kwargs):
+    # Role or company may have changed
+    pricing.forget_user(instance.pk)
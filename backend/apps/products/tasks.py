@@ -3,4 +3,11 @@ from celery import shared_task
 @shared_task
 def sync_inventory():
     # Implement external inventory sync logic here
-    return "ok"
\ No newline at end of file
+    return "ok"
+
+@shared_task
+def refresh_trending():
+    """Recompute the trending products/searches snapshot served by the trending endpoint."""
+    from .trending import refresh_snapshot
+
+    return refresh_snapshot().id
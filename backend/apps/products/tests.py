@@ -3,12 +3,25 @@ Comprehensive test suite for Products app.
 Tests catalog management, search, variants, and pricing.
 """
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from django.urls import reverse
-from .models import Category, Product, ProductImage, ProductVariant, PricingTier, Review
+from datetime import timedelta
+from decimal import Decimal
+from django.core.cache import cache
+from django.utils import timezone
+from . import pricing
+from .models import (
+    Category, Product, ProductImage, ProductVariant, PricingTier, PriceList, PriceListItem, Review,
+)
+from .trending import build_payload, refresh_snapshot
+from .utils import get_b2b_price_for_qty
 from apps.accounts.models import User
+from apps.content.models import HelpSearchTerm
+from apps.core.routers import ReplicaPinningMiddleware
+from apps.orders.models import Address, Order, OrderLine
+from apps.wishlist.models import WishlistItem
 
 
 class CategoryTests(TestCase):
@@ -180,6 +193,134 @@ class PricingTierTests(TestCase):
         self.assertEqual(tier_2, 9.00)
 
 
+class TierIndexTests(APITestCase):
+    """Tests for the compiled quantity tier index (apps.products.pricing)."""
+
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name='Boxes', slug='boxes')
+        self.box = Product.objects.create(sku='BOX', name='Box', category=category, retail_price=Decimal('2.00'))
+        self.bag = Product.objects.create(sku='BAG', name='Bag', category=category, retail_price=Decimal('1.00'))
+        for min_qty, max_qty, price in ((100, 499, '1.50'), (500, 999, '1.25'), (1000, 9999, '1.00')):
+            PricingTier.objects.create(product=self.box, min_qty=min_qty, max_qty=max_qty,
+                                       wholesale_price=Decimal(price))
+
+    def test_price_for_qty(self):
+        """Quantities below, within, between and above tiers."""
+        tiers = pricing.tiers_for(self.box)
+        self.assertEqual(tiers.mins, (100, 500, 1000))
+        prices = [pricing.price_for_qty(tiers, qty, self.box.retail_price) for qty in (1, 100, 499, 500, 5000, 10000)]
+        self.assertEqual(prices, [Decimal('2.00'), Decimal('1.50'), Decimal('1.50'), Decimal('1.25'),
+                                  Decimal('1.00'), Decimal('2.00')])
+        self.assertEqual(get_b2b_price_for_qty(self.bag, 500), Decimal('1.00'))
+
+    def test_overlapping_tiers_keep_the_lower_tier(self):
+        tiers = pricing.compile_tiers([(50, 200, Decimal('3')), (1, 100, Decimal('4')), (60, 90, Decimal('2'))])
+        self.assertEqual(tiers, pricing.Tiers((1, 101), (100, 200), (Decimal('4'), Decimal('3'))))
+
+    def test_bulk_load_and_invalidation(self):
+        """A page of products loads in one query, then from the cache until a tier changes."""
+        products = [self.box, self.bag]
+        with self.assertNumQueries(1):
+            pricing.annotate_from_prices(products)
+        self.assertEqual([p.from_price for p in products], [Decimal('1.00'), Decimal('1.00')])
+        with self.assertNumQueries(0):
+            self.assertEqual(pricing.prices_for([(self.box, 600), (self.bag, 600)]), [Decimal('1.25'), Decimal('1.00')])
+
+        tier = self.box.pricing_tiers.get(min_qty=500)
+        tier.wholesale_price = Decimal('1.20')
+        tier.save()
+        self.assertEqual(get_b2b_price_for_qty(self.box, 600), Decimal('1.20'))
+        tier.delete()
+        self.assertEqual(get_b2b_price_for_qty(self.box, 600), Decimal('2.00'))
+
+    @override_settings(DB_REPLICA_ENABLED=True, DB_REPLICA_APPS=['products'])
+    def test_cache_misses_read_the_primary(self):
+        """Refills never read the replica (there is none here, so routing to it would fail)."""
+        # A fresh, unpinned request: setUp's writes pinned this thread to the primary
+        tiers = ReplicaPinningMiddleware(lambda request: pricing.tiers_for(self.box))(None)
+        self.assertEqual(tiers.prices, (Decimal('1.50'), Decimal('1.25'), Decimal('1.00')))
+
+    def test_basket_and_checkout_use_tiers(self):
+        """Basket lines are repriced at the tier their quantity reaches; checkout ignores client prices."""
+        basket = self.client.post('/api/cart/baskets/', {}, format='json').json()
+        url = f"/api/cart/baskets/{basket['id']}/add/"
+        self.client.post(url, {'product_id': self.box.pk, 'quantity': 60}, format='json')
+        lines = self.client.post(url, {'product_id': self.box.pk, 'quantity': 60}, format='json').json()['lines']
+        self.assertEqual((lines[0]['quantity'], lines[0]['unit_price']), (120, '1.50'))
+
+        payload = {'postal_code': 'M5V 3A8', 'items': [{'id': self.box.pk, 'price': 2, 'quantity': 500}]}
+        data = self.client.post('/api/checkout/calculate/', payload, format='json').json()
+        self.assertEqual((data['unit_prices'], data['subtotal']), ([1.25], 625.0))
+
+    def test_listing_shows_from_price(self):
+        data = self.client.get('/products/search/', {'sort': 'name-asc'}).json()
+        self.assertEqual([(p['sku'], p['from_price']) for p in data['products']], [('BAG', '1.00'), ('BOX', '1.00')])
+
+
+class PriceListTests(APITestCase):
+    """Tests for B2B contract price lists: contract > tier > retail."""
+
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name='Boxes', slug='boxes')
+        self.box = Product.objects.create(sku='BOX', name='Box', category=category, retail_price=Decimal('2.00'))
+        self.bag = Product.objects.create(sku='BAG', name='Bag', category=category, retail_price=Decimal('1.00'))
+        PricingTier.objects.create(product=self.box, min_qty=100, max_qty=9999, wholesale_price=Decimal('1.50'))
+        PricingTier.objects.create(product=self.bag, min_qty=100, max_qty=9999, wholesale_price=Decimal('0.80'))
+        self.buyer = User.objects.create_user(email='buyer@acme.test', password='x', role='B2B', company_name='Acme')
+        self.company_list = PriceList.objects.create(name='Acme', company_name='ACME')
+        PriceListItem.objects.create(price_list=self.company_list, product=self.box, price=Decimal('1.75'))
+
+    def test_precedence(self):
+        """The contract price applies at every quantity; uncovered products keep their tiers."""
+        lines = [(self.box, 1), (self.box, 500), (self.bag, 1), (self.bag, 500)]
+        self.assertEqual(pricing.prices_for(lines, self.buyer),
+                         [Decimal('1.75'), Decimal('1.75'), Decimal('1.00'), Decimal('0.80')])
+        self.assertEqual(pricing.prices_for(lines), [Decimal('2.00'), Decimal('1.50'), Decimal('1.00'), Decimal('0.80')])
+
+        retail_buyer = User.objects.create_user(email='shopper@acme.test', password='x', company_name='Acme')
+        self.assertIsNone(pricing.price_list_for(retail_buyer))
+
+    def test_user_list_beats_company_list(self):
+        own = PriceList.objects.create(name='Buyer')
+        own.users.add(self.buyer)
+        PriceListItem.objects.create(price_list=own, product=self.box, price=Decimal('1.60'))
+        self.assertEqual(get_b2b_price_for_qty(self.box, 1, self.buyer), Decimal('1.60'))
+        own.is_active = False
+        own.save()
+        self.assertEqual(get_b2b_price_for_qty(self.box, 1, self.buyer), Decimal('1.75'))
+
+    def test_cached_per_list_and_product(self):
+        """A warm page costs no queries; editing a contract price or the account is picked up."""
+        products = [self.box, self.bag]
+        with self.assertNumQueries(3):  # price list, tiers, contract prices
+            pricing.annotate_from_prices(products, self.buyer)
+        with self.assertNumQueries(0):
+            pricing.annotate_from_prices(products, self.buyer)
+        self.assertEqual([p.from_price for p in products], [Decimal('1.75'), Decimal('0.80')])
+
+        item = self.company_list.items.get()
+        item.price = Decimal('1.70')
+        item.save()
+        self.assertEqual(get_b2b_price_for_qty(self.box, 1, self.buyer), Decimal('1.70'))
+        self.buyer.company_name = 'Other'
+        self.buyer.save()
+        self.assertEqual(get_b2b_price_for_qty(self.box, 1, self.buyer), Decimal('2.00'))
+
+    @override_settings(DB_REPLICA_ENABLED=True, DB_REPLICA_APPS=['products', 'accounts'])
+    def test_cache_misses_read_the_primary(self):
+        """The price list and contract price refills never read the replica (there is none here)."""
+        prices = ReplicaPinningMiddleware(lambda request: pricing.prices_for([(self.box, 1)], self.buyer))(None)
+        self.assertEqual(prices, [Decimal('1.75')])
+
+    def test_checkout_uses_contract_prices(self):
+        self.client.force_login(self.buyer)
+        payload = {'postal_code': 'M5V 3A8', 'items': [{'id': self.box.pk, 'price': 2, 'quantity': 10}]}
+        data = self.client.post('/api/checkout/calculate/', payload, format='json').json()
+        self.assertEqual((data['unit_prices'], data['subtotal']), ([1.75], 17.5))
+
+
 class ProductSearchTests(APITestCase):
     """Tests for product search functionality."""
     
@@ -294,3 +435,85 @@ class ReviewTests(TestCase):
         
         avg = self.product.get_average_rating()
         self.assertEqual(avg, 4.5)
+
+
+class TrendingTests(APITestCase):
+    """Test trending products and search terms snapshots."""
+    
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.category = Category.objects.create(name='Boxes', slug='boxes')
+        self.products = [
+            Product.objects.create(sku=f'BOX-{i}', name=f'Box {i}', category=self.category,
+                                   retail_price=Decimal('5.00'), stock_qty=100)
+            for i in range(3)
+        ]
+        self.user = User.objects.create_user(email='buyer@example.com', password='testpass123')
+    
+    def _order(self, product, quantity, days_ago=0):
+        address = Address.objects.create(
+            first_name='Jo', last_name='Doe', address1='1 Main St', city='Toronto',
+            province='ON', postal_code='M5V 3A8'
+        )
+        order = Order.objects.create(
+            order_number=f'PKX-{Order.objects.count()}', customer=self.user,
+            shipping_address=address, billing_address=address
+        )
+        OrderLine.objects.create(order=order, product=product, quantity=quantity)
+        when = timezone.now() - timedelta(days=days_ago)
+        Order.objects.filter(pk=order.pk).update(created_at=when)
+    
+    def test_recent_activity_outranks_older_volume(self):
+        """Sales decay with age and wishlist adds count towards popularity."""
+        self._order(self.products[0], 10, days_ago=21)  # 10 units at 1/8 weight
+        self._order(self.products[1], 3)
+        WishlistItem.objects.create(user=self.user, product=self.products[2])
+        HelpSearchTerm.objects.create(date=timezone.localdate(), term='kraft bags', searches=4)
+        HelpSearchTerm.objects.create(date=timezone.localdate(), term='pallets', searches=9, zero_result_searches=9)
+        
+        payload = build_payload()
+        ranked = [p['id'] for p in payload['popular_products']]
+        self.assertEqual(ranked, [self.products[1].id, self.products[2].id, self.products[0].id])
+        self.assertEqual(payload['trending'], [{'term': 'kraft bags', 'searches': 4}])
+    
+    def test_endpoint_is_a_single_cache_read(self):
+        """Once a snapshot is published the endpoint does not query the database."""
+        refresh_snapshot()
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/products/trending/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()['popular_products']), 3)
+        
+        # A cold cache falls back to the stored snapshot
+        cache.clear()
+        with self.assertNumQueries(1):
+            self.client.get('/api/products/trending/')
+
+
+class AutocompleteTests(APITestCase):
+    """Test the async autocomplete endpoint."""
+    
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name='Kraft Bags', slug='kraft-bags')
+        for i in range(3):
+            product = Product.objects.create(sku=f'BAG-{i}', name=f'Kraft bag {i}', category=category,
+                                             retail_price=Decimal('2.00'), stock_qty=i)
+            ProductImage.objects.create(product=product, image=f'product_images/bag-{i}-b.jpg', position=1)
+            ProductImage.objects.create(product=product, image=f'product_images/bag-{i}-a.jpg', position=0)
+    
+    def test_results_and_query_count(self):
+        """Count, products with their first image, and categories in a fixed number of queries."""
+        with self.assertNumQueries(4):  # count, products, first images, categories
+            response = self.client.get('/api/products/autocomplete/', {'q': 'kraft', 'max': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(data['total_count'], 3)
+        self.assertEqual(len(data['products']), 2)
+        self.assertTrue(data['products'][0]['image_url'].endswith('-a.jpg'))
+        self.assertEqual(data['categories'][0]['product_count'], 3)
+    
+    def test_short_query_and_method(self):
+        self.assertEqual(self.client.get('/api/products/autocomplete/', {'q': 'k'}).json()['total_count'], 0)
+        self.assertEqual(self.client.post('/api/products/autocomplete/').status_code, 405)
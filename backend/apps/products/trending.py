@@ -0,0 +1,156 @@
+"""
+Trending products and search terms.
+
+``refresh_snapshot`` scores products by units ordered and wishlist adds, and
+search terms by logged help center searches, over the last ``WINDOW_DAYS``.
+Each day's activity is weighted by ``0.5 ** (age / HALF_LIFE_DAYS)``. Daily
+totals are grouped in SQL and the decay is applied in Python, so the job costs
+a handful of grouped queries however much activity there is. The ranked
+result is stored as a ``TrendingSnapshot`` whose payload is exactly what the
+trending endpoint returns, and is cached so a request is a single cache read.
+"""
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db.models import Count, F, Prefetch, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Product, ProductImage, TrendingSnapshot
+
+CACHE_KEY = "products:trending"
+WINDOW_DAYS = 30
+HALF_LIFE_DAYS = 7
+# A wishlist add signals about as much interest as two units ordered
+WISHLIST_WEIGHT = 2.0
+PRODUCT_LIMIT = 8
+TERM_LIMIT = 5
+SNAPSHOTS_KEPT = 24
+
+
+def _decay(day, today):
+    return 0.5 ** ((today - day).days / HALF_LIFE_DAYS)
+
+
+def _window_start(today):
+    tz = timezone.get_current_timezone()
+    return timezone.make_aware(datetime.combine(today - timedelta(days=WINDOW_DAYS - 1), datetime.min.time()), tz)
+
+
+def product_scores(today):
+    """Decayed popularity per product id over the window."""
+    from apps.orders.models import Order, OrderLine
+    from apps.wishlist.models import WishlistItem
+
+    since = _window_start(today)
+    scores = defaultdict(float)
+    sales = (
+        OrderLine.objects.filter(order__created_at__gte=since)
+        .exclude(order__status=Order.Status.CANCELLED)
+        .annotate(day=TruncDate("order__created_at"))
+        .values("product_id", "day")
+        .annotate(units=Sum("quantity"))
+        .order_by()
+    )
+    for row in sales:
+        scores[row["product_id"]] += row["units"] * _decay(row["day"], today)
+    adds = (
+        WishlistItem.objects.filter(created_at__gte=since)
+        .annotate(day=TruncDate("created_at"))
+        .values("product_id", "day")
+        .annotate(adds=Count("id"))
+        .order_by()
+    )
+    for row in adds:
+        scores[row["product_id"]] += WISHLIST_WEIGHT * row["adds"] * _decay(row["day"], today)
+    return scores
+
+
+def term_scores(today):
+    """Decayed search popularity and raw search counts per term over the window."""
+    from apps.content.models import HelpSearchTerm
+
+    scores, searches = defaultdict(float), defaultdict(int)
+    # Terms that never return anything are not worth suggesting
+    rows = HelpSearchTerm.objects.filter(
+        date__gt=today - timedelta(days=WINDOW_DAYS), searches__gt=F("zero_result_searches")
+    ).values_list("term", "date", "searches")
+    for term, day, count in rows:
+        scores[term] += count * _decay(day, today)
+        searches[term] += count
+    return scores, searches
+
+
+def _product_payload(product):
+    images = product.primary_images
+    return {
+        "id": product.id,
+        "name": product.name,
+        "url": f"/products/{product.id}/",
+        "price": str(product.retail_price),
+        "category": product.category.name if product.category else None,
+        "image_url": images[0].image.url if images else None,
+    }
+
+
+def build_payload(today=None):
+    """Rank products and terms and return the trending endpoint's response body."""
+    today = today or timezone.localdate()
+    scores = product_scores(today)
+    products = (
+        Product.objects.filter(is_active=True, stock_qty__gt=0)
+        .select_related("category")
+        .prefetch_related(Prefetch("images", queryset=ProductImage.objects.all()[:1], to_attr="primary_images"))
+    )
+    # Over-fetch candidates so inactive or out-of-stock products can be skipped
+    candidates = sorted(scores, key=lambda product_id: (-scores[product_id], product_id))[:PRODUCT_LIMIT * 5]
+    ranked = sorted(
+        products.filter(id__in=candidates),
+        key=lambda product: (-scores[product.id], product.id),
+    )[:PRODUCT_LIMIT]
+    if len(ranked) < PRODUCT_LIMIT:
+        # Not enough activity yet: fill with the newest in-stock products
+        ranked += list(products.exclude(id__in=[p.id for p in ranked]).order_by("-created_at")[:PRODUCT_LIMIT - len(ranked)])
+
+    term_score, term_searches = term_scores(today)
+    terms = sorted(term_score, key=lambda term: (-term_score[term], term))[:TERM_LIMIT]
+    return {
+        "trending": [{"term": term, "searches": term_searches[term]} for term in terms],
+        "popular_products": [_product_payload(product) for product in ranked],
+    }
+
+
+def refresh_snapshot():
+    """Compute a new snapshot, store it and publish it to the cache."""
+    snapshot = TrendingSnapshot.objects.create(payload=build_payload())
+    stale = TrendingSnapshot.objects.order_by("-created_at").values_list("id", flat=True)[SNAPSHOTS_KEPT:]
+    TrendingSnapshot.objects.filter(id__in=list(stale)).delete()
+    cache.set(CACHE_KEY, snapshot.payload, None)
+    return snapshot
+
+
+def get_payload():
+    """The current trending payload: the cache, else the latest snapshot, else a fresh one."""
+    payload = cache.get(CACHE_KEY)
+    if payload is None:
+        snapshot = TrendingSnapshot.objects.order_by("-created_at").first()
+        if snapshot is None:
+            snapshot = refresh_snapshot()
+        payload = snapshot.payload
+        cache.set(CACHE_KEY, payload, None)
+    return payload
+
+
+async def aget_payload():
+    """Async ``get_payload`` for the async trending view."""
+    payload = await cache.aget(CACHE_KEY)
+    if payload is None:
+        snapshot = await TrendingSnapshot.objects.order_by("-created_at").afirst()
+        if snapshot is None:
+            snapshot = await sync_to_async(refresh_snapshot)()
+        payload = snapshot.payload
+        await cache.aset(CACHE_KEY, payload, None)
+    return payload
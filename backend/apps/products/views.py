@@ -1,10 +1,15 @@
+import asyncio
+
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from django.db.models import Q, Count
+from django.db.models import Q, Count, Prefetch
+from django.http import JsonResponse
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import Product, Category, Review
+from apps.core.async_api import async_api
+from .models import Product, Category, ProductImage, Review
+from . import trending
 from .serializers import ProductSerializer, CategorySerializer, ReviewSerializer
 
 class ProductViewSet(viewsets.ReadOnlyModelViewSet):
@@ -23,17 +28,22 @@ class ReviewViewSet(viewsets.ModelViewSet):
     queryset = Review.objects.all()
     serializer_class = ReviewSerializer
 
-@api_view(['GET'])
-def autocomplete_search(request):
+async def _all(queryset):
+    return [obj async for obj in queryset]
+
+
+@async_api('GET')
+async def autocomplete_search(request):
     """
     AI-Powered Autocomplete Search API
-    Returns products, categories, and intelligent suggestions
+    Returns products, categories, and intelligent suggestions.
+    The product count, product page and category matches are fetched concurrently.
     """
     query = request.GET.get('q', '').strip()
     max_results = int(request.GET.get('max', 8))
     
     if not query or len(query) < 2:
-        return Response({
+        return JsonResponse({
             'products': [],
             'categories': [],
             'suggestions': [],
@@ -47,18 +57,26 @@ def autocomplete_search(request):
         Q(sku__icontains=query) |
         Q(category__name__icontains=query),
         is_active=True
-    ).select_related('category').prefetch_related('images')
+    ).select_related('category').prefetch_related(
+        Prefetch('images', queryset=ProductImage.objects.all()[:1], to_attr='first_images')
+    )
     
-    # Count total for "View all" link
-    total_count = products_query.count()
+    # Search categories
+    categories_query = Category.objects.filter(
+        Q(name__icontains=query) | Q(description__icontains=query)
+    ).annotate(num_products=Count('products'))[:5]
     
-    # Limit products
-    products = products_query[:max_results]
+    # Count total for "View all" link
+    total_count, products, categories = await asyncio.gather(
+        products_query.acount(),
+        _all(products_query[:max_results]),
+        _all(categories_query),
+    )
     
     # Serialize products
     products_data = []
     for product in products:
-        first_image = product.images.first()
+        first_image = product.first_images[0] if product.first_images else None
         products_data.append({
             'id': product.id,
             'name': product.name,
@@ -71,19 +89,14 @@ def autocomplete_search(request):
             'sku': product.sku
         })
     
-    # Search categories
-    categories_query = Category.objects.filter(
-        Q(name__icontains=query) | Q(description__icontains=query)
-    ).annotate(product_count=Count('products'))[:5]
-    
     categories_data = []
-    for category in categories_query:
+    for category in categories:
         categories_data.append({
             'id': category.id,
             'name': category.name,
             'slug': category.slug,
             'url': f'/products/?category={category.slug}',
-            'product_count': category.product_count
+            'product_count': category.num_products
         })
     
     # Generate AI-powered suggestions (simple keyword suggestions)
@@ -138,7 +151,7 @@ def autocomplete_search(request):
                 'reason': 'Personalized option'
             })
     
-    return Response({
+    return JsonResponse({
         'products': products_data,
         'categories': categories_data,
         'suggestions': suggestions_data[:4],
@@ -146,43 +159,14 @@ def autocomplete_search(request):
     })
 
 
-@api_view(['GET'])
-def trending_products(request):
+@async_api('GET')
+async def trending_products(request):
     """
     Returns trending/popular products and search terms.
     Used by AI Search to show popular items when search box is focused.
+    The payload is precomputed by the refresh_trending task (see apps.products.trending).
     """
-    # Get popular products (could be based on views, orders, or manual curation)
-    popular_products = Product.objects.filter(
-        is_active=True,
-        stock_qty__gt=0
-    ).select_related('category').prefetch_related('images').order_by('-created_at')[:8]
-    
-    products_data = []
-    for product in popular_products:
-        first_image = product.images.first()
-        products_data.append({
-            'id': product.id,
-            'name': product.name,
-            'url': f'/products/{product.id}/',
-            'price': str(product.retail_price),
-            'category': product.category.name if product.category else None,
-            'image_url': first_image.image.url if first_image else None,
-        })
-    
-    # Trending search terms (could be from analytics in future)
-    trending_terms = [
-        {'term': 'paper bags', 'searches': 1250},
-        {'term': 'kraft bags', 'searches': 980},
-        {'term': 'custom boxes', 'searches': 870},
-        {'term': 'eco packaging', 'searches': 750},
-        {'term': 'shopping bags', 'searches': 650},
-    ]
-    
-    return Response({
-        'trending': trending_terms,
-        'popular_products': products_data,
-    })
+    return JsonResponse(await trending.aget_payload())
 
 
 @api_view(['GET'])
@@ -0,0 +1,170 @@
+"""
+Business-day delivery calendar.
+
+Orders ship from the Toronto warehouse, so a day is a business day for a
+destination province when it is a weekday and neither a statutory holiday in
+``SHIPPING_ORIGIN_PROVINCE`` nor in the destination. ``DeliveryCalendar``
+precomputes that for ``DELIVERY_CALENDAR_YEARS`` years as two arrays:
+
+* ``rank[i]``: business days before day ``i`` (days counted from Jan 1 of the
+  first year), and
+* ``business[k]``: the day index of the ``k``-th business day,
+
+so "the date ``k`` business days after ``d``" is ``business[rank[d] + k]``,
+two list lookups. Calendars are built once per (province, first year) and
+kept for the life of the process.
+
+An order placed on a business day before the method's ``cutoff_time``
+(Toronto time) ships that day, otherwise on the next business day; it is
+delivered between ``min_processing_days`` and ``max_processing_days``
+business days after shipping.
+"""
+
+from datetime import date, timedelta
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.utils import timezone
+
+WAREHOUSE_TZ = ZoneInfo("America/Toronto")
+
+PROVINCES = ("AB", "BC", "MB", "NB", "NL", "NS", "NT", "NU", "ON", "PE", "QC", "SK", "YT")
+ALL = frozenset(PROVINCES)
+
+
+def _nth_weekday(year, month, weekday, n):
+    """The ``n``-th ``weekday`` (Monday = 0) of the month."""
+    first = date(year, month, 1)
+    return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+
+
+def _victoria_day(year):
+    # The Monday before May 25
+    may_25 = date(year, 5, 25)
+    return may_25 - timedelta(days=may_25.weekday() or 7)
+
+
+def _easter(year):
+    """Western Easter Sunday (anonymous Gregorian algorithm)."""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = divmod(b, 4)
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 19 * l) // 433
+    month, day = divmod(h + l - 7 * m + 90, 25)
+    return date(year, month, (h + l - 7 * m + 33 * month + 19) % 32)
+
+
+# (rule, provinces, moves to the next weekday when it falls on a weekend)
+HOLIDAYS = (
+    (lambda y: date(y, 1, 1), ALL, True),                                   # New Year's Day
+    (lambda y: _nth_weekday(y, 2, 0, 3),
+     frozenset({"AB", "BC", "MB", "NB", "NS", "ON", "PE", "SK"}), False),   # Family / Louis Riel / Islander / Heritage Day
+    (lambda y: _easter(y) - timedelta(days=2), ALL, False),                 # Good Friday
+    (_victoria_day, ALL - {"NB", "NL", "NS", "PE"}, False),                 # Victoria Day / National Patriots' Day
+    (lambda y: date(y, 6, 24), frozenset({"QC"}), True),                    # Fête nationale
+    (lambda y: date(y, 7, 1), ALL, True),                                   # Canada Day
+    (lambda y: _nth_weekday(y, 8, 0, 1),
+     frozenset({"BC", "NB", "NT", "NU", "SK"}), False),                     # Civic holiday
+    (lambda y: _nth_weekday(y, 8, 0, 3), frozenset({"YT"}), False),         # Discovery Day
+    (lambda y: _nth_weekday(y, 9, 0, 1), ALL, False),                       # Labour Day
+    (lambda y: date(y, 9, 30),
+     frozenset({"BC", "MB", "NT", "NU", "PE", "YT"}), True),                # Truth and Reconciliation
+    (lambda y: _nth_weekday(y, 10, 0, 2), ALL - {"NB", "NL", "NS", "PE"}, False),  # Thanksgiving
+    (lambda y: date(y, 11, 11), ALL - {"MB", "NS", "ON", "QC"}, True),      # Remembrance Day
+    (lambda y: date(y, 12, 25), ALL, True),                                 # Christmas Day
+    (lambda y: date(y, 12, 26), frozenset({"ON"}), True),                   # Boxing Day
+)
+
+
+def holidays(year, province):
+    """Statutory holidays observed in ``province`` in ``year``."""
+    observed = set()
+    for rule, provinces, moves in HOLIDAYS:
+        if province not in provinces:
+            continue
+        day = rule(year)
+        # A weekend holiday is observed on the next weekday that is not already a holiday
+        while moves and (day.weekday() >= 5 or day in observed):
+            day += timedelta(days=1)
+        observed.add(day)
+    return observed
+
+
+class DeliveryCalendar:
+    """Business days for shipments from the origin province to ``province``."""
+
+    def __init__(self, province, first_year, years):
+        self.province = province
+        self.start = date(first_year, 1, 1)
+        self.end = date(first_year + years, 1, 1)
+        closed = set()
+        for year in range(first_year, first_year + years):
+            closed |= holidays(year, settings.SHIPPING_ORIGIN_PROVINCE) | holidays(year, province)
+
+        self.rank = []
+        self.business = []
+        day = self.start
+        while day < self.end:
+            self.rank.append(len(self.business))
+            if day.weekday() < 5 and day not in closed:
+                self.business.append(len(self.rank) - 1)
+            day += timedelta(days=1)
+
+    def index(self, day):
+        return (day - self.start).days
+
+    def is_business_day(self, day):
+        i = self.index(day)
+        return self.rank[i] < len(self.business) and self.business[self.rank[i]] == i
+
+    def add_business_days(self, day, days):
+        """The business day ``days`` business days after ``day`` (0: ``day`` itself, or the next business day)."""
+        return self.start + timedelta(days=self.business[self.rank[self.index(day)] + days])
+
+    def ship_date(self, now, cutoff=None):
+        """Ships today on a business day before ``cutoff``, otherwise on the next business day."""
+        today = now.date()
+        if not self.is_business_day(today):
+            return self.add_business_days(today, 0)
+        if cutoff is not None and now.time() < cutoff:
+            return today
+        return self.add_business_days(today, 1)
+
+    def window(self, method, now):
+        """(earliest, latest) delivery date for a ``ShippingMethod`` ordered at ``now``."""
+        shipped = self.ship_date(now, method.cutoff_time)
+        return (self.add_business_days(shipped, method.min_processing_days),
+                self.add_business_days(shipped, method.max_processing_days))
+
+
+@lru_cache(maxsize=None)
+def _calendar(province, first_year):
+    return DeliveryCalendar(province, first_year, max(2, settings.DELIVERY_CALENDAR_YEARS))
+
+
+def get_calendar(province=None, now=None):
+    """The calendar covering ``now`` (Toronto time) for deliveries to ``province``."""
+    now = now or local_now()
+    province = province if province in ALL else settings.SHIPPING_ORIGIN_PROVINCE
+    # Tables start on Jan 1 of the current year, so at least a year is always left to count into
+    return _calendar(province, now.year)
+
+
+def local_now():
+    return timezone.localtime(timezone.now(), WAREHOUSE_TZ)
+
+
+def delivery_windows(methods, province=None, now=None):
+    """``{method.pk: (earliest, latest)}`` for every method, from one calendar."""
+    now = now or local_now()
+    calendar = get_calendar(province, now)
+    return {method.pk: calendar.window(method, now) for method in methods}
+
+
+def delivery_window(method, province=None, now=None):
+    now = now or local_now()
+    return get_calendar(province, now).window(method, now)
@@ -0,0 +1,54 @@
+"""
+A local stand-in for a carrier rate API, for exercising ``rates.py``.
+
+It speaks the protocol ``rates.fetch_quote`` uses (POST JSON ``service``,
+``weight_kg``, ``postal_code``; reply ``{"rate": "..."}``) and sleeps
+``latency`` plus up to ``jitter`` seconds per request, failing a
+``failure_rate`` fraction of them with a 503, so timeouts and the table-rate
+fallback can be tested against a realistic latency envelope. Point a carrier
+at it with e.g. ``UPS_RATE_URL=http://127.0.0.1:8765/``.
+"""
+
+import json
+import random
+import time
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeCarrierHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        server = self.server
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        time.sleep(server.latency + random.uniform(0, server.jitter))
+        if random.random() < server.failure_rate:
+            self._reply(503, {"error": "carrier unavailable"})
+            return
+        rate = server.base_rate + server.per_kg_rate * Decimal(str(payload.get("weight_kg", 0)))
+        self._reply(200, {"rate": str(rate.quantize(Decimal("0.01")))})
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def make_server(host="127.0.0.1", port=0, latency=0.2, jitter=0.0, failure_rate=0.0,
+                base_rate="10.00", per_kg_rate="2.00", verbose=False):
+    """Create (but do not start) a fake carrier; ``port=0`` picks a free port."""
+    server = ThreadingHTTPServer((host, port), FakeCarrierHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.jitter = jitter
+    server.failure_rate = failure_rate
+    server.base_rate = Decimal(base_rate)
+    server.per_kg_rate = Decimal(per_kg_rate)
+    server.verbose = verbose
+    return server
@@ -0,0 +1,34 @@
+"""
+Management command to run a local fake carrier rate API
+Run with: python manage.py fake_carrier_server [--port 8765] [--latency 0.2] [--jitter 0.3] [--failure-rate 0.05]
+"""
+from django.core.management.base import BaseCommand
+
+from apps.shipping.fake_carrier import make_server
+
+
+class Command(BaseCommand):
+    help = 'Serves fake carrier rate quotes with configurable latency and failures'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--latency', type=float, default=0.2, help='Seconds added to every quote')
+        parser.add_argument('--jitter', type=float, default=0.0, help='Up to this many extra random seconds')
+        parser.add_argument('--failure-rate', type=float, default=0.0, help='Fraction of quotes answered with 503')
+        parser.add_argument('--base-rate', default='10.00')
+        parser.add_argument('--per-kg-rate', default='2.00')
+
+    def handle(self, *args, **options):
+        server = make_server(
+            options['host'], options['port'], options['latency'], options['jitter'], options['failure_rate'],
+            options['base_rate'], options['per_kg_rate'], verbose=options['verbosity'] > 1,
+        )
+        host, port = server.server_address[:2]
+        self.stdout.write(self.style.SUCCESS(f'Fake carrier listening on http://{host}:{port}/'))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,203 @@
+"""
+Parcel packing and dimensional weight for a cart.
+
+``pack_items`` turns checkout cart lines into the parcels a carrier would
+actually bill:
+
+* Every unit is sized from ``Product.length_cm/width_cm/height_cm`` and
+  ``weight_kg``. A line whose product is unknown, or has no dimensions, only
+  contributes its weight (the client-supplied ``weight`` as a last resort).
+* Units are packed first-fit-decreasing by volume (over the most recent
+  ``OPEN_PARCELS`` parcels) into ``SHIPPING_CARTONS``,
+  using ``SHIPPING_CARTON_FILL`` of each carton's volume and at most its
+  ``max_kg``. A line is placed as a whole: how many of its units go into each
+  parcel is worked out arithmetically, so a 500-unit line costs the same as a
+  1-unit one. Units too large for any carton ship as their own parcel.
+* Each parcel then gets the smallest carton that holds it, and is billed at
+  the greater of its actual and dimensional weight
+  (``length * width * height / SHIPPING_DIM_DIVISOR``).
+
+Results are cached per cart content hash (the lines' product ids, quantities
+and fallback weights) for ``SHIPPING_PACKING_TTL`` seconds, so repeated
+checkout calculations do not re-pack. Saving a product bumps the ``products``
+generation (see ``apps.core.fragments``), which changes every hash.
+"""
+
+import hashlib
+import math
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from apps.core import fragments
+from apps.core.routers import use_primary
+from apps.products.models import Product
+
+CACHE_PREFIX = "shipping:parcels"
+
+# Partially filled parcels first-fit tries before opening a new one
+OPEN_PARCELS = 16
+
+Carton = namedtuple("Carton", "name length width height max_kg")
+Parcel = namedtuple("Parcel", "carton length width height weight_kg dim_weight_kg billable_weight_kg")
+
+# One column per cart line: sorted (l, w, h) dims, unit volume, unit weight, quantity
+_Line = namedtuple("_Line", "dims volume weight quantity")
+
+
+def cartons():
+    """``SHIPPING_CARTONS`` as ``Carton`` tuples, smallest first."""
+    return sorted((Carton(*row) for row in settings.SHIPPING_CARTONS),
+                  key=lambda c: c.length * c.width * c.height)
+
+
+def _fits(dims, carton):
+    return all(d <= c for d, c in zip(dims, sorted((carton.length, carton.width, carton.height), reverse=True)))
+
+
+def dim_weight(length, width, height):
+    return length * width * height / settings.SHIPPING_DIM_DIVISOR
+
+
+def _parcel(carton, length, width, height, weight):
+    dim = dim_weight(length, width, height)
+    return Parcel(carton, round(length, 2), round(width, 2), round(height, 2),
+                  round(weight, 3), round(dim, 3), round(max(weight, dim), 3))
+
+
+def cart_lines(items):
+    """Normalize checkout ``items`` to sorted ``(product_id, quantity, fallback_weight)`` tuples."""
+    lines = []
+    for item in items:
+        quantity = int(item.get("quantity", 1))
+        if quantity <= 0:
+            continue
+        product_id = item.get("product_id") or item.get("productId") or item.get("id")
+        try:
+            product_id = int(product_id) if product_id is not None else None
+        except (TypeError, ValueError):
+            product_id = None
+        lines.append((product_id, quantity, float(item.get("weight", 0) or 0)))
+    return sorted(lines, key=lambda line: (line[0] or 0, line[1], line[2]))
+
+
+def cache_key(lines):
+    generation = fragments.generations(["products"])["products"]
+    digest = hashlib.md5(repr((generation, lines)).encode(), usedforsecurity=False).hexdigest()
+    return f"{CACHE_PREFIX}:{digest}"
+
+
+def pack(lines):
+    """Pack ``_Line`` columns into a list of ``Parcel``."""
+    boxes = cartons()
+    largest = boxes[-1]
+    capacity = largest.length * largest.width * largest.height * settings.SHIPPING_CARTON_FILL
+    max_kg = largest.max_kg
+
+    parcels = []
+    packable = []
+    loose_weight = 0.0
+    for line in lines:
+        if not line.volume:
+            loose_weight += line.weight * line.quantity
+        elif _fits(line.dims, largest):
+            packable.append(line)
+        else:
+            parcels.extend([_parcel(None, *line.dims, line.weight)] * line.quantity)
+
+    # Parcels as [free volume, free weight, contents volume, contents weight, largest unit dims].
+    # A parcel is closed once even the smallest unit no longer fits, and only the
+    # OPEN_PARCELS most recently opened are tried, which keeps big carts linear.
+    packable.sort(key=lambda line: line.volume, reverse=True)
+    min_volume = packable[-1].volume if packable else 0
+    min_weight = min((line.weight for line in packable), default=0)
+    open_parcels, full_parcels = [], []
+    for line in packable:
+        remaining = line.quantity
+        for box in open_parcels:
+            n = min(remaining, int(box[0] // line.volume),
+                    int(box[1] // line.weight) if line.weight else remaining)
+            if n > 0:
+                box[0] -= n * line.volume
+                box[1] -= n * line.weight
+                box[2] += n * line.volume
+                box[3] += n * line.weight
+                box[4] = tuple(map(max, box[4], line.dims))
+                remaining -= n
+                if not remaining:
+                    break
+        if remaining:
+            per_box = max(1, min(int(capacity // line.volume),
+                                 int(max_kg // line.weight) if line.weight else remaining))
+            full, rest = divmod(remaining, per_box)
+            for count in [per_box] * full + ([rest] if rest else []):
+                volume, weight = count * line.volume, count * line.weight
+                open_parcels.append([capacity - volume, max_kg - weight, volume, weight, line.dims])
+        still_open = []
+        for box in open_parcels[-OPEN_PARCELS:]:
+            (still_open if box[0] >= min_volume and box[1] >= min_weight else full_parcels).append(box)
+        full_parcels.extend(open_parcels[:-OPEN_PARCELS])
+        open_parcels = still_open
+
+    for _, _, volume, weight, dims in full_parcels + open_parcels:
+        carton = next(
+            (c for c in boxes
+             if _fits(dims, c) and volume <= c.length * c.width * c.height * settings.SHIPPING_CARTON_FILL),
+            largest,
+        )
+        parcels.append(_parcel(carton.name, carton.length, carton.width, carton.height, weight))
+
+    # Weight without dimensions rides in the packed parcels, or goes in a parcel of its own
+    while loose_weight >= 0.001:
+        for index, parcel in enumerate(parcels):
+            room = max_kg - parcel.weight_kg
+            if parcel.carton and room > 0:
+                added = min(room, loose_weight)
+                parcels[index] = _parcel(parcel.carton, parcel.length, parcel.width, parcel.height,
+                                         parcel.weight_kg + added)
+                loose_weight -= added
+                if loose_weight < 0.001:
+                    break
+        else:
+            weight = min(loose_weight, max_kg) if parcels else loose_weight
+            parcels.append(Parcel(None, 0, 0, 0, round(weight, 3), 0, round(weight, 3)))
+            loose_weight -= weight
+    return parcels
+
+
+def build_lines(lines, products):
+    """Join normalized cart lines with ``{pk: (weight_kg, length_cm, width_cm, height_cm)}``."""
+    columns = []
+    for product_id, quantity, fallback_weight in lines:
+        weight, *dims = products.get(product_id, (0, 0, 0, 0))
+        dims = sorted((float(d) for d in dims), reverse=True)
+        volume = math.prod(dims) if all(dims) else 0
+        columns.append(_Line(tuple(dims), volume, float(weight) or fallback_weight, quantity))
+    return columns
+
+
+def pack_items(items):
+    """Parcels for checkout cart ``items``, cached per cart content."""
+    lines = cart_lines(items)
+    if not lines:
+        return []
+    key = cache_key(lines)
+    parcels = cache.get(key)
+    if parcels is not None:
+        return parcels
+
+    ids = {product_id for product_id, _, _ in lines if product_id is not None}
+    products = {}
+    if ids:
+        with use_primary():
+            rows = Product.objects.filter(pk__in=ids).values_list("pk", "weight_kg", "length_cm", "width_cm", "height_cm")
+            products = {pk: dims for pk, *dims in rows}
+    parcels = pack(build_lines(lines, products))
+    cache.set(key, parcels, settings.SHIPPING_PACKING_TTL)
+    return parcels
+
+
+def total_weight(parcels):
+    """Billable weight of a shipment."""
+    return round(sum(parcel.billable_weight_kg for parcel in parcels), 3)
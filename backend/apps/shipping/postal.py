@@ -0,0 +1,92 @@
+"""
+Canadian postal code lookup by FSA (forward sortation area, the first three
+characters).
+
+``data/fsa.csv`` maps each FSA to its province, shipping zone (1 = around
+the Toronto warehouse, 5 = the territories) and area (``urban``, ``rural`` or
+``remote``). Rows are either two-character districts (``M5``), covering every
+FSA in them, or single FSAs (``X0A``) that override their district. The file
+is expanded once into a dict, so a lookup is one regex match and one dict
+get.
+
+A well-formed postal code whose FSA is not in the table is logged and counted
+in the cache (``unknown_fsa_count``) so missing rows show up.
+"""
+
+import csv
+import logging
+import re
+from collections import namedtuple
+from functools import lru_cache
+from pathlib import Path
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+DATA_FILE = Path(__file__).resolve().parent / "data" / "fsa.csv"
+METRIC_KEY = "shipping:metrics:unknown_fsa"
+
+# Canada Post never uses D, F, I, O, Q or U, nor W or Z as the first letter
+POSTAL_CODE_RE = re.compile(r"[ABCEGHJ-NPRSTVXY]\d[ABCEGHJ-NPRSTV-Z]\d[ABCEGHJ-NPRSTV-Z]\d")
+THIRD_LETTERS = "ABCEGHJKLMNPRSTVWXYZ"
+
+FsaInfo = namedtuple("FsaInfo", "fsa province zone area")
+
+
+def normalize(postal_code):
+    return (postal_code or "").replace(" ", "").upper()
+
+
+def is_valid(postal_code):
+    return POSTAL_CODE_RE.fullmatch(normalize(postal_code)) is not None
+
+
+@lru_cache(maxsize=None)
+def table():
+    """``{fsa: FsaInfo}`` expanded from ``DATA_FILE``."""
+    districts, fsas = {}, {}
+    with open(DATA_FILE, newline="") as f:
+        for row in csv.DictReader(f):
+            prefix = row["prefix"].upper()
+            info = (row["province"], int(row["zone"]), row["area"])
+            (districts if len(prefix) == 2 else fsas)[prefix] = info
+    expanded = {}
+    for district, info in districts.items():
+        for letter in THIRD_LETTERS:
+            expanded[district + letter] = FsaInfo(district + letter, *info)
+    for fsa, info in fsas.items():
+        expanded[fsa] = FsaInfo(fsa, *info)
+    return expanded
+
+
+def lookup(postal_code):
+    """``FsaInfo`` for a postal code (or a bare FSA), None if malformed or unknown."""
+    code = normalize(postal_code)
+    if len(code) == 3:
+        code += "0A0"  # A bare FSA: validate with a placeholder local delivery unit
+    if not POSTAL_CODE_RE.fullmatch(code):
+        return None
+    info = table().get(code[:3])
+    if info is None:
+        record_unknown(code[:3])
+    return info
+
+
+def record_unknown(fsa):
+    logger.warning("Unknown FSA %s", fsa)
+    for key in (METRIC_KEY, f"{METRIC_KEY}:{fsa}"):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, 1, None) or cache.incr(key)
+
+
+def unknown_fsa_count(fsa=None):
+    """Lookups of unknown FSAs, in total or for one FSA."""
+    return cache.get(f"{METRIC_KEY}:{fsa}" if fsa else METRIC_KEY, 0)
+
+
+def province(postal_code):
+    info = lookup(postal_code)
+    return info.province if info else None
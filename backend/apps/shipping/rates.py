@@ -0,0 +1,167 @@
+"""
+Shipping rate quotes from the carriers.
+
+``quote_methods`` prices a list of ``ShippingMethod`` rows for one parcel, and
+``quote_shipment`` for several (see ``packing.py``):
+
+* Quotes are cached per (carrier, service, weight bucket, FSA) for
+  ``SHIPPING_QUOTE_TTL`` seconds. Weights are rounded up to the next
+  ``SHIPPING_WEIGHT_BUCKET_KG`` and the bucket's upper weight is quoted, so a
+  cached price is never below the carrier's price for any weight in the bucket.
+  The FSA is the first three characters of the postal code, which is as fine
+  as carrier zones get.
+* Cache misses are sent to every carrier at once, each bounded by its own
+  timeout from ``SHIPPING_CARRIERS``, so latency is that of the slowest carrier
+  instead of the sum of all of them.
+* A carrier that times out or errors is priced from the method's table rate
+  (``base_rate + per_kg_rate * weight``, scaled by the destination FSA's zone
+  plus its rural/remote surcharge, see ``postal.py``); table prices are not
+  cached, so the carrier is asked again next time. The destination is looked
+  up once per shipment, not once per fallback.
+
+A carrier with a ``url`` is called over HTTP (POST JSON ``service``,
+``weight_kg``, ``postal_code``; reply ``{"rate": "12.34"}``). Without one the
+built-in formulas in ``utils.py`` stand in for the carrier API. Run
+``python manage.py fake_carrier_server`` for a local carrier with configurable
+latency and failures.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import urllib.request
+from collections import namedtuple
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from . import postal
+from .utils import get_canadapost_rate, get_fedex_rate, get_ups_rate
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = "shipping:quote"
+
+# Built-in formulas used when a carrier has no API URL configured
+FORMULAS = {
+    "Canada Post": get_canadapost_rate,
+    "UPS": get_ups_rate,
+    "FedEx": get_fedex_rate,
+}
+
+Quote = namedtuple("Quote", "method rate source")  # source: "carrier", "cache" or "table"
+
+
+def weight_bucket(weight_kg):
+    """Upper bound of the weight bucket containing ``weight_kg``."""
+    size = settings.SHIPPING_WEIGHT_BUCKET_KG
+    return max(1, math.ceil(weight_kg / size - 1e-9)) * size
+
+
+def fsa(postal_code):
+    return postal.normalize(postal_code)[:3]
+
+
+def cache_key(method, weight_kg, postal_code):
+    carrier = method.carrier.lower().replace(" ", "-")
+    return f"{CACHE_PREFIX}:{carrier}:{method.service_type}:{weight_bucket(weight_kg)}:{fsa(postal_code)}"
+
+
+def fsa_adjustment(info):
+    """(zone factor, per-parcel area surcharge) applied to table rates for an ``FsaInfo`` (or None)."""
+    if info is None:
+        return Decimal("1"), Decimal("0")
+    return (Decimal(str(settings.SHIPPING_ZONE_FACTORS.get(info.zone, 1))),
+            Decimal(str(settings.SHIPPING_AREA_SURCHARGES.get(info.area, 0))))
+
+
+def destination_adjustment(postal_code):
+    """``fsa_adjustment`` for a postal code."""
+    return fsa_adjustment(postal.lookup(postal_code))
+
+
+def table_rate(method, weight_kg, postal_code="", adjustment=None):
+    """The method's own rate; pass ``adjustment`` when the destination is already resolved."""
+    factor, surcharge = adjustment or destination_adjustment(postal_code)
+    rate = (method.base_rate + method.per_kg_rate * Decimal(str(weight_kg))) * factor + surcharge
+    return rate.quantize(Decimal("0.01"))
+
+
+def _carrier_config(carrier):
+    return settings.SHIPPING_CARRIERS.get(carrier, {})
+
+
+def _request_quote(url, timeout, service, weight_kg, postal_code):
+    body = json.dumps({"service": service, "weight_kg": weight_kg, "postal_code": postal_code}).encode()
+    request = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"}, method="POST")
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return Decimal(str(json.load(response)["rate"])).quantize(Decimal("0.01"))
+
+
+def fetch_quote(method, weight_kg, postal_code):
+    """Ask the carrier for one quote (blocking)."""
+    config = _carrier_config(method.carrier)
+    if config.get("url"):
+        return _request_quote(config["url"], config.get("timeout", 2.0), method.service_type, weight_kg, postal_code)
+    formula = FORMULAS.get(method.carrier, get_fedex_rate)
+    return Decimal(formula(weight_kg, postal_code)).quantize(Decimal("0.01"))
+
+
+async def _quote_carrier(method, weight_kg, postal_code, adjustment):
+    timeout = _carrier_config(method.carrier).get("timeout", 2.0)
+    try:
+        # Carrier calls block on the network, so each gets its own worker thread
+        rate = await asyncio.wait_for(
+            sync_to_async(fetch_quote, thread_sensitive=False)(method, weight_bucket(weight_kg), postal_code),
+            timeout,
+        )
+    except Exception as exc:
+        logger.warning("%s %s quote failed (%s); using table rate", method.carrier, method.service_type,
+                       type(exc).__name__)
+        return Quote(method, table_rate(method, weight_kg, adjustment=adjustment), "table")
+    return Quote(method, rate, "carrier")
+
+
+async def quote_methods(methods, weight_kg, postal_code):
+    """Quote each method for a parcel of ``weight_kg``, in the order given."""
+    return await quote_shipment(methods, [weight_kg], postal_code)
+
+
+async def quote_shipment(methods, weights, postal_code):
+    """
+    Quote each method for a shipment of parcels weighing ``weights``, in the
+    order given. A method's rate is the sum over its parcels; parcels in the
+    same weight bucket share one quote. The source is the worst of its
+    parcels' ("table" over "carrier" over "cache").
+    """
+    methods = list(methods)
+    weights = list(weights) or [0]
+    keys = {}  # cache key -> (method, weight) to quote
+    shipment = []
+    for method in methods:
+        parcel_keys = [cache_key(method, weight, postal_code) for weight in weights]
+        for key, weight in zip(parcel_keys, weights):
+            keys.setdefault(key, (method, weight))
+        shipment.append(parcel_keys)
+    cached = await cache.aget_many(keys)
+
+    misses = [(key, pair) for key, pair in keys.items() if key not in cached]
+    adjustment = destination_adjustment(postal_code) if misses else None
+    fetched = await asyncio.gather(*(
+        _quote_carrier(method, weight, postal_code, adjustment) for _, (method, weight) in misses
+    ))
+    fresh = {key: quote for (key, _), quote in zip(misses, fetched)}
+    to_cache = {key: str(quote.rate) for key, quote in fresh.items() if quote.source == "carrier"}
+    if to_cache:
+        await cache.aset_many(to_cache, settings.SHIPPING_QUOTE_TTL)
+
+    quotes = []
+    for method, parcel_keys in zip(methods, shipment):
+        parts = [fresh[key] if key in fresh else Quote(method, Decimal(cached[key]), "cache") for key in parcel_keys]
+        sources = {part.source for part in parts}
+        source = next(name for name in ("table", "carrier", "cache") if name in sources)
+        quotes.append(Quote(method, sum(part.rate for part in parts), source))
+    return quotes
@@ -0,0 +1,312 @@
+"""
+Tests for the Shipping app.
+Covers the async checkout calculation and carrier rate endpoints, rate quoting, parcel packing,
+delivery dates and the FSA table.
+"""
+
+import json
+import threading
+import time
+from datetime import date, datetime, time as clock, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.products.models import Category, Product
+from apps.promotions.models import Discount
+from apps.taxes.models import ProvinceTaxRate
+from . import delivery, packing, postal, rates
+from .fake_carrier import make_server
+from .models import ShippingMethod
+
+
+class CheckoutCalculateTests(TestCase):
+    """Tests for POST /api/checkout/calculate/."""
+
+    def setUp(self):
+        ShippingMethod.objects.create(carrier='Canada Post', service_type='standard',
+                                      base_rate=Decimal('8.00'), per_kg_rate=Decimal('1.00'), processing_days=3)
+        ShippingMethod.objects.create(carrier='UPS', service_type='express', base_rate=Decimal('15.00'))
+        ProvinceTaxRate.objects.create(province='ON', gst_rate=5, pst_rate=8, total_rate=13)
+
+    def calculate(self, **payload):
+        payload = {'postal_code': 'M5V 3A8', 'items': [{'price': 10, 'quantity': 2, 'weight': 1}], **payload}
+        return self.client.post('/api/checkout/calculate/', json.dumps(payload), content_type='application/json')
+
+    def test_totals_in_three_queries(self):
+        """Methods, tax rate and coupon are each read once."""
+        now = timezone.now()
+        Discount.objects.create(code='SAVE10', percentage=10,
+                                valid_from=now - timedelta(days=1), valid_to=now + timedelta(days=1))
+        with self.assertNumQueries(3):
+            response = self.calculate(shipping_method='standard', coupon_code='save10')
+        data = response.json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['subtotal'], 20.0)
+        self.assertEqual(data['discount'], 2.0)
+        self.assertEqual(data['tax'], 2.34)
+        self.assertEqual(data['tax_label'], 'GST (5.00%) + PST (8.00%)')
+        self.assertEqual(data['shipping'], 10.0)
+        self.assertEqual(data['total'], 30.34)
+        self.assertEqual(data['coupon']['type'], 'percentage')
+
+    def test_unknown_method_and_coupon(self):
+        """An unknown method falls back to the first active one; a bad coupon is reported."""
+        data = self.calculate(shipping_method='drone', coupon_code='NOPE').json()
+        self.assertEqual(data['shipping'], 10.0)
+        self.assertEqual(data['errors'], ['Invalid coupon code: NOPE'])
+
+    def test_invalid_postal_code(self):
+        response = self.calculate(postal_code='12345')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get('/api/checkout/calculate/').status_code, 405)
+
+
+class ShippingRatesTests(TestCase):
+    """Tests for POST /api/shipping/rates/."""
+
+    def setUp(self):
+        cache.clear()
+        ShippingMethod.objects.create(carrier='Canada Post', service_type='standard')
+        ShippingMethod.objects.create(carrier='FedEx', service_type='express', processing_days=2)
+
+    def test_quotes_every_active_method(self):
+        response = self.client.post('/api/shipping/rates/', {'weight_kg': '2', 'postal_code': 'M5V3A8'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['rates'], [
+            {'carrier': 'Canada Post', 'service_type': 'standard', 'rate': '14.00', 'source': 'carrier',
+             'processing_days': 1},
+            {'carrier': 'FedEx', 'service_type': 'express', 'rate': '15.50', 'source': 'carrier',
+             'processing_days': 2},
+        ])
+
+    def test_malformed_json_is_a_bad_request(self):
+        for body in ('{"weight_kg": ', '[1, 2]'):
+            response = self.client.post('/api/shipping/rates/', body, content_type='application/json')
+            self.assertEqual(response.status_code, 400, body)
+            self.assertIn('detail', response.json())
+
+
+class RateQuoteTests(TestCase):
+    """Tests for concurrent, cached carrier quotes against the fake carrier."""
+
+    def setUp(self):
+        cache.clear()
+        self.post = ShippingMethod.objects.create(carrier='Canada Post', service_type='standard',
+                                                  base_rate=Decimal('8.00'), per_kg_rate=Decimal('1.00'))
+        self.ups = ShippingMethod.objects.create(carrier='UPS', service_type='express', base_rate=Decimal('15.00'))
+
+    def carrier(self, latency):
+        server = make_server(latency=latency)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return 'http://%s:%s/' % server.server_address[:2]
+
+    def quote(self, weight=1.2, postal='M5V 3A8'):
+        return async_to_sync(rates.quote_methods)([self.post, self.ups], weight, postal)
+
+    def test_cache_key_buckets_weight_and_postal_code(self):
+        """Nearby weights and postal codes in one FSA share a key."""
+        self.assertEqual(rates.weight_bucket(1.2), 1.5)
+        self.assertEqual(rates.weight_bucket(1.5), 1.5)
+        self.assertEqual(rates.weight_bucket(0), 0.5)
+        self.assertEqual(rates.cache_key(self.post, 1.2, 'm5v 3a8'), rates.cache_key(self.post, 1.4, 'M5V 1J1'))
+        self.assertNotEqual(rates.cache_key(self.post, 1.2, 'M5V'), rates.cache_key(self.post, 1.6, 'M5V'))
+        self.assertEqual(rates.cache_key(self.post, 1.2, 'M5V 3A8'), 'shipping:quote:canada-post:standard:1.5:M5V')
+
+    def test_carriers_are_called_concurrently(self):
+        """Two slow carriers take about as long as one, and the bucket's weight is quoted."""
+        url = self.carrier(latency=0.3)
+        carriers = {'Canada Post': {'url': url, 'timeout': 2}, 'UPS': {'url': url, 'timeout': 2}}
+        with override_settings(SHIPPING_CARRIERS=carriers):
+            started = time.monotonic()
+            quotes = self.quote()
+            elapsed = time.monotonic() - started
+        self.assertLess(elapsed, 0.55)
+        self.assertEqual([(q.rate, q.source) for q in quotes], [(Decimal('13.00'), 'carrier')] * 2)
+
+    def test_second_quote_is_served_from_cache(self):
+        """Carrier quotes are cached; a repeat in the same bucket does not call the carrier."""
+        self.quote()
+        with mock.patch.object(rates, 'fetch_quote') as fetch:
+            quotes = self.quote(weight=1.4, postal='M5V 1J1')
+        fetch.assert_not_called()
+        self.assertEqual([q.source for q in quotes], ['cache', 'cache'])
+        self.assertEqual(quotes[0].rate, Decimal('13.00'))
+
+    def test_timeout_falls_back_to_table_rate(self):
+        """A carrier slower than its timeout is priced from the table and not cached."""
+        carriers = {'Canada Post': {'url': self.carrier(latency=1), 'timeout': 0.1}}
+        with override_settings(SHIPPING_CARRIERS=carriers):
+            started = time.monotonic()
+            quotes = self.quote()
+            self.assertLess(time.monotonic() - started, 0.5)
+            self.assertEqual((quotes[0].rate, quotes[0].source), (Decimal('9.20'), 'table'))
+            self.assertEqual(quotes[1].source, 'carrier')
+            self.assertEqual([q.source for q in self.quote()], ['table', 'cache'])
+
+
+class PackingTests(TestCase):
+    """Tests for packing carts into billable parcels."""
+
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name='Boxes', slug='boxes')
+        self.small = Product.objects.create(sku='CUBE', name='Cube', category=category, retail_price=Decimal('1.00'),
+                                            weight_kg=Decimal('0.5'), length_cm=10, width_cm=10, height_cm=10)
+        self.bulky = Product.objects.create(sku='BULKY', name='Bulky', category=category, retail_price=Decimal('9.00'),
+                                            weight_kg=Decimal('1'), length_cm=35, width_cm=45, height_cm=35)
+        self.tube = Product.objects.create(sku='TUBE', name='Tube', category=category, retail_price=Decimal('3.00'),
+                                           weight_kg=Decimal('2'), length_cm=100, width_cm=20, height_cm=20)
+        ShippingMethod.objects.create(carrier='Canada Post', service_type='standard',
+                                      base_rate=Decimal('8.00'), per_kg_rate=Decimal('1.00'))
+
+    def test_bulky_item_is_billed_on_dimensional_weight(self):
+        """A light, bulky unit goes in the smallest carton that fits it and bills by volume."""
+        parcel, = packing.pack_items([{'id': self.bulky.pk, 'quantity': 1}])
+        self.assertEqual(parcel.carton, 'large')
+        self.assertEqual(parcel.weight_kg, 1)
+        self.assertEqual(parcel.billable_weight_kg, 16)  # 50 * 40 * 40 / 5000
+
+    def test_lines_split_by_carton_weight_and_volume(self):
+        """Units fill cartons up to their weight limit; oversize units ship alone."""
+        parcels = packing.pack_items([
+            {'product_id': self.small.pk, 'quantity': 100},
+            {'productId': self.tube.pk, 'quantity': 2},
+            {'id': 'unknown', 'quantity': 2, 'weight': 1.5},
+        ])
+        self.assertEqual([(p.carton, p.weight_kg) for p in parcels],
+                         [(None, 2), (None, 2), ('large', 30), ('large', 23)])
+        self.assertEqual(parcels[0].billable_weight_kg, 8)  # 100 * 20 * 20 / 5000
+        self.assertEqual(packing.total_weight(parcels), 69)
+
+    def test_packing_is_cached_per_cart(self):
+        """The same cart is not re-packed; editing a product invalidates it."""
+        items = [{'id': self.small.pk, 'quantity': 3}, {'id': self.bulky.pk, 'quantity': 1}]
+        first = packing.pack_items(items)
+        with self.assertNumQueries(0), mock.patch.object(packing, 'pack') as pack:
+            self.assertEqual(packing.pack_items(list(reversed(items))), first)
+        pack.assert_not_called()
+
+        self.bulky.weight_kg = Decimal('20')
+        self.bulky.save()
+        self.assertEqual(packing.pack_items(items)[0].billable_weight_kg, 21.5)
+
+    def test_checkout_and_rates_use_parcels(self):
+        """Checkout charges per parcel on billable weight, and the rates endpoint quotes the same parcels."""
+        items = [{'id': self.bulky.pk, 'price': 9, 'quantity': 1}, {'id': self.tube.pk, 'price': 3, 'quantity': 1}]
+        payload = {'postal_code': 'M5V 3A8', 'shipping_method': 'standard', 'items': items}
+        data = self.client.post('/api/checkout/calculate/', json.dumps(payload), content_type='application/json').json()
+        self.assertEqual((data['parcels'], data['shipping_weight']), (2, 24))
+        self.assertEqual(data['shipping'], 40.0)  # (8 + 8) + (8 + 16)
+
+        response = self.client.post('/api/shipping/rates/', json.dumps(payload), content_type='application/json')
+        self.assertEqual([p['billable_weight_kg'] for p in response.json()['parcels']], [8, 16])
+        self.assertEqual(response.json()['rates'][0]['rate'], '68.00')  # (10 + 2 * 8) + (10 + 2 * 16)
+
+
+class DeliveryCalendarTests(TestCase):
+    """Tests for the precomputed business-day calendar."""
+
+    def setUp(self):
+        self.method = ShippingMethod.objects.create(carrier='UPS', service_type='standard', cutoff_time=clock(15),
+                                                    min_processing_days=1, max_processing_days=3)
+
+    def at(self, *args):
+        return datetime(*args, tzinfo=delivery.WAREHOUSE_TZ)
+
+    def test_statutory_holidays(self):
+        """Weekend holidays move to the next free weekday; provinces differ."""
+        ontario = delivery.holidays(2026, 'ON')
+        self.assertIn(date(2026, 4, 3), ontario)  # Good Friday
+        self.assertIn(date(2026, 12, 28), ontario)  # Boxing Day, observed on Monday
+        self.assertNotIn(date(2026, 6, 24), ontario)
+        self.assertIn(date(2026, 6, 24), delivery.holidays(2026, 'QC'))
+        self.assertNotIn(date(2026, 12, 28), delivery.holidays(2026, 'QC'))
+
+    def test_cutoff_and_holidays(self):
+        """Orders before cutoff ship the same day; later ones skip weekends and holidays."""
+        calendar = delivery.get_calendar('ON', self.at(2026, 4, 2))
+        self.assertEqual(calendar.window(self.method, self.at(2026, 4, 2, 14, 59)),
+                         (date(2026, 4, 6), date(2026, 4, 8)))
+        # After cutoff on the Thursday before Good Friday: ships Monday
+        self.assertEqual(calendar.window(self.method, self.at(2026, 4, 2, 15, 0)),
+                         (date(2026, 4, 7), date(2026, 4, 9)))
+
+        quebec = delivery.delivery_window(self.method, 'QC', self.at(2026, 6, 23, 16))
+        self.assertEqual(quebec, (date(2026, 6, 26), date(2026, 6, 30)))
+        self.assertEqual(delivery.delivery_window(self.method, 'ON', self.at(2026, 6, 23, 16)),
+                         (date(2026, 6, 25), date(2026, 6, 29)))
+
+    def test_now_is_toronto_time(self):
+        """The cutoff is compared in Toronto time, not UTC."""
+        now = datetime(2026, 4, 1, 18, 30, tzinfo=dt_timezone.utc)  # 14:30 in Toronto
+        with mock.patch('django.utils.timezone.now', return_value=now):
+            self.assertEqual(delivery.delivery_windows([self.method])[self.method.pk][0], date(2026, 4, 2))
+
+    def test_shipping_zones_include_dates(self):
+        """The zones endpoint returns a date range per method in one query."""
+        now = self.at(2026, 4, 2, 15, 0)
+        with self.assertNumQueries(1), mock.patch.object(delivery, 'local_now', return_value=now):
+            zones = self.client.get('/api/checkout/shipping-zones/', {'province': 'qc'}).json()['shipping_zones']
+        self.assertEqual((zones[0]['min_date'], zones[0]['max_date']), ('2026-04-07', '2026-04-09'))
+        self.assertEqual(zones[0]['days'], '1-3 business days')
+
+
+class PostalTests(TestCase):
+    """Tests for the FSA lookup table."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_lookup(self):
+        """Districts cover their FSAs; single-FSA rows override them."""
+        self.assertEqual(postal.lookup('m5v 3a8'), postal.FsaInfo('M5V', 'ON', 1, 'urban'))
+        self.assertEqual(postal.lookup('K0A 1A0'), postal.FsaInfo('K0A', 'ON', 2, 'rural'))
+        self.assertEqual(postal.lookup('X0A0H0'), postal.FsaInfo('X0A', 'NU', 5, 'remote'))
+        self.assertEqual(postal.lookup('X1A'), postal.FsaInfo('X1A', 'NT', 5, 'urban'))
+        self.assertEqual(postal.province('J0M 1C0'), 'QC')
+
+    def test_malformed_codes(self):
+        """Letters Canada Post never uses are rejected without counting as unknown."""
+        for code in ('Z1A 1A1', 'D1A 1A1', 'M5V 3O8', '12345', ''):
+            self.assertFalse(postal.is_valid(code), code)
+            self.assertIsNone(postal.lookup(code))
+        self.assertEqual(postal.unknown_fsa_count(), 0)
+
+    def test_unknown_fsa_is_counted(self):
+        """A well-formed FSA missing from the table is reported and refused at checkout."""
+        self.assertIsNone(postal.lookup('H6A 1A1'))
+        self.assertIsNone(postal.lookup('H6A 2B2'))
+        self.assertEqual(postal.unknown_fsa_count(), 2)
+        self.assertEqual(postal.unknown_fsa_count('H6A'), 2)
+
+        payload = {'postal_code': 'H6A 1A1', 'items': []}
+        response = self.client.post('/api/checkout/calculate/', json.dumps(payload), content_type='application/json')
+        self.assertEqual(response.json()['errors'], ['Unable to identify province from postal code'])
+
+    def test_unknown_fsa_is_counted_once_per_shipment(self):
+        """Table-rate fallbacks for every method and parcel share one lookup."""
+        methods = [ShippingMethod.objects.create(carrier=carrier, service_type='standard')
+                   for carrier in ('Canada Post', 'UPS')]
+        with mock.patch.object(rates, 'fetch_quote', side_effect=RuntimeError):
+            quotes = async_to_sync(rates.quote_shipment)(methods, [1, 4, 9], 'H6A 1A1')
+        self.assertEqual({quote.source for quote in quotes}, {'table'})
+        self.assertEqual(postal.unknown_fsa_count(), 1)
+
+    def test_remote_destinations_cost_more(self):
+        """Table rates scale by zone and add the area surcharge per parcel."""
+        method = ShippingMethod.objects.create(carrier='Canada Post', service_type='standard',
+                                               base_rate=Decimal('8.00'), per_kg_rate=Decimal('1.00'))
+        self.assertEqual(rates.table_rate(method, 2, 'M5V 3A8'), Decimal('10.00'))
+        self.assertEqual(rates.table_rate(method, 2, 'K0A 1A0'), Decimal('14.00'))  # 10 * 1.10 + 3
+        self.assertEqual(rates.table_rate(method, 2, 'X0A 0H0'), Decimal('32.50'))  # 10 * 1.75 + 15
+
+        payload = {'postal_code': 'X0A 0H0', 'items': [{'price': 10, 'quantity': 2, 'weight': 1}]}
+        data = self.client.post('/api/checkout/calculate/', json.dumps(payload), content_type='application/json').json()
+        self.assertEqual((data['province'], data['shipping']), ('NU', 32.5))
@@ -1,28 +1,40 @@
-from rest_framework.views import APIView
-from rest_framework.response import Response
-from rest_framework.permissions import AllowAny
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.utils.decorators import classonlymethod
+from django.views import View
+
+from apps.core.async_api import async_api, request_data
+from . import packing, rates
 from .models import ShippingMethod
-from .serializers import ShippingMethodSerializer
-from .utils import get_canadapost_rate, get_ups_rate, get_fedex_rate
 
-class ShippingRatesView(APIView):
-    permission_classes = [AllowAny]
 
-    def post(self, request):
-        weight = float(request.data.get("weight_kg", 0))
-        destination_postal = request.data.get("postal_code", "")
-        rates = []
-        for method in ShippingMethod.objects.filter(is_active=True):
-            if method.carrier == "Canada Post":
-                rate = get_canadapost_rate(weight, destination_postal)
-            elif method.carrier == "UPS":
-                rate = get_ups_rate(weight, destination_postal)
-            else:
-                rate = get_fedex_rate(weight, destination_postal)
-            rates.append({
-                "carrier": method.carrier,
-                "service_type": method.service_type,
-                "rate": str(rate),
-                "processing_days": method.processing_days,
-            })
-        return Response({"rates": rates})
+class ShippingRatesView(View):
+    """
+    Quote every active shipping method; carriers are called concurrently (see rates.py).
+
+    Posting cart ``items`` quotes the parcels they pack into (see packing.py);
+    otherwise ``weight_kg`` is quoted as a single parcel.
+    """
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        return async_api("POST")(super().as_view(**initkwargs))
+
+    async def post(self, request):
+        data = request_data(request)
+        destination_postal = data.get("postal_code", "")
+        items = data.get("items")
+        parcels = await sync_to_async(packing.pack_items)(items) if isinstance(items, list) else []
+        weights = [parcel.billable_weight_kg for parcel in parcels] or [float(data.get("weight_kg", 0))]
+        methods = [method async for method in ShippingMethod.objects.filter(is_active=True)]
+        quotes = await rates.quote_shipment(methods, weights, destination_postal)
+        return JsonResponse({"parcels": [parcel._asdict() for parcel in parcels], "rates": [
+            {
+                "carrier": quote.method.carrier,
+                "service_type": quote.method.service_type,
+                "rate": str(quote.rate),
+                "source": quote.source,
+                "processing_days": quote.method.processing_days,
+            }
+            for quote in quotes
+        ]})
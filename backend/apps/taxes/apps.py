@@ -3,4 +3,7 @@ from django.apps import AppConfig
 
 class TaxesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
-    name = "apps.taxes"
\ No newline at end of file
+    name = "apps.taxes"
+
+    def ready(self):
+        from . import signals  # noqa
@@ -0,0 +1,163 @@
+"""
+Sales tax engine.
+
+All amounts are ``Decimal``. Tax is worked out per line and per component
+(GST, PST or HST) and rounded once per component at cart level, half up to
+the cent; each component total is then split back over the lines by largest
+remainder, so line taxes always add up to the cart's tax exactly. A cart
+discount is spread over its lines the same way before tax.
+
+A line's ``tax_class`` comes from ``Product.tax_class``: ``exempt`` and
+``zero_rated`` lines carry no tax, anything else is taxable.
+
+How a ``ProvinceTaxRate`` row splits into components follows its rates:
+GST and PST when ``pst_rate`` is set, a single HST at 13% and above, GST
+otherwise. The active rows are read once into a table that stays in the
+cache until a rate is saved (see ``signals.py``), so carts, whole batches of
+orders (``tax_orders``) and reports all share one read.
+"""
+
+import logging
+from collections import namedtuple
+from decimal import ROUND_DOWN, ROUND_HALF_UP, Decimal
+
+from django.core.cache import cache
+
+from apps.core import fragments
+from apps.core.routers import use_primary
+from apps.orders.models import OrderLine
+from apps.products.models import Product
+from .models import ProvinceTaxRate
+
+logger = logging.getLogger(__name__)
+
+RATES_CACHE_KEY = "taxes:rates"
+CLASSES_CACHE_KEY = "taxes:classes:{}"
+CLASSES_CACHE_TIMEOUT = 86400
+
+CENT = Decimal("0.01")
+HUNDRED = Decimal("100")
+ZERO = Decimal("0")
+
+DEFAULT_CLASS = "taxable"
+EXEMPT_CLASSES = frozenset({"exempt", "zero_rated"})
+
+Component = namedtuple("Component", "name rate")  # rate in percent
+TaxResult = namedtuple("TaxResult", "province label rate components total line_taxes taxable exempt")
+
+# Used when a province has no active row (Ontario's HST)
+DEFAULT_COMPONENTS = (Component("HST", Decimal("13.00")),)
+
+
+def components_for(row):
+    if row.pst_rate > 0:
+        return (Component("GST", row.gst_rate), Component("PST", row.pst_rate))
+    if row.total_rate >= 13:
+        return (Component("HST", row.total_rate),)
+    return (Component("GST", row.total_rate),)
+
+
+def _percent(rate):
+    # Two decimals unless more are significant: 5.00, 9.975
+    return rate.quantize(CENT) if rate == rate.quantize(CENT) else rate.normalize()
+
+
+def label_for(components):
+    if len(components) > 1:
+        return " + ".join(f"{c.name} ({_percent(c.rate)}%)" for c in components)
+    return components[0].name
+
+
+def rate_table():
+    """``{province: (Component, ...)}`` for every active rate."""
+    table = cache.get(RATES_CACHE_KEY)
+    if table is None:
+        table = {row.province: components_for(row) for row in ProvinceTaxRate.objects.filter(is_active=True)}
+        cache.set(RATES_CACHE_KEY, table, None)
+    return table
+
+
+def invalidate():
+    cache.delete(RATES_CACHE_KEY)
+
+
+def tax_class_map():
+    """``{product_id: tax_class}`` for products outside the default class."""
+    key = CLASSES_CACHE_KEY.format(fragments.generations(["products"])["products"])
+    classes = cache.get(key)
+    if classes is None:
+        with use_primary():
+            classes = dict(Product.objects.exclude(tax_class=DEFAULT_CLASS).values_list("pk", "tax_class"))
+        cache.set(key, classes, CLASSES_CACHE_TIMEOUT)
+    return classes
+
+
+def allocate(total, weights):
+    """Split ``total`` cents over ``weights`` in proportion, largest remainder first; sums exactly."""
+    weight_sum = sum(weights)
+    if not weight_sum or not total:
+        return [ZERO] * len(weights)
+    exact = [total * w / weight_sum for w in weights]
+    shares = [e.quantize(CENT, ROUND_DOWN) for e in exact]
+    left = int((total - sum(shares)) / CENT)
+    for i in sorted(range(len(exact)), key=lambda i: exact[i] - shares[i], reverse=True)[:left]:
+        shares[i] += CENT
+    return shares
+
+
+def tax_lines(lines, province, discount=0, table=None):
+    """
+    Tax a cart of ``(amount, tax_class)`` lines delivered to ``province``.
+    ``amount`` is the line total (unit price times quantity).
+    """
+    if table is None:
+        table = rate_table()
+    components = table.get(province)
+    if components is None:
+        logger.warning(f'Tax rate not found for province: {province}')
+        components = DEFAULT_COMPONENTS
+
+    amounts = [Decimal(str(amount)) for amount, _ in lines]
+    exempt = [tax_class in EXEMPT_CLASSES for _, tax_class in lines]
+    discount = min(Decimal(str(discount)), sum(amounts, ZERO))
+    net = [a - d for a, d in zip(amounts, allocate(discount, amounts))]
+    taxable = [ZERO if is_exempt else n for n, is_exempt in zip(net, exempt)]
+
+    totals = {}
+    line_taxes = [ZERO] * len(lines)
+    for component in components:
+        exact = [amount * component.rate / HUNDRED for amount in taxable]
+        total = sum(exact, ZERO).quantize(CENT, ROUND_HALF_UP)
+        totals[component.name] = total
+        line_taxes = [t + share for t, share in zip(line_taxes, allocate(total, exact))]
+
+    return TaxResult(
+        province=province,
+        label=label_for(components),
+        rate=sum((c.rate for c in components), ZERO) / HUNDRED,
+        components=totals,
+        total=sum(totals.values(), ZERO),
+        line_taxes=line_taxes,
+        taxable=sum(taxable, ZERO),
+        exempt=sum(net, ZERO) - sum(taxable, ZERO),
+    )
+
+
+def tax_batch(carts, table=None):
+    """Tax many ``(province, lines, discount)`` carts with one rate table read."""
+    if table is None:
+        table = rate_table()
+    return [tax_lines(lines, province, discount, table) for province, lines, discount in carts]
+
+
+def tax_orders(orders):
+    """``{order_id: TaxResult}`` recomputed from order lines, in two queries for any number of orders."""
+    provinces = dict(orders.values_list("pk", "shipping_address__province"))
+    lines = {pk: [] for pk in provinces}
+    rows = OrderLine.objects.filter(order_id__in=list(provinces)).values_list(
+        "order_id", "quantity", "unit_price", "product__tax_class"
+    )
+    for order_id, quantity, unit_price, tax_class in rows:
+        lines[order_id].append((unit_price * quantity, tax_class))
+    results = tax_batch((provinces[pk], lines[pk], 0) for pk in provinces)
+    return dict(zip(provinces, results))
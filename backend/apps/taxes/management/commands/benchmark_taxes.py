@@ -0,0 +1,58 @@
+"""
+Management command to time the tax engine on a batch of synthetic cart lines
+Run with: python manage.py benchmark_taxes [--lines 10000] [--lines-per-cart 10]
+"""
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from apps.taxes.engine import DEFAULT_CLASS, Component, rate_table, tax_batch, tax_lines
+
+# Used when no ProvinceTaxRate rows exist yet
+SAMPLE_TABLE = {
+    'ON': (Component('HST', Decimal('13.00')),),
+    'QC': (Component('GST', Decimal('5.00')), Component('PST', Decimal('9.975'))),
+    'BC': (Component('GST', Decimal('5.00')), Component('PST', Decimal('7.00'))),
+    'AB': (Component('GST', Decimal('5.00')),),
+}
+
+
+class Command(BaseCommand):
+    help = 'Times taxing a batch of cart lines in one pass and as a single cart'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lines', type=int, default=10000)
+        parser.add_argument('--lines-per-cart', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        table = rate_table() or SAMPLE_TABLE
+        provinces = sorted(table)
+        classes = [DEFAULT_CLASS] * 8 + ['exempt', 'zero_rated']
+        lines = [
+            (Decimal(rng.randint(100, 500000)) / 100, rng.choice(classes))
+            for _ in range(options['lines'])
+        ]
+        size = max(1, options['lines_per_cart'])
+        carts = [
+            (rng.choice(provinces), lines[i:i + size], Decimal(rng.randint(0, 1000)) / 100)
+            for i in range(0, len(lines), size)
+        ]
+
+        started = time.perf_counter()
+        results = tax_batch(carts, table)
+        batch_ms = (time.perf_counter() - started) * 1000
+        tax = sum(result.total for result in results)
+        self.stdout.write(f'{len(lines)} lines in {len(carts)} carts: {batch_ms:8.2f} ms, tax {tax}')
+
+        started = time.perf_counter()
+        result = tax_lines(lines, provinces[0], table=table)
+        single_ms = (time.perf_counter() - started) * 1000
+        self.stdout.write(f'{len(lines)} lines in one {provinces[0]} cart: {single_ms:8.2f} ms, tax {result.total}')
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(lines) / (batch_ms / 1000):,.0f} lines/s batched; line taxes sum exactly: '
+            f'{sum(result.line_taxes) == result.total}'
+        ))
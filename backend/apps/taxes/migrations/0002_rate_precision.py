@@ -0,0 +1,28 @@
+# Generated by Django 4.2.10 on 2026-10-19 16:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taxes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='provincetaxrate',
+            name='gst_rate',
+            field=models.DecimalField(decimal_places=3, default=0, max_digits=6),
+        ),
+        migrations.AlterField(
+            model_name='provincetaxrate',
+            name='pst_rate',
+            field=models.DecimalField(decimal_places=3, default=0, max_digits=6),
+        ),
+        migrations.AlterField(
+            model_name='provincetaxrate',
+            name='total_rate',
+            field=models.DecimalField(decimal_places=3, default=0, max_digits=6),
+        ),
+    ]
@@ -2,9 +2,10 @@ from django.db import models
 
 class ProvinceTaxRate(models.Model):
     province = models.CharField(max_length=2, unique=True)
-    gst_rate = models.DecimalField(max_digits=5, decimal_places=2, default=0)
-    pst_rate = models.DecimalField(max_digits=5, decimal_places=2, default=0)
-    total_rate = models.DecimalField(max_digits=5, decimal_places=2, default=0)
+    # Three decimals so Quebec's 9.975% QST is exact
+    gst_rate = models.DecimalField(max_digits=6, decimal_places=3, default=0)
+    pst_rate = models.DecimalField(max_digits=6, decimal_places=3, default=0)
+    total_rate = models.DecimalField(max_digits=6, decimal_places=3, default=0)
     is_active = models.BooleanField(default=True)
 
     def __str__(self):
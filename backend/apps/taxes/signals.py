@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import engine
+from .models import ProvinceTaxRate
+
+
+@receiver(post_save, sender=ProvinceTaxRate)
+@receiver(post_delete, sender=ProvinceTaxRate)
+def invalidate_rate_table(sender, **kwargs):
+    engine.invalidate()
@@ -0,0 +1,105 @@
+"""
+Tests for the Taxes app.
+Covers the Decimal tax engine, its cached rate table and the checkout tax breakdown.
+"""
+
+import json
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from apps.orders.models import Address, Order, OrderLine
+from apps.products.models import Category, Product
+from . import engine
+from .models import ProvinceTaxRate
+from .utils import calculate_tax
+
+
+class TaxEngineTests(TestCase):
+    """Tests for per-line, per-component tax."""
+
+    def setUp(self):
+        cache.clear()
+        ProvinceTaxRate.objects.create(province='QC', gst_rate=Decimal('5.00'), pst_rate=Decimal('9.975'),
+                                       total_rate=Decimal('14.975'))
+        ProvinceTaxRate.objects.create(province='ON', gst_rate=13, pst_rate=0, total_rate=13)
+        ProvinceTaxRate.objects.create(province='NS', gst_rate=0, pst_rate=0, total_rate=15)
+        ProvinceTaxRate.objects.create(province='AB', gst_rate=5, pst_rate=0, total_rate=5)
+
+    def test_components_by_province(self):
+        """Rows split into GST + PST, HST or GST, whichever way HST is stored."""
+        self.assertEqual(engine.tax_lines([(100, 'taxable')], 'QC').components,
+                         {'GST': Decimal('5.00'), 'PST': Decimal('9.98')})
+        self.assertEqual(engine.tax_lines([(100, 'taxable')], 'ON').components, {'HST': Decimal('13.00')})
+        self.assertEqual(engine.tax_lines([(100, 'taxable')], 'NS').label, 'HST')
+        self.assertEqual(engine.tax_lines([(100, 'taxable')], 'AB').label, 'GST')
+        self.assertEqual(engine.tax_lines([], 'QC').label, 'GST (5.00%) + PST (9.975%)')
+
+    def test_rounding_is_per_component_and_lines_add_up(self):
+        """Components round half up once per cart; line taxes are the rounded total, split exactly."""
+        lines = [(Decimal('0.10'), 'taxable')] * 3
+        result = engine.tax_lines(lines, 'AB')
+        self.assertEqual(result.total, Decimal('0.02'))  # 0.015 rounds half up, not 3 x 0.01 (or 3 x 0.00)
+        self.assertEqual(sum(result.line_taxes), result.total)
+
+        result = engine.tax_lines([(Decimal('19.99'), 'taxable'), (Decimal('0.07'), 'taxable')], 'QC')
+        self.assertEqual(result.total, Decimal('3.00'))
+        self.assertEqual(sum(result.line_taxes), Decimal('3.00'))
+
+    def test_exempt_lines_and_discount(self):
+        """Exempt and zero-rated lines carry no tax; the discount is spread over all lines first."""
+        lines = [(Decimal('60'), 'taxable'), (Decimal('30'), 'exempt'), (Decimal('10'), 'zero_rated')]
+        result = engine.tax_lines(lines, 'ON', discount=Decimal('10'))
+        self.assertEqual((result.taxable, result.exempt), (Decimal('54.00'), Decimal('36.00')))
+        self.assertEqual(result.line_taxes, [Decimal('7.02'), Decimal('0'), Decimal('0')])
+        self.assertEqual(engine.tax_lines([(5, 'taxable')], 'ON', discount=20).total, Decimal('0.00'))
+
+    def test_rate_table_is_cached(self):
+        """Rates are read once, and re-read after a rate changes."""
+        engine.rate_table()
+        with self.assertNumQueries(0):
+            engine.tax_batch([('QC', [(100, 'taxable')], 0), ('ON', [(50, 'taxable')], 0)])
+        ProvinceTaxRate.objects.filter(province='AB').update(total_rate=6)
+        ProvinceTaxRate.objects.get(province='AB').save()
+        self.assertEqual(engine.tax_lines([(100, 'taxable')], 'AB').total, Decimal('6.00'))
+
+    def test_unknown_province_defaults_to_ontario_hst(self):
+        self.assertEqual(engine.tax_lines([(10, 'taxable')], 'XX').total, Decimal('1.30'))
+
+    def test_tax_orders_in_two_queries(self):
+        """Historical orders are re-taxed in one pass, with each product's tax class."""
+        category = Category.objects.create(name='Boxes', slug='boxes')
+        box = Product.objects.create(sku='BOX', name='Box', category=category, retail_price=Decimal('10'))
+        gift = Product.objects.create(sku='CARD', name='Card', category=category, retail_price=Decimal('5'),
+                                      tax_class='exempt')
+        orders = []
+        for number, province in (('A-1', 'ON'), ('A-2', 'QC')):
+            address = Address.objects.create(first_name='Jo', last_name='Doe', address1='1 Main St',
+                                             city='Toronto', province=province, postal_code='M5V 3A8')
+            order = Order.objects.create(order_number=number, shipping_address=address, billing_address=address)
+            OrderLine.objects.create(order=order, product=box, quantity=3, unit_price=Decimal('10'))
+            OrderLine.objects.create(order=order, product=gift, quantity=1, unit_price=Decimal('5'))
+            orders.append(order)
+
+        engine.rate_table()
+        with self.assertNumQueries(2):
+            results = engine.tax_orders(Order.objects.all())
+        self.assertEqual(results[orders[0].pk].total, Decimal('3.90'))
+        self.assertEqual(results[orders[1].pk].components, {'GST': Decimal('1.50'), 'PST': Decimal('2.99')})
+
+    def test_utils_and_checkout_use_the_engine(self):
+        """Both calculate_tax helpers and the checkout endpoint agree, per product tax class."""
+        self.assertEqual(calculate_tax(Decimal('100'), 'QC'), {
+            'gst': Decimal('5.00'), 'pst': Decimal('9.98'), 'hst': Decimal('0.00'), 'total': Decimal('14.98'),
+        })
+        category = Category.objects.create(name='Boxes', slug='boxes')
+        exempt = Product.objects.create(sku='CARD', name='Card', category=category, retail_price=Decimal('5'),
+                                        tax_class='exempt')
+        payload = {'postal_code': 'H2X 1Y4', 'items': [
+            {'price': 19.99, 'quantity': 2}, {'id': exempt.pk, 'price': 5, 'quantity': 1},
+        ]}
+        data = self.client.post('/api/checkout/calculate/', json.dumps(payload), content_type='application/json').json()
+        self.assertEqual(data['tax_breakdown'], {'GST': 2.0, 'PST': 3.99})
+        self.assertEqual(data['tax'], 5.99)
+        self.assertEqual(data['tax_label'], 'GST (5.00%) + PST (9.975%)')
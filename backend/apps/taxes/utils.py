@@ -1,13 +1,14 @@
 from decimal import Decimal
-from .models import ProvinceTaxRate
+
+from .engine import DEFAULT_CLASS, tax_lines
 
 
 def calculate_tax(subtotal: Decimal, province_code: str) -> dict:
-    try:
-        rate = ProvinceTaxRate.objects.get(province=province_code, is_active=True)
-    except ProvinceTaxRate.DoesNotExist:
-        return {"gst": Decimal("0.00"), "pst": Decimal("0.00"), "total": Decimal("0.00")}
-    gst = (subtotal * (rate.gst_rate / Decimal("100"))).quantize(Decimal("0.01"))
-    pst = (subtotal * (rate.pst_rate / Decimal("100"))).quantize(Decimal("0.01"))
-    total = gst + pst
-    return {"gst": gst, "pst": pst, "total": total}
+    """Tax on a taxable ``subtotal``, by component (see engine.py)."""
+    result = tax_lines([(subtotal, DEFAULT_CLASS)], province_code)
+    return {
+        "gst": result.components.get("GST", Decimal("0.00")),
+        "pst": result.components.get("PST", Decimal("0.00")),
+        "hst": result.components.get("HST", Decimal("0.00")),
+        "total": result.total,
+    }
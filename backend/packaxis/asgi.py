@@ -3,3 +3,7 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "packaxis.settings")
 application = get_asgi_application()
+
+from apps.core.template_warmup import warm_on_startup  # noqa: E402  (needs the app registry)
+
+warm_on_startup()
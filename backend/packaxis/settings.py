@@ -1,5 +1,6 @@
 import os
 from pathlib import Path
+from celery.schedules import crontab
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -59,6 +60,7 @@ INSTALLED_APPS = [
 SITE_ID = 1
 
 MIDDLEWARE = [
+    "apps.core.routers.ReplicaPinningMiddleware",  # outermost, so every write in the request is scoped
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",  # Static files with cache headers
@@ -73,12 +75,20 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = "packaxis.urls"
 
+TEMPLATE_LOADERS = [
+    "django.template.loaders.filesystem.Loader",
+    "django.template.loaders.app_directories.Loader",
+]
+# Compile every project template when a server process starts (apps.core.template_warmup)
+TEMPLATE_WARMUP = os.getenv("TEMPLATE_WARMUP", str(not DEBUG)).lower() == "true"
+
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
-        "DIRS": [BASE_DIR.parent / "frontend" / "templates"],
-        "APP_DIRS": True,
+        "DIRS": [BASE_DIR.parent / "frontend" / "templates", BASE_DIR / "templates"],
         "OPTIONS": {
+            # Compiled templates are kept in memory outside DEBUG; in DEBUG they reload on change
+            "loaders": TEMPLATE_LOADERS if DEBUG else [("django.template.loaders.cached.Loader", TEMPLATE_LOADERS)],
             "context_processors": [
                 "django.template.context_processors.debug",
                 "django.template.context_processors.request",
@@ -94,30 +104,69 @@ WSGI_APPLICATION = "packaxis.wsgi.application"
 ASGI_APPLICATION = "packaxis.asgi.application"
 
 USE_SQLITE = os.getenv("USE_SQLITE", "false").lower() == "true"
-DATABASES = {
-    "default": {
-        **(
-            {
-                "ENGINE": "django.db.backends.sqlite3",
-                "NAME": BASE_DIR / "db.sqlite3",
-            }
-            if USE_SQLITE
-            else {
-                "ENGINE": "django.db.backends.postgresql",
-                "NAME": os.getenv("POSTGRES_DB", "packaxis"),
-                "USER": os.getenv("POSTGRES_USER", "packaxis"),
-                "PASSWORD": os.getenv("POSTGRES_PASSWORD", "packaxis_password"),
-                "HOST": os.getenv("POSTGRES_HOST", "localhost"),
-                "PORT": os.getenv("POSTGRES_PORT", "5432"),
-                "OPTIONS": {
-                    "connect_timeout": 10,
-                },
-                "CONN_MAX_AGE": 0,
-            }
-        )
+
+# Persistent connections: reuse each worker's connection for DB_CONN_MAX_AGE seconds
+# (0 = close after every request) and ping it before reuse so a dropped one is replaced.
+DB_CONN_MAX_AGE = int(os.getenv("DB_CONN_MAX_AGE", "60"))
+DB_CONN_HEALTH_CHECKS = os.getenv("DB_CONN_HEALTH_CHECKS", "true").lower() == "true"
+# Behind pgbouncer in transaction pooling mode a server-side cursor cannot outlive its
+# transaction, so .iterator() must fetch client-side in chunks instead.
+DB_PGBOUNCER_TRANSACTION_POOLING = os.getenv("DB_PGBOUNCER_TRANSACTION_POOLING", "false").lower() == "true"
+
+
+def _postgres(host, port):
+    return {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": os.getenv("POSTGRES_DB", "packaxis"),
+        "USER": os.getenv("POSTGRES_USER", "packaxis"),
+        "PASSWORD": os.getenv("POSTGRES_PASSWORD", "packaxis_password"),
+        "HOST": host,
+        "PORT": port,
+        "OPTIONS": {
+            "connect_timeout": 10,
+        },
+        "CONN_MAX_AGE": DB_CONN_MAX_AGE,
+        "CONN_HEALTH_CHECKS": DB_CONN_HEALTH_CHECKS,
+        "DISABLE_SERVER_SIDE_CURSORS": DB_PGBOUNCER_TRANSACTION_POOLING,
     }
+
+
+DATABASES = {
+    "default": (
+        {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": BASE_DIR / "db.sqlite3",
+        }
+        if USE_SQLITE
+        else _postgres(os.getenv("POSTGRES_HOST", "localhost"), os.getenv("POSTGRES_PORT", "5432"))
+    )
 }
 
+# Optional read replica (apps.core.routers.ReplicaRouter); tests mirror it onto default.
+# With USE_SQLITE, SQLITE_REPLICA_NAME points the alias at a second SQLite file for local testing.
+POSTGRES_REPLICA_HOST = os.getenv("POSTGRES_REPLICA_HOST", "")
+SQLITE_REPLICA_NAME = os.getenv("SQLITE_REPLICA_NAME", "")
+if USE_SQLITE and SQLITE_REPLICA_NAME:
+    DATABASES["replica"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": SQLITE_REPLICA_NAME,
+        "TEST": {"MIRROR": "default"},
+    }
+elif POSTGRES_REPLICA_HOST and not USE_SQLITE:
+    DATABASES["replica"] = {
+        **_postgres(POSTGRES_REPLICA_HOST, os.getenv("POSTGRES_REPLICA_PORT", "5432")),
+        "TEST": {"MIRROR": "default"},
+    }
+DB_REPLICA_ENABLED = "replica" in DATABASES
+DATABASE_ROUTERS = ["apps.core.routers.ReplicaRouter"]
+# Apps whose reads go to the replica unless the request or task has already written
+# (reads that refill signal-invalidated caches always use the primary: apps.core.routers.use_primary)
+DB_REPLICA_APPS = [
+    app.strip()
+    for app in os.getenv("DB_REPLICA_APPS", "products,content,analytics").split(",")
+    if app.strip()
+]
+
 # Redis cache and sessions (with fallback for development)
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 USE_REDIS = os.getenv("USE_REDIS", "false").lower() == "true"
@@ -145,6 +194,11 @@ else:
     }
     SESSION_ENGINE = "django.contrib.sessions.backends.db"
 
+# Versioned template fragment cache (apps.core.fragments); 0 disables it.
+# Set FRAGMENT_CACHE_VERSION per release so cached markup picks up new static asset hashes.
+FRAGMENT_CACHE_TIMEOUT = int(os.getenv("FRAGMENT_CACHE_TIMEOUT", "86400"))
+FRAGMENT_CACHE_VERSION = os.getenv("FRAGMENT_CACHE_VERSION", "1")
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
@@ -189,6 +243,8 @@ STATICFILES_DIRS = [
 STATIC_ROOT = BASE_DIR.parent / "staticfiles"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR.parent / "media"
+# Background admin exports (customer PII, never served from MEDIA_URL)
+EXPORTS_ROOT = Path(os.getenv("EXPORTS_ROOT", BASE_DIR.parent / "exports"))
 
 # WhiteNoise configuration for static file serving with cache headers
 STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
@@ -240,6 +296,52 @@ DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", "support@packaxis.ca")
 SERVER_EMAIL = os.getenv("SERVER_EMAIL", "support@packaxis.ca")
 EMAIL_TIMEOUT = 30
 
+# Write-behind view/helpfulness counters (apps.content.counters), seconds between flushes
+COUNTER_FLUSH_INTERVAL = int(os.getenv("COUNTER_FLUSH_INTERVAL", "60"))
+# Buffered help center search logging (apps.content.search_log)
+SEARCH_LOG_BATCH_SIZE = int(os.getenv("SEARCH_LOG_BATCH_SIZE", "500"))
+
+# Carrier rate quotes (apps.shipping.rates). A carrier without a URL uses the built-in formula;
+# a quote slower than its timeout (seconds) falls back to the method's table rate.
+SHIPPING_CARRIERS = {
+    carrier: {
+        "url": os.getenv(f"{prefix}_RATE_URL", ""),
+        "timeout": float(os.getenv(f"{prefix}_RATE_TIMEOUT", "2.5")),
+    }
+    for carrier, prefix in (("Canada Post", "CANADAPOST"), ("UPS", "UPS"), ("FedEx", "FEDEX"))
+}
+SHIPPING_QUOTE_TTL = int(os.getenv("SHIPPING_QUOTE_TTL", "900"))
+SHIPPING_WEIGHT_BUCKET_KG = float(os.getenv("SHIPPING_WEIGHT_BUCKET_KG", "0.5"))
+
+# Table rates by destination (apps.shipping.postal): multiplier per FSA shipping zone
+# (1 = around the Toronto warehouse, 5 = territories) and surcharge per parcel by area
+SHIPPING_ZONE_FACTORS = {1: "1.00", 2: "1.10", 3: "1.25", 4: "1.40", 5: "1.75"}
+SHIPPING_AREA_SURCHARGES = {
+    "urban": "0.00",
+    "rural": os.getenv("SHIPPING_RURAL_SURCHARGE", "3.00"),
+    "remote": os.getenv("SHIPPING_REMOTE_SURCHARGE", "15.00"),
+}
+
+# Cart packing (apps.shipping.packing): standard cartons as (name, length, width, height cm, max kg),
+# the usable fraction of a carton's volume, and the carriers' dimensional weight divisor (cm3/kg)
+SHIPPING_CARTONS = [
+    ("small", 30, 23, 15, 30),
+    ("medium", 40, 30, 25, 30),
+    ("large", 50, 40, 40, 30),
+    ("xlarge", 60, 50, 50, 30),
+]
+SHIPPING_CARTON_FILL = float(os.getenv("SHIPPING_CARTON_FILL", "0.85"))
+SHIPPING_DIM_DIVISOR = int(os.getenv("SHIPPING_DIM_DIVISOR", "5000"))
+SHIPPING_PACKING_TTL = int(os.getenv("SHIPPING_PACKING_TTL", "3600"))
+
+# Delivery estimates (apps.shipping.delivery): business days skip statutory holidays in the
+# warehouse's province and the destination's; the holiday table is precomputed this many years ahead
+SHIPPING_ORIGIN_PROVINCE = os.getenv("SHIPPING_ORIGIN_PROVINCE", "ON")
+DELIVERY_CALENDAR_YEARS = int(os.getenv("DELIVERY_CALENDAR_YEARS", "3"))
+
+# Quick order / CSV upload (apps.cart.quick_order): most lines accepted per upload
+QUICK_ORDER_MAX_LINES = int(os.getenv("QUICK_ORDER_MAX_LINES", "2000"))
+
 # Celery (disabled in development if Redis unavailable)
 if USE_REDIS:
     CELERY_BROKER_URL = REDIS_URL
@@ -250,6 +352,42 @@ else:
     CELERY_TASK_ALWAYS_EAGER = True
     CELERY_TASK_EAGER_PROPAGATES = True
 CELERY_TIMEZONE = TIME_ZONE
+# admin_dashboard is not an installed app, so autodiscovery does not find its tasks
+CELERY_IMPORTS = ("apps.admin_dashboard.tasks",)
+CELERY_BEAT_SCHEDULE = {
+    # Safety net for outbox rows whose on-commit dispatch was lost (worker restart, broker outage)
+    "dispatch-outbox": {
+        "task": "apps.communications.tasks.dispatch_outbox",
+        "schedule": 60.0,
+    },
+    "rollup-metrics": {
+        "task": "apps.analytics.tasks.rollup_metrics",
+        "schedule": 15 * 60.0,
+    },
+    "flush-counters": {
+        "task": "apps.content.tasks.flush_counters",
+        "schedule": float(COUNTER_FLUSH_INTERVAL),
+    },
+    "flush-search-log": {
+        "task": "apps.content.tasks.flush_search_log",
+        "schedule": float(COUNTER_FLUSH_INTERVAL),
+    },
+    "aggregate-search-terms": {
+        "task": "apps.content.tasks.aggregate_search_terms",
+        "schedule": 15 * 60.0,
+    },
+    "refresh-trending": {
+        "task": "apps.products.tasks.refresh_trending",
+        "schedule": 10 * 60.0,
+    },
+    "reconcile-metrics": {
+        "task": "apps.analytics.tasks.reconcile_metrics",
+        "schedule": crontab(hour=3, minute=15),
+    },
+}
+
+# Transactional outbox
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
 
 # Stripe
 STRIPE_PUBLIC_KEY = os.getenv("STRIPE_PUBLIC_KEY", "")
@@ -3,3 +3,7 @@ from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "packaxis.settings")
 application = get_wsgi_application()
+
+from apps.core.template_warmup import warm_on_startup  # noqa: E402  (needs the app registry)
+
+warm_on_startup()
@@ -3,8 +3,9 @@ Checkout API views for real-time calculations
 Packaxis Checkout System - Backend API (Database-Driven)
 """
 
+import asyncio
 import json
-from datetime import datetime, timedelta
+from asgiref.sync import sync_to_async
 from decimal import Decimal
 from django.http import JsonResponse
 from django.db import transaction
@@ -18,78 +19,128 @@ from apps.promotions.models import Discount
 import logging
 from apps.orders.models import Order, OrderLine, Address as OrderAddress
 from apps.products.models import Product, ProductVariant
+from apps.products import pricing
+from apps.products.utils import get_b2b_price_for_qty
+from apps.communications.outbox import enqueue
+from apps.core.async_api import async_api
+from apps.shipping.delivery import delivery_window, delivery_windows, get_calendar, local_now
+from apps.shipping import postal
+from apps.shipping.packing import pack_items, total_weight
+from apps.shipping.rates import destination_adjustment, fsa_adjustment
+from apps.taxes.engine import DEFAULT_CLASS, rate_table, tax_class_map, tax_lines
 
 logger = logging.getLogger(__name__)
 
-# ============================================================================
-# CONSTANTS (Not configuration - only mappings)
-# ============================================================================
-
-POSTAL_CODE_PROVINCES = {
-    'A': 'NL', 'B': 'NS', 'C': 'PE', 'E': 'NB',
-    'G': 'QC', 'H': 'QC', 'J': 'QC',
-    'K': 'ON', 'L': 'ON', 'M': 'ON', 'N': 'ON', 'P': 'ON',
-    'R': 'MB', 'S': 'SK', 'T': 'AB', 'V': 'BC',
-    'X': 'NT', 'Y': 'YT', 'Z': 'NU'
-}
-
 # ============================================================================
 # UTILITY FUNCTIONS
 # ============================================================================
 
-def validate_postal_code(postal_code):
+def _lookup_destination(postal_code):
     """
-    Validate Canadian postal code format (A1A 1A1)
-    Returns (is_valid, province, error_message)
+    Resolve a postal code in the FSA table (apps.shipping.postal), once per request
+    Returns (FsaInfo, error_message)
     """
     if not postal_code:
-        return False, None, 'Postal code is required'
-    
-    # Remove spaces and convert to uppercase
-    postal_code = postal_code.replace(' ', '').upper()
+        return None, 'Postal code is required'
     
-    # Check format
-    import re
-    if not re.match(r'^[A-Z]\d[A-Z]\d[A-Z]\d$', postal_code):
-        return False, None, 'Invalid postal code format. Use: A1A 1A1'
+    if not postal.is_valid(postal_code):
+        return None, 'Invalid postal code format. Use: A1A 1A1'
     
-    # Extract province from first letter
-    first_letter = postal_code[0]
-    province = POSTAL_CODE_PROVINCES.get(first_letter)
+    info = postal.lookup(postal_code)
     
-    if not province:
-        return False, None, 'Unable to identify province from postal code'
+    if info is None:
+        return None, 'Unable to identify province from postal code'
     
-    return True, province, None
+    return info, None
+
+
+def validate_postal_code(postal_code):
+    """
+    Validate Canadian postal code format (A1A 1A1)
+    Returns (is_valid, province, error_message)
+    The province comes from the FSA table in apps.shipping.postal
+    """
+    info, error = _lookup_destination(postal_code)
+    return info is not None, info.province if info else None, error
+
+
+def _tax_info(result):
+    """Rate and label of a tax engine result (apps.taxes.engine)"""
+    return {
+        'rate': float(result.rate),
+        'label': result.label,
+        'province': result.province
+    }
 
 
 def get_tax_rate(province):
-    """Get tax rate for province from database"""
+    """Get tax rate for province from the cached rate table"""
+    return _tax_info(tax_lines([], province))
+
+
+def calculate_tax(subtotal, province, tax_class=DEFAULT_CLASS):
+    """Calculate tax based on province with the tax engine"""
+    result = tax_lines([(subtotal, tax_class)], province)
+    return float(result.total), _tax_info(result)
+
+
+def _item_product_id(item):
     try:
-        tax_rate = ProvinceTaxRate.objects.get(province=province, is_active=True)
-        # Determine label based on tax structure
-        if tax_rate.pst_rate > 0:
-            label = f'GST ({tax_rate.gst_rate}%) + PST ({tax_rate.pst_rate}%)'
-        elif tax_rate.total_rate >= 13:
-            label = 'HST'
+        return int(item.get('product_id') or item.get('productId') or item.get('id'))
+    except (TypeError, ValueError):
+        return None
+
+
+def _cart_lines(items, user=None):
+    """
+    (unit price, quantity, tax class) for each cart item. Known products are
+    priced at the customer's contract price or their quantity tier
+    (apps.products.pricing); other items keep the price sent by the client.
+    """
+    product_ids = [_item_product_id(item) for item in items]
+    known = [pk for pk in product_ids if pk]
+    retail = dict(Product.objects.filter(pk__in=known).values_list('pk', 'retail_price')) if known else {}
+    tiers = pricing.load(retail, pricing.price_list_for(user))
+    classes = tax_class_map() if retail else {}
+    lines = []
+    for item, product_id in zip(items, product_ids):
+        quantity = int(item.get('quantity', 1))
+        if product_id in retail:
+            unit_price = pricing.price_for_qty(tiers[product_id], quantity, retail[product_id])
         else:
-            label = 'GST'
-        
-        return {
-            'rate': float(tax_rate.total_rate) / 100,  # Convert from percentage to decimal
-            'label': label,
-            'province': province
-        }
-    except ProvinceTaxRate.DoesNotExist:
-        logger.warning(f'Tax rate not found for province: {province}')
-        return {'rate': 0.13, 'label': 'HST', 'province': province}  # Default Ontario rate
+            unit_price = Decimal(str(item.get('price', 0)))
+        lines.append((unit_price, quantity, classes.get(product_id, DEFAULT_CLASS)))
+    return lines
+
+
+def _shipping_cost(method, shipping_method, weight=0):
+    if not method:
+        logger.warning(f'Shipping method not found: {shipping_method}')
+        return 5.00  # Default fallback
+    
+    # Calculate cost: base_rate + (weight * per_kg_rate)
+    base_cost = float(method.base_rate)
+    weight_cost = float(method.per_kg_rate) * weight if weight > 0 else 0
+    total_cost = base_cost + weight_cost
+    
+    return round(total_cost, 2)
 
 
-def calculate_tax(subtotal, province):
-    """Calculate tax based on province from database"""
-    tax_info = get_tax_rate(province)
-    tax_amount = float(subtotal) * tax_info['rate']
-    return round(tax_amount, 2), tax_info
+def _destination_cost(cost, adjustment):
+    """Scale a table rate by the destination's shipping zone and add its rural/remote surcharge"""
+    factor, surcharge = adjustment
+    return round(cost * float(factor) + float(surcharge), 2)
+
+
+def _parcels_cost(method, shipping_method, parcels, destination=None):
+    """Shipping for a packed cart: the method's rate for each parcel's billable weight"""
+    if not method:
+        return _shipping_cost(method, shipping_method)
+    weights = [parcel.billable_weight_kg for parcel in parcels] or [0]
+    adjustment = fsa_adjustment(destination)
+    return round(sum(
+        _destination_cost(_shipping_cost(method, shipping_method, weight), adjustment) for weight in weights
+    ), 2)
 
 
 def calculate_shipping_cost(postal_code, shipping_method, weight=0):
@@ -100,22 +151,58 @@ def calculate_shipping_cost(postal_code, shipping_method, weight=0):
     try:
         # Get first shipping method from database (in case multiple exist with same service_type)
         method = ShippingMethod.objects.filter(service_type=shipping_method, is_active=True).first()
-        
         if not method:
-            logger.warning(f'Shipping method not found: {shipping_method}')
-            return 5.00  # Default fallback
-        
-        # Calculate cost: base_rate + (weight * per_kg_rate)
-        base_cost = float(method.base_rate)
-        weight_cost = float(method.per_kg_rate) * weight if weight > 0 else 0
-        total_cost = base_cost + weight_cost
-        
-        return round(total_cost, 2)
+            return _shipping_cost(method, shipping_method, weight)
+        cost = _shipping_cost(method, shipping_method, weight)
+        return _destination_cost(cost, destination_adjustment(postal_code))
     except Exception as e:
         logger.error(f'Shipping cost calculation error: {str(e)}')
         return 5.00  # Default fallback
 
 
+def _apply_coupon(coupon, subtotal, coupon_code):
+    """
+    Discount for an active Discount row (None when the code does not exist)
+    Returns (discount_amount, coupon_info, error_message)
+    """
+    if coupon is None:
+        return 0.00, None, f'Invalid coupon code: {coupon_code}'
+    
+    # Check validity dates
+    now = timezone.now()
+    if not (coupon.valid_from <= now <= coupon.valid_to):
+        return 0.00, None, 'This coupon has expired or is not yet valid'
+    
+    # Check usage limit
+    if coupon.usage_limit and coupon.usage_count >= coupon.usage_limit:
+        return 0.00, None, 'This coupon has reached its usage limit'
+    
+    # Check minimum order value
+    if float(subtotal) < float(coupon.min_order_value):
+        return 0.00, None, f'Minimum order value of ${coupon.min_order_value} required'
+    
+    # Calculate discount
+    if coupon.percentage:
+        discount_amount = float(subtotal) * (float(coupon.percentage) / 100)
+        discount_type = 'percentage'
+        discount_value = float(coupon.percentage)
+    elif coupon.fixed_amount:
+        discount_amount = float(coupon.fixed_amount)
+        discount_type = 'fixed'
+        discount_value = float(coupon.fixed_amount)
+    else:
+        return 0.00, None, 'Invalid coupon configuration'
+    
+    coupon_info = {
+        'code': coupon.code,
+        'type': discount_type,
+        'discount': discount_value,
+        'label': f'{coupon.code} - {discount_type.title()}'
+    }
+    
+    return round(discount_amount, 2), coupon_info, None
+
+
 def calculate_discount(subtotal, coupon_code):
     """
     Calculate discount from database coupon
@@ -125,90 +212,71 @@ def calculate_discount(subtotal, coupon_code):
         return 0.00, None, None
     
     coupon_code = coupon_code.upper().strip()
-    
-    try:
-        # Get coupon from database
-        coupon = Discount.objects.get(code=coupon_code, is_active=True)
-        
-        # Check validity dates
-        now = timezone.now()
-        if not (coupon.valid_from <= now <= coupon.valid_to):
-            return 0.00, None, 'This coupon has expired or is not yet valid'
-        
-        # Check usage limit
-        if coupon.usage_limit and coupon.usage_count >= coupon.usage_limit:
-            return 0.00, None, 'This coupon has reached its usage limit'
-        
-        # Check minimum order value
-        if float(subtotal) < float(coupon.min_order_value):
-            return 0.00, None, f'Minimum order value of ${coupon.min_order_value} required'
-        
-        # Calculate discount
-        if coupon.percentage:
-            discount_amount = float(subtotal) * (float(coupon.percentage) / 100)
-            discount_type = 'percentage'
-            discount_value = float(coupon.percentage)
-        elif coupon.fixed_amount:
-            discount_amount = float(coupon.fixed_amount)
-            discount_type = 'fixed'
-            discount_value = float(coupon.fixed_amount)
-        else:
-            return 0.00, None, 'Invalid coupon configuration'
-        
-        coupon_info = {
-            'code': coupon.code,
-            'type': discount_type,
-            'discount': discount_value,
-            'label': f'{coupon.code} - {discount_type.title()}'
-        }
-        
-        return round(discount_amount, 2), coupon_info, None
-        
-    except Discount.DoesNotExist:
-        return 0.00, None, f'Invalid coupon code: {coupon_code}'
+    coupon = Discount.objects.filter(code=coupon_code, is_active=True).first()
+    return _apply_coupon(coupon, subtotal, coupon_code)
+
+
+def _format_date(day):
+    return day.strftime('%a, %b %d, %Y')
+
+
+def _delivery_window(method, province=None):
+    """(earliest, latest) delivery dates for a method (None falls back to 5 business days)"""
+    if method is None:
+        latest = get_calendar(province).add_business_days(local_now().date(), 5)  # Default fallback
+        return latest, latest
+    return delivery_window(method, province)
 
 
 def calculate_delivery_date(shipping_method, postal_code=None):
     """
     Calculate estimated delivery date from database
+    Uses the business-day calendar (apps.shipping.delivery): cutoff time, delivery
+    range and statutory holidays in the destination province
     """
     try:
         method = ShippingMethod.objects.filter(service_type=shipping_method, is_active=True).first()
-        days = method.processing_days if method else 5  # Default fallback
     except Exception as e:
         logger.error(f'Delivery date calculation error: {str(e)}')
-        days = 5  # Default fallback
-    
-    # Start from tomorrow (business days only)
-    delivery_date = datetime.now() + timedelta(days=1)
-    
-    # Skip weekends
-    days_added = 0
-    while days_added < days:
-        delivery_date += timedelta(days=1)
-        if delivery_date.weekday() < 5:  # Monday = 0, Friday = 4
-            days_added += 1
-    
-    return delivery_date.strftime('%a, %b %d, %Y')
+        method = None
+    province = validate_postal_code(postal_code)[1] if postal_code else None
+    return _format_date(_delivery_window(method, province)[1])
 
 
 # ============================================================================
 # API ENDPOINTS
 # ============================================================================
 
-@csrf_exempt
-@require_http_methods(['POST'])
-def checkout_calculate_view(request):
+async def _all(queryset):
+    return [obj async for obj in queryset]
+
+
+async def _find_coupon(coupon_code):
+    if not coupon_code:
+        return None
+    return await Discount.objects.filter(code=coupon_code, is_active=True).afirst()
+
+
+@async_api('POST', throttle=False)
+async def checkout_calculate_view(request):
     """
     API endpoint for real-time checkout calculations
     POST /api/checkout/calculate/
+
+    Async: the shipping methods, tax rates and coupon are fetched concurrently,
+    each once, instead of one lookup per helper. Tax is Decimal-exact per line
+    and product tax class (apps.taxes.engine). Known products are priced at
+    the customer's contract price or their quantity tier
+    (apps.products.pricing), whatever price the client sends. Shipping is
+    charged per parcel on billable (dimensional) weight; the cart is packed
+    from product dimensions by apps.shipping.packing, cached per cart content.
     
     Request payload:
     {
         "postal_code": "M5V 3A8",
         "province": "ON",  (optional - will be calculated from postal code)
         "shipping_method": "economy",
-        "items": [{"id": 1, "price": 10.00, "quantity": 2}, ...],
+        "items": [{"id": 1, "price": 10.00, "quantity": 2, "weight": 0.5}, ...],  (weight used only without product dimensions)
         "coupon_code": "SAVE10" (optional)
     }
     
@@ -216,13 +284,18 @@ def checkout_calculate_view(request):
     {
         "success": true,
         "subtotal": 20.00,
+        "unit_prices": [10.00],
         "tax": 2.60,
         "tax_rate": 0.13,
         "tax_label": "HST",
+        "tax_breakdown": {"HST": 2.60},
         "shipping": 5.00,
+        "parcels": 1,
+        "shipping_weight": 1.5,
         "discount": 2.00,
         "total": 25.60,
         "estimated_delivery": "Wed, Feb 12, 2024",
+        "delivery_window": {"min": "2024-02-09", "max": "2024-02-12"},
         "coupon": {"label": "Save 10%"},
         "errors": []
     }
@@ -236,9 +309,9 @@ def checkout_calculate_view(request):
         
         # Validate postal code
         postal_code = data.get('postal_code', '').strip()
-        is_valid, province, error = validate_postal_code(postal_code)
+        destination, error = _lookup_destination(postal_code)
         
-        if not is_valid:
+        if destination is None:
             errors.append(error)
             return JsonResponse({
                 'success': False,
@@ -246,35 +319,37 @@ def checkout_calculate_view(request):
             }, status=400)
         
         # Override with province from request if provided
+        province = destination.province
         if data.get('province'):
             province = data['province'].upper()
         
-        # Calculate subtotal from items
         items = data.get('items', [])
-        subtotal = 0
-        total_weight = 0
-        
-        for item in items:
-            price = float(item.get('price', 0))
-            quantity = int(item.get('quantity', 1))
-            weight = float(item.get('weight', 0))  # Optional
-            
-            subtotal += price * quantity
-            total_weight += weight * quantity
+        coupon_code = (data.get('coupon_code') or '').upper().strip()
+        methods, tax_table, cart_lines, coupon_row, parcels = await asyncio.gather(
+            _all(ShippingMethod.objects.filter(is_active=True).order_by('pk')),
+            sync_to_async(rate_table)(),
+            sync_to_async(_cart_lines)(items, request.user),
+            _find_coupon(coupon_code),
+            sync_to_async(pack_items)(items),
+        )
         
-        subtotal = round(subtotal, 2)
+        # Calculate subtotal from the priced lines
+        line_amounts = [(unit_price * quantity, tax_class) for unit_price, quantity, tax_class in cart_lines]
+        subtotal = round(float(sum((amount for amount, _ in line_amounts), Decimal('0'))), 2)
         
         # Get shipping method - use first match if multiple exist
         shipping_method = data.get('shipping_method', 'standard').lower()
-        if not ShippingMethod.objects.filter(service_type=shipping_method, is_active=True).exists():
-            # Try to get first active shipping method as fallback
-            first_method = ShippingMethod.objects.filter(is_active=True).first()
-            shipping_method = first_method.service_type if first_method else 'standard'
+        method = next((m for m in methods if m.service_type == shipping_method), None)
+        if method is None:
+            # Fall back to the first active shipping method
+            method = methods[0] if methods else None
+            shipping_method = method.service_type if method else 'standard'
         
         # Calculate discount (before tax)
-        discount, coupon, coupon_error = calculate_discount(
-            subtotal, data.get('coupon_code')
-        )
+        if coupon_code:
+            discount, coupon, coupon_error = _apply_coupon(coupon_row, subtotal, coupon_code)
+        else:
+            discount, coupon, coupon_error = 0.00, None, None
         
         if coupon_error:
             errors.append(coupon_error)
@@ -282,30 +357,37 @@ def checkout_calculate_view(request):
         # Apply discount to subtotal
         taxable_amount = subtotal - discount
         
-        # Calculate tax
-        tax, tax_info = calculate_tax(taxable_amount, province)
+        # Calculate tax per line and tax class, with the discount spread over the lines
+        tax_result = tax_lines(line_amounts, province, discount, tax_table)
+        tax = float(tax_result.total)
+        tax_info = _tax_info(tax_result)
         
-        # Calculate shipping
-        shipping = calculate_shipping_cost(postal_code, shipping_method, total_weight)
+        # Calculate shipping on the parcels the cart packs into (dimensional weight)
+        shipping = _parcels_cost(method, shipping_method, parcels, destination)
         
         # Calculate total
         total = taxable_amount + tax + shipping
         total = round(total, 2)
         
         # Calculate delivery date
-        delivery_date = calculate_delivery_date(shipping_method, postal_code)
+        earliest, latest = _delivery_window(method, province)
         
         # Build response
         response = {
             'success': True,
             'subtotal': subtotal,
+            'unit_prices': [float(unit_price) for unit_price, _, _ in cart_lines],
             'tax': tax,
             'tax_rate': tax_info['rate'],
             'tax_label': tax_info['label'],
+            'tax_breakdown': {name: float(amount) for name, amount in tax_result.components.items()},
             'shipping': shipping,
+            'parcels': len(parcels),
+            'shipping_weight': total_weight(parcels),
             'discount': discount,
             'total': total,
-            'estimated_delivery': delivery_date,
+            'estimated_delivery': _format_date(latest),
+            'delivery_window': {'min': earliest.isoformat(), 'max': latest.isoformat()},
             'province': province,
             'errors': errors
         }
@@ -365,24 +447,29 @@ def checkout_provinces_view(request):
 @require_http_methods(['GET'])
 def checkout_shipping_zones_view(request):
     """
-    GET /api/checkout/shipping-zones/
-    Returns available shipping methods from database
+    GET /api/checkout/shipping-zones/?province=ON
+    Returns available shipping methods from database, with the delivery date
+    range for an order placed now (province optional, defaults to Ontario)
     """
     try:
-        shipping_methods = ShippingMethod.objects.filter(is_active=True).order_by('base_rate')
+        shipping_methods = list(ShippingMethod.objects.filter(is_active=True).order_by('base_rate'))
+        windows = delivery_windows(shipping_methods, (request.GET.get('province') or '').upper())
         zones = []
         
         for method in shipping_methods:
+            earliest, latest = windows[method.pk]
             zones.append({
                 'method': method.service_type,
                 'label': method.get_service_type_display(),
                 'carrier': method.carrier,
-                'days': method.get_delivery_range() if hasattr(method, 'get_delivery_range') else f'{method.processing_days} business days',
-                'min_days': method.min_processing_days if hasattr(method, 'min_processing_days') else method.processing_days,
-                'max_days': method.max_processing_days if hasattr(method, 'max_processing_days') else method.processing_days,
+                'days': method.get_delivery_range(),
+                'min_days': method.min_processing_days,
+                'max_days': method.max_processing_days,
+                'min_date': earliest.isoformat(),
+                'max_date': latest.isoformat(),
                 'base_cost': float(method.base_rate),
                 'per_kg_cost': float(method.per_kg_rate),
-                'description': method.get_delivery_range() if hasattr(method, 'get_delivery_range') else f'{method.processing_days} business days'
+                'description': method.get_delivery_range()
             })
         
         return JsonResponse({
@@ -560,7 +647,6 @@ def create_order_view(request):
             for it in items:
                 product_id = it.get('productId') or it.get('id')
                 quantity = int(it.get('quantity', 1))
-                unit_price = Decimal(str(it.get('price', 0)))
                 if not product_id:
                     continue
                 try:
@@ -568,6 +654,8 @@ def create_order_view(request):
                 except Product.DoesNotExist:
                     logger.warning(f"Product not found for order line: {product_id}")
                     continue
+                # Same contract or quantity tier price as the checkout calculation
+                unit_price = get_b2b_price_for_qty(product, quantity, customer)
                 OrderLine.objects.create(
                     order=order,
                     product=product,
@@ -585,17 +673,14 @@ def create_order_view(request):
                 except Discount.DoesNotExist:
                     pass
 
-        redirect_url = f"/orders/{order.order_number}/"
-
-        # Send order confirmation email
-        try:
-            from apps.communications.tasks import send_order_confirmation
+            # Queue order confirmation email in the same transaction; it is
+            # dispatched only after the order has been committed
             email = order.guest_email if order.guest_email else (order.customer.email if order.customer else None)
             if email:
-                send_order_confirmation.delay(order.id, email)
-        except Exception as email_error:
-            logger.error(f'Failed to send order confirmation email: {str(email_error)}')
-            # Don't fail the order creation if email fails
+                enqueue('apps.communications.tasks.send_order_confirmation', order.id, email)
+
+        redirect_url = f"/orders/{order.order_number}/"
+
         return JsonResponse({
             'success': True,
             'order_number': order.order_number,
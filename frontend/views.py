@@ -6,6 +6,7 @@ from django.views.generic import ListView, DetailView
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.http import JsonResponse
 from django.db.models import Q
+from apps.products import pricing
 from apps.products.models import Product, Category
 from apps.orders.models import Order
 
@@ -104,6 +105,9 @@ def product_list_view(request):
     except EmptyPage:
         products_page = paginator.page(paginator.num_pages)
     
+    # Lowest tier (or the customer's contract) price per product, for the "From $X" bulk price
+    pricing.annotate_from_prices(products_page, request.user)
+    
     # Calculate page range for pagination UI
     current_page = products_page.number
     total_pages = paginator.num_pages
@@ -212,13 +216,14 @@ def product_search_ajax(request):
     
     # Serialize products
     products_data = []
-    for product in products_page:
+    for product in pricing.annotate_from_prices(products_page, request.user):
         first_image = product.images.first()
         products_data.append({
             'id': product.id,
             'name': product.name,
             'description': product.description[:150] if product.description else '',
             'price': str(product.retail_price),
+            'from_price': str(product.from_price),
             'sku': product.sku,
             'category': {
                 'name': product.category.name if product.category else None,
@@ -271,6 +276,7 @@ def product_detail_view(request, pk):
         category=product.category,
         is_active=True
     ).exclude(pk=product.pk).prefetch_related('images', 'pricing_tiers')[:6]
+    related_products = pricing.annotate_from_prices(related_products, request.user)
     
     # Build breadcrumb items
     breadcrumb_items = [
@@ -5,7 +5,7 @@ Tests API endpoints under simulated user load.
 Run: locust -f locustfile.py --host=http://localhost:8000 --users=100 --spawn-rate=10
 """
 
-from locust import HttpUser, task, between, events
+from locust import HttpUser, task, between, constant, events
 from random import randint, choice
 import time
 import json
@@ -329,6 +329,74 @@ class AdminUser(HttpUser):
         self.client.get("/api/payments/payments/")
 
 
+class CatalogueReader(HttpUser):
+    """
+    Anonymous catalogue reads against /api/products/items/, to measure per-request
+    connection overhead. Run it alone against the same data twice and compare:
+
+    DB_CONN_MAX_AGE=0  (new Postgres connection per request)
+    DB_CONN_MAX_AGE=60 (persistent connections with health checks)
+
+    locust -f locustfile.py CatalogueReader --host=http://localhost:8000 --users=50 --spawn-rate=10 --run-time=2m --headless
+    """
+
+    wait_time = constant(0.1)
+
+    @task(5)
+    def list_items(self):
+        self.client.get(
+            f"/api/products/items/?page={randint(1, 5)}",
+            name="/api/products/items/[page]"
+        )
+
+    @task(1)
+    def list_categories(self):
+        self.client.get("/api/products/categories/", name="/api/products/categories/")
+
+
+class HighFanoutReader(HttpUser):
+    """
+    The async endpoints under concurrency. Run the same command against the
+    WSGI stack (docker-compose.yml) and the ASGI profile
+    (-f docker-compose.asgi.yml) and compare requests/sec:
+
+    locust -f locustfile.py HighFanoutReader --host=http://localhost:8000 --users=200 --spawn-rate=50 --run-time=2m --headless
+    """
+
+    wait_time = constant(0)
+
+    @task(4)
+    def autocomplete(self):
+        self.client.get(
+            f"/api/products/autocomplete/?q={choice(['bag', 'box', 'kraft', 'straw', 'tape'])}",
+            name="/api/products/autocomplete/?q=[term]"
+        )
+
+    @task(2)
+    def trending(self):
+        self.client.get("/api/products/trending/", name="/api/products/trending/")
+
+    @task(2)
+    def checkout_calculate(self):
+        self.client.post(
+            "/api/checkout/calculate/",
+            json={
+                "postal_code": "M5V 3A8",
+                "shipping_method": "standard",
+                "items": [{"id": 1, "price": 12.50, "quantity": randint(1, 20), "weight": 0.4}],
+            },
+            name="/api/checkout/calculate/"
+        )
+
+    @task(1)
+    def shipping_rates(self):
+        self.client.post(
+            "/api/shipping/rates/",
+            json={"weight_kg": randint(1, 30), "postal_code": "V6B 1A1"},
+            name="/api/shipping/rates/"
+        )
+
+
 # ==================== Event Handlers ====================
 
 @events.test_start.add_listener